@@ -2,10 +2,14 @@ import argparse
 import contextlib
 import os
 import signal
+import sys
 
 import b3
 import b3.config
 import b3.functions
+import b3.hosting
+import b3.replay
+import b3.simulator
 import b3.update
 
 __author__ = "ThorN"
@@ -72,15 +76,166 @@ def run(options):
     start(main_config, options)
 
 
+def run_hosting(config_paths, options):
+    """
+    Run several game servers in the same process.
+    :param config_paths: The B3 configuration file paths, one per game server
+    :param options: command line options
+    """
+    configs = []
+    for config_path in config_paths:
+        main_config = b3.config.get_main_config(config_path)
+        if analysis := main_config.analyze():
+            raise b3.config.ConfigFileNotValid(
+                f"Invalid configuration file specified ({config_path}): "
+                + "\n >>> ".join(analysis)
+            )
+        configs.append(main_config)
+
+    # @conf refers to the directory of the configuration file of the server being set up
+    b3.confdir = os.path.dirname(os.path.abspath(configs[0].fileName))
+    print(f"Starting B3      : {b3.getB3versionString()}", flush=True)
+    print(f"Hosting servers  : {len(configs)}", flush=True)
+
+    host = b3.hosting.ServerHost(configs, options)
+
+    def term_signal_handler(signum, frame):
+        """
+        Define the signal handler so to handle B3 shutdown properly.
+        """
+        host.shutdown()
+
+    with contextlib.suppress(Exception):
+        signal.signal(signal.SIGTERM, term_signal_handler)
+
+    if exitcode := host.run():
+        sys.exit(exitcode)
+
+
+def run_replay(options):
+    """
+    Replay a game log through the parser and the plugins.
+    :param options: command line options
+    """
+    main_config = b3.config.get_main_config(options.config)
+    if analysis := main_config.analyze():
+        raise b3.config.ConfigFileNotValid(
+            "Invalid configuration file specified: " + "\n >>> ".join(analysis)
+        )
+
+    b3.confdir = os.path.dirname(os.path.abspath(main_config.fileName))
+    print(f"Replaying        : {options.game_log}", flush=True)
+    b3.console = b3.replay.create_console(main_config, options)
+    try:
+        b3.console.start()
+    except KeyboardInterrupt:
+        b3.console.shutdown()
+
+
+def main_replay(argv):
+    p = argparse.ArgumentParser(
+        prog="python -m b3 replay",
+        description="Replay a recorded game log through the parser and the plugins "
+        "without a game server (fake RCON, in-memory SQLite storage)",
+    )
+    p.add_argument("game_log", metavar="games.log", help="The game log to replay")
+    p.add_argument(
+        "-c",
+        "--config",
+        dest="config",
+        default=None,
+        metavar="b3.ini",
+        help="B3 config file. Example: -c b3.ini",
+    )
+    p.add_argument(
+        "-s",
+        "--speed",
+        type=float,
+        default=0,
+        help="Replay speed as a multiple of real time, i.e: 10 (default: as fast as possible)",
+    )
+    p.add_argument(
+        "-l",
+        "--logfile",
+        default=None,
+        metavar="b3_replay.log",
+        help="Log to this file instead of the one set in the config file",
+    )
+    options = p.parse_args(argv)
+    if not os.path.isfile(options.game_log):
+        p.error(f"game log not found: {options.game_log}")
+    options.game_log = os.path.abspath(options.game_log)
+    run_replay(options)
+
+
+def main_simulate(argv):
+    p = argparse.ArgumentParser(
+        prog="python -m b3 simulate",
+        description="Run a simulated Urban Terror 4.3 server answering RCON commands "
+        "on UDP and writing a matching game log, to load test B3 on one machine",
+    )
+    p.add_argument("game_log", metavar="games.log", help="The game log to write")
+    p.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    p.add_argument("-p", "--port", type=int, default=27960, help="UDP port")
+    p.add_argument("--password", default="password", help="RCON password")
+    p.add_argument(
+        "-n", "--players", type=int, default=8, help="Players connected on start"
+    )
+    p.add_argument(
+        "-r",
+        "--rate",
+        type=float,
+        default=20,
+        help="Simulated game actions per second, 0 for none (default: 20)",
+    )
+    p.add_argument(
+        "--latency", type=float, default=0, help="Seconds each packet is delayed by"
+    )
+    p.add_argument(
+        "--jitter",
+        type=float,
+        default=0,
+        help="Maximum seconds randomly added to the latency",
+    )
+    p.add_argument(
+        "--loss",
+        type=float,
+        default=0,
+        help="Ratio of packets lost in both directions, i.e: 0.01",
+    )
+    p.add_argument(
+        "--fragment-size",
+        type=int,
+        default=1008,
+        help="Maximum response bytes carried by a packet (default: 1008)",
+    )
+    p.add_argument("--seed", type=int, default=None, help="Random generator seed")
+    options = p.parse_args(argv)
+    if not 0 <= options.loss < 1:
+        p.error(f"loss must be in [0, 1[: {options.loss}")
+    if options.fragment_size <= 0:
+        p.error(f"fragment size must be positive: {options.fragment_size}")
+    b3.simulator.run(options)
+
+
 def main():
+    if sys.argv[1:2] == ["replay"]:
+        main_replay(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["simulate"]:
+        main_simulate(sys.argv[2:])
+        return
+
     p = argparse.ArgumentParser()
     p.add_argument(
         "-c",
         "--config",
         dest="config",
+        action="append",
         default=None,
         metavar="b3.ini",
-        help="B3 config file. Example: -c b3.ini",
+        help="B3 config file, repeat it to host several game servers in the same "
+        "process. Example: -c b3.ini",
     )
     p.add_argument(
         "-u",
@@ -101,12 +256,19 @@ def main():
 
     options, args = p.parse_known_args()
 
-    if not options.config and len(args) == 1:
-        options.config = args[0]
+    config_paths = options.config or []
+    if not config_paths and len(args) == 1:
+        config_paths = [args[0]]
 
     if options.update:
-        run_update(config=options.config)
+        for config_path in config_paths or [None]:
+            run_update(config=config_path)
+
+    if len(config_paths) > 1:
+        run_hosting(config_paths, options)
+        return
 
+    options.config = config_paths[0] if config_paths else None
     run(options)
 
 
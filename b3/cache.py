@@ -0,0 +1,104 @@
+import threading
+import time
+
+__version__ = "1.0"
+
+
+class _Flight:
+    """
+    A value being loaded, shared by every caller asking for it meanwhile.
+    """
+
+    __slots__ = ("done", "error", "value")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+        self.value = None
+
+
+class SingleFlightCache:
+    """
+    Cache values for ttl seconds and make concurrent callers asking for the
+    same missing value share a single load: the first caller loads it, the
+    others wait for its result. With a ttl of 0 values are not kept, but
+    concurrent loads are still coalesced. None values (failed loads) are
+    returned to the waiting callers but never cached.
+    """
+
+    def __init__(self, ttl=0.0, clock=time.monotonic):
+        """
+        Object constructor.
+        :param ttl: The number of seconds during which a value is served from the cache
+        :param clock: The monotonic clock
+        """
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._values = {}  # key => (expiry time, value)
+        self._flights = {}  # key => _Flight
+        self._generation = 0  # incremented on invalidation
+        self.hits = 0  # values served from the cache
+        self.loads = 0  # values loaded
+        self.shared = 0  # callers which waited for a load started by another one
+
+    def get(self, key, loader, refresh=False):
+        """
+        Return a cached value, loading it if missing or expired.
+        :param key: The value key
+        :param loader: The function called without argument to load the value
+        :param refresh: Ignore the cached value (a load already in flight is still shared)
+        :raise Exception: Any exception raised by the loader
+        """
+        with self._lock:
+            if not refresh and (entry := self._values.get(key)) is not None:
+                if entry[0] > self._clock():
+                    self.hits += 1
+                    return entry[1]
+                del self._values[key]
+            if (flight := self._flights.get(key)) is not None:
+                self.shared += 1
+                leader = False
+            else:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+                self.loads += 1
+                leader = True
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except Exception as err:
+            flight.error = err
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if (
+                    flight.error is None
+                    and flight.value is not None
+                    and self.ttl > 0
+                    and generation == self._generation
+                ):
+                    self._values[key] = (self._clock() + self.ttl, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, key=None):
+        """
+        Drop a cached value, or all of them. Loads in flight are not cached.
+        :param key: The value key, None for every value
+        """
+        with self._lock:
+            if key is None:
+                self._values.clear()
+                self._generation += 1
+            else:
+                self._values.pop(key, None)
+                if key in self._flights:
+                    self._generation += 1
@@ -1,4 +1,5 @@
 import contextlib
+import itertools
 import re
 import threading
 import time
@@ -131,6 +132,108 @@ class ClientVar:
         return len(self.value)
 
 
+class RecordVar(ClientVar):
+    """
+    A ClientVar reading and writing a field of a ClientRecord, returned by the
+    Client.var() compatibility API for the fields a plugin declared in a record.
+    """
+
+    def __init__(self, record, field):
+        """
+        Object constructor.
+        :param record: The ClientRecord
+        :param field: The field name
+        """
+        self._record = record
+        self._field = field
+
+    def _get_value(self):
+        return getattr(self._record, self._field)
+
+    def _set_value(self, value):
+        setattr(self._record, self._field, value)
+
+    value = property(_get_value, _set_value)
+
+
+class ClientRecord:
+    """
+    Typed variables stored by a plugin for a client: see Plugin.clientRecord and
+    Client.record(). Subclasses declare their fields in __slots__ and their initial
+    values in defaults: fields missing from defaults start as None, callable defaults
+    (i.e: list) are called to build the initial value, i.e:
+
+    >>> class SpreeRecord(ClientRecord):
+    >>>     __slots__ = ("kills", "deaths", "victims")
+    >>>     defaults = {"kills": 0, "deaths": 0, "victims": list}
+
+    A field is set once it is assigned, which Client.isvar() reports. Until then its
+    slot stays empty and reading it returns its initial value (a callable default is
+    built and stored on the first read, so that changing it in place is kept).
+    """
+
+    __slots__ = ("_initial",)
+    defaults = {}
+    fields = ()  # the field names, in declaration order
+    fieldSet = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        fields = []
+        for klass in reversed(cls.__mro__):
+            slots = klass.__dict__.get("__slots__", ())
+            slots = (slots,) if isinstance(slots, str) else slots
+            fields.extend(slot for slot in slots if not slot.startswith("_"))
+        cls.fields = tuple(fields)
+        cls.fieldSet = frozenset(fields)
+
+    def __init__(self, **values):
+        """
+        Object constructor.
+        :param values: Initial values overriding the defaults
+        """
+        self._initial = values
+
+    def __getattr__(self, name):
+        # only called for the fields which are not set
+        if name not in self.fieldSet:
+            raise AttributeError(name)
+        if name in self._initial:
+            return self._initial[name]
+        value = self.defaults.get(name)
+        if callable(value):
+            value = value()
+            setattr(self, name, value)
+        return value
+
+    def isset(self, field):
+        """
+        Check whether a field was assigned since the record was created or reset.
+        :param field: The field name
+        """
+        try:
+            object.__getattribute__(self, field)
+        except AttributeError:
+            return False
+        return True
+
+    def reset(self, *fields, **values):
+        """
+        Set fields back to their initial value, as not set.
+        :param fields: The names of the fields to reset
+        :param values: Fields to set to the given values instead
+        """
+        for field in fields:
+            with contextlib.suppress(AttributeError):
+                delattr(self, field)
+        for field, value in values.items():
+            setattr(self, field, value)
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.fields)
+        return f"{self.__class__.__name__}({values})"
+
+
 class Client:
     # PVT
     _autoLogin = 1
@@ -152,6 +255,7 @@ class Client:
     _password = ""
     _pluginData = None
     _pbid = ""
+    _records = None
     _team = b3.TEAM_UNKNOWN
     _tempLevel = None
     _timeAdd = 0
@@ -173,6 +277,7 @@ class Client:
         :param kwargs: A dict containing client object attributes.
         """
         self._pluginData = {}
+        self._records = {}
         self.state = b3.STATE_UNKNOWN
         self._data = {}
 
@@ -183,13 +288,48 @@ class Client:
         for k, v in kwargs.items():
             setattr(self, k, v)
 
+    def _reindex(self, attr, old):
+        """
+        Update the index of the connected clients after an indexed attribute changed.
+        :param attr: The attribute name (name, exactName, guid, pbid or ip)
+        :param old: The attribute value before the change
+        """
+        clients = getattr(self.console, "clients", None)
+        if isinstance(clients, Clients):
+            clients.reindex(self, attr, old)
+
+    def record(self, plugin):
+        """
+        Return the record holding the variables of a plugin for this client, creating it if needed.
+        :param plugin: The plugin declaring the record (see Plugin.clientRecord)
+        :return The plugin ClientRecord
+        """
+        try:
+            return self._records[id(plugin)]
+        except KeyError:
+            record = self._records[id(plugin)] = plugin.newClientRecord()
+            return record
+
+    def _recordHas(self, plugin, key):
+        """
+        Check whether a plugin declared a variable as a field of its record.
+        :param plugin: The plugin
+        :param key: The variable name
+        """
+        record_class = getattr(plugin, "clientRecord", None)
+        return record_class is not None and key in record_class.fieldSet
+
     def isvar(self, plugin, key):
         """
         Check whether the given plugin stored a variable under the given key.
+        For the fields of a plugin record, check whether the field was set.
         :param plugin: The plugin that stored the value.
         :param key: The key associated to the value.
         :return True if there is a value, False otherwise
         """
+        if self._recordHas(plugin, key):
+            record = self._records.get(id(plugin))
+            return record is not None and record.isset(key)
         try:
             return key in self._pluginData[id(plugin)]
         except KeyError:
@@ -203,6 +343,9 @@ class Client:
         :param value: The value of this variable.
         :return The stored variable.
         """
+        if self._recordHas(plugin, key):
+            setattr(self.record(plugin), key, value)
+            return RecordVar(self._records[id(plugin)], key)
         plugin_id = id(plugin)
         try:
             plugin_data = self._pluginData[plugin_id]
@@ -225,7 +368,16 @@ class Client:
         :param key: The key of the variable.
         :param default: A default value to be returned if the variable is not stored.
         :return The variable saved under the plugin/key combination or default if it doesn't exists.
-        """
+        The fields of a plugin record are returned as a RecordVar: a field which is not set
+        is set to default, or to its initial value if default is None.
+        """
+        if self._recordHas(plugin, key):
+            record = self.record(plugin)
+            if not record.isset(key):
+                setattr(
+                    record, key, getattr(record, key) if default is None else default
+                )
+            return RecordVar(record, key)
         try:
             return self._pluginData[id(plugin)][key]
         except KeyError:
@@ -247,6 +399,10 @@ class Client:
         :param plugin: The plugin that stored the variable.
         :param key: The key of the variable.
         """
+        if self._recordHas(plugin, key):
+            if (record := self._records.get(id(plugin))) is not None:
+                record.reset(key)
+            return
         with contextlib.suppress(KeyError):
             del self._pluginData[id(plugin)][key]
 
@@ -444,9 +600,11 @@ class Client:
                 self.authed = False
             elif not self._guid:
                 self._guid = guid
+                self._reindex("guid", "")
         else:
             self.authed = False
-            self._guid = ""
+            old, self._guid = self._guid, ""
+            self._reindex("guid", old)
 
     def _get_guid(self):
         return self._guid
@@ -469,7 +627,8 @@ class Client:
             ip = ip[0 : ip.find(":")]
         if self._ip != ip:
             self.makeIpAlias(self._ip)
-        self._ip = ip
+            old, self._ip = self._ip, ip
+            self._reindex("ip", old)
 
     def _get_ip(self):
         return self._ip
@@ -538,8 +697,10 @@ class Client:
             return
 
         self.makeAlias(self._name)
-        self._name = newName
-        self._exactName = name + "^7"
+        old_name, self._name = self._name, newName
+        old_exact_name, self._exactName = self._exactName, name + "^7"
+        self._reindex("name", old_name)
+        self._reindex("exactName", old_exact_name)
 
         if self.console and self.authed:
             self.console.queueEvent(
@@ -564,7 +725,8 @@ class Client:
     password = property(_get_password, _set_password)
 
     def _set_pbid(self, pbid):
-        self._pbid = pbid
+        old, self._pbid = self._pbid, pbid
+        self._reindex("pbid", old)
 
     def _get_pbid(self):
         return self._pbid
@@ -925,46 +1087,59 @@ class Client:
                         self.authorizing = False
                         return False
 
-            if in_storage:
-                self.lastVisit = self.timeEdit
-                self.console.bot(
-                    "Client found in the storage @%s: welcome back %s [FSA: '%s']",
-                    self.id,
-                    self.name,
-                    self.pbid,
-                )
-            else:
-                self.console.bot(
-                    "Client not found in the storage %s [FSA: '%s'], create new",
-                    str(self.guid),
-                    self.pbid,
-                )
-
-            self.connections = int(self.connections) + 1
-            self.name = name
-            self.ip = ip
-            if pbid:
-                self.pbid = pbid
-            self.save()
-            self.authed = True
-
-            # check for bans
-            if self.numBans > 0:
-                ban = self.lastBan
-                if ban:
-                    self.reBan(ban)
-                    self.authorizing = False
-                    return False
+            return self._authorized(in_storage, name, ip, pbid)
+        else:
+            return False
 
-            self.refreshLevel()
-            self.console.queueEvent(
-                self.console.getEvent("EVT_CLIENT_AUTH", data=self, client=self)
+    def _authorized(self, in_storage, name, ip, pbid, bans=None):
+        """
+        Complete the authorization of this client once looked up in the storage.
+        :param in_storage: Whether the client was found in the storage
+        :param name: The client name before the storage lookup
+        :param ip: The client IP address before the storage lookup
+        :param pbid: The client PBID before the storage lookup
+        :param bans: The client active bans, most recent first (queried when None)
+        """
+        if in_storage:
+            self.lastVisit = self.timeEdit
+            self.console.bot(
+                "Client found in the storage @%s: welcome back %s [FSA: '%s']",
+                self.id,
+                self.name,
+                self.pbid,
             )
-            self.authorizing = False
-            return self.authed
         else:
+            self.console.bot(
+                "Client not found in the storage %s [FSA: '%s'], create new",
+                str(self.guid),
+                self.pbid,
+            )
+
+        self.connections = int(self.connections) + 1
+        self.name = name
+        self.ip = ip
+        if pbid:
+            self.pbid = pbid
+        self.save()
+        self.authed = True
+
+        # check for bans
+        if bans is None:
+            ban = self.lastBan if self.numBans > 0 else None
+        else:
+            ban = bans[0] if bans else None
+        if ban:
+            self.reBan(ban)
+            self.authorizing = False
             return False
 
+        self.refreshLevel()
+        self.console.queueEvent(
+            self.console.getEvent("EVT_CLIENT_AUTH", data=self, client=self)
+        )
+        self.authorizing = False
+        return self.authed
+
     def auth_by_guid(self):
         """
         Authorize this client using his GUID.
@@ -999,7 +1174,7 @@ class Client:
                 if client_by_guid.id != self.id:
                     # so storage.getClient is able to overwrite the value which will make
                     # it remain unchanged in database when .save() will be called later on
-                    self._guid = None
+                    self._dropGuid()
             return self.console.storage.getClient(self)
         else:
             self.console.warning(
@@ -1007,6 +1182,13 @@ class Client:
             )
             return False
 
+    def _dropGuid(self):
+        """
+        Forget the client guid so that the one loaded from the storage is kept.
+        """
+        old, self._guid = self._guid, None
+        self._reindex("guid", old)
+
     def auth_by_pbid_and_guid(self):
         """
         Authorize this client using both his PBID and GUID.
@@ -1404,11 +1586,89 @@ class Group(Struct):
         return "Group(%r)" % self.__dict__
 
 
+class SubstringIndex:
+    """
+    Index strings by their substrings of up to 3 characters (n-grams) to find
+    the ones containing a given substring without scanning all of them.
+    """
+
+    def __init__(self):
+        self._grams = {}  # n-gram => set of keys
+        self._values = {}  # key => indexed string
+
+    @staticmethod
+    def _ngrams(value):
+        return {value[i : i + n] for n in (1, 2, 3) for i in range(len(value) - n + 1)}
+
+    def add(self, key, value):
+        """
+        Index a string, replacing the one indexed under the same key.
+        :param key: The key under which the string is indexed
+        :param value: The string
+        """
+        self.remove(key)
+        self._values[key] = value
+        grams = self._grams
+        for gram in self._ngrams(value):
+            grams.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        """
+        Remove the string indexed under a key.
+        :param key: The key under which the string is indexed
+        """
+        if (value := self._values.pop(key, None)) is None:
+            return
+        grams = self._grams
+        for gram in self._ngrams(value):
+            keys = grams[gram]
+            keys.discard(key)
+            if not keys:
+                del grams[gram]
+
+    def search(self, needle):
+        """
+        Return the set of keys of the strings containing needle.
+        :param needle: The substring to search for
+        """
+        if not needle:
+            return set(self._values)
+        grams = self._grams
+        if len(needle) <= 3:
+            return set(grams.get(needle, ()))
+        postings = []
+        for i in range(len(needle) - 2):
+            if (keys := grams.get(needle[i : i + 3])) is None:
+                return set()
+            postings.append(keys)
+        postings.sort(key=len)
+        values = self._values
+        return {
+            key
+            for key in postings[0]
+            if all(key in keys for keys in postings[1:]) and needle in values[key]
+        }
+
+
 class Clients(dict):
     _authorizing = False
+    _deferred = None
     _exactNameIndex = None
     _guidIndex = None
+    _ipIndex = None
     _nameIndex = None
+    _pbidIndex = None
+
+    # indexed client attributes and the function normalizing their values into index keys
+    _indexed = {
+        "name": str.lower,
+        "exactName": str.lower,
+        "guid": str.upper,
+        "pbid": str.lower,
+        "ip": str,
+    }
+
+    _reSpaces = re.compile(r"\s")
 
     console = None
 
@@ -1421,7 +1681,143 @@ class Clients(dict):
         self.console = console
         self._exactNameIndex = {}
         self._guidIndex = {}
+        self._ipIndex = {}
         self._nameIndex = {}
+        self._pbidIndex = {}
+        # substring search on the cleaned names and on the PBIDs
+        self._nameSearch = SubstringIndex()
+        self._pbidSearch = SubstringIndex()
+        self._order = {}  # cid => position of the slot in the dict, to sort search results
+        self._sequence = itertools.count()
+        # held while the indexes are changed: clients connect and change from several threads
+        self._indexLock = threading.RLock()
+        # clients whose authorization is deferred to be done as a batch
+        self._deferred = []
+        self._deferDepth = 0
+        self._deferLock = threading.Lock()
+
+    def __setitem__(self, cid, client):
+        with self._indexLock:
+            if cid not in self:
+                self._order[cid] = next(self._sequence)
+            if (old := self.get(cid)) is not client:
+                self._unindexClient(cid, old)
+                self._indexClient(cid, client)
+            super().__setitem__(cid, client)
+
+    def __delitem__(self, cid):
+        with self._indexLock:
+            self._unindexClient(cid, self.get(cid))
+            self._order.pop(cid, None)
+            super().__delitem__(cid)
+
+    @classmethod
+    def _cleanName(cls, name):
+        """
+        Return a name lowercased and without whitespaces, as matched by the searches.
+        :param name: The name
+        """
+        return cls._reSpaces.sub("", name.lower())
+
+    def _index(self, attr, value, cid):
+        """
+        Add a slot number to an index.
+        :param attr: The indexed attribute name
+        :param value: The attribute value
+        :param cid: The client slot number
+        """
+        if value:
+            key = self._indexed[attr](value)
+            getattr(self, f"_{attr}Index").setdefault(key, []).append(cid)
+
+    def _unindex(self, attr, value, cid):
+        """
+        Remove a slot number from an index.
+        :param attr: The indexed attribute name
+        :param value: The attribute value
+        :param cid: The client slot number
+        """
+        if not value:
+            return
+        index = getattr(self, f"_{attr}Index")
+        key = self._indexed[attr](value)
+        if (cids := index.get(key)) is not None:
+            with contextlib.suppress(ValueError):
+                cids.remove(cid)
+            if not cids:
+                del index[key]
+
+    def _indexClient(self, cid, client):
+        if client is not None:
+            for attr in self._indexed:
+                self._index(attr, getattr(client, attr), cid)
+            self._indexSearch(cid, client)
+
+    def _unindexClient(self, cid, client):
+        if client is not None:
+            for attr in self._indexed:
+                self._unindex(attr, getattr(client, attr), cid)
+            self._nameSearch.remove(cid)
+            self._pbidSearch.remove(cid)
+
+    def _indexSearch(self, cid, client):
+        self._nameSearch.add(cid, self._cleanName(client.name))
+        if client.pbid:
+            self._pbidSearch.add(cid, client.pbid)
+        else:
+            self._pbidSearch.remove(cid)
+
+    def _search(self, needle, pbid=False):
+        """
+        Return the visible clients, in slot order, whose cleaned name contains needle.
+        :param needle: The cleaned substring to search for
+        :param pbid: Whether to return the clients whose PBID contains needle as well
+        """
+        with self._indexLock:
+            cids = self._nameSearch.search(needle)
+            if pbid:
+                cids |= self._pbidSearch.search(needle)
+        order = self._order
+        return [
+            c
+            for cid in sorted(cids, key=lambda cid: order.get(cid, -1))
+            if (c := self.get(cid)) is not None and not c.hide
+        ]
+
+    def _lookup(self, attr, value):
+        """
+        Return the first connected client found in an index.
+        :param attr: The indexed attribute name
+        :param value: The attribute value
+        """
+        normalize = self._indexed[attr]
+        key = normalize(value)
+        with self._indexLock:
+            cids = tuple(getattr(self, f"_{attr}Index").get(key, ()))
+        for cid in cids:
+            # the attribute may have changed since the client was indexed
+            if (client := self.get(cid)) is not None and normalize(
+                getattr(client, attr) or ""
+            ) == key:
+                return client
+        return None
+
+    def reindex(self, client, attr, old):
+        """
+        Update an index after an attribute of a connected client changed.
+        Clients which are not connected (i.e: loaded from the storage) are ignored.
+        :param client: The client
+        :param attr: The indexed attribute name
+        :param old: The attribute value before the change
+        """
+        cid = client.cid
+        with self._indexLock:
+            if cid is None or self.get(cid) is not client:
+                return
+            self._unindex(attr, old, cid)
+            self._index(attr, getattr(client, attr), cid)
+            if attr in ("name", "pbid"):
+                self._indexSearch(cid, client)
 
     def find(self, handle, maxres=None):
         """
@@ -1442,29 +1838,14 @@ class Clients(dict):
         Search a client by matching his name.
         :param name: The name to use for the search
         """
-        name = name.lower()
-        try:
-            return self[self._nameIndex[name]]
-        except Exception:
-            for _cid, c in self.items():
-                if c.name and c.name.lower() == name:
-                    self._nameIndex[name] = c.cid
-                    return c
+        return self._lookup("name", name)
 
     def getByExactName(self, name):
         """
         Search a client by matching his exact name.
         :param name: The name to use for the search
         """
-        name = name.lower() + "^7"
-        try:
-            c = self[self._exactNameIndex[name]]
-            return c
-        except Exception:
-            for _cid, c in self.items():
-                if c.exactName and c.exactName.lower() == name:
-                    self._exactNameIndex[name] = c.cid
-                    return c
+        return self._lookup("exactName", name + "^7")
 
     def getList(self):
         """
@@ -1500,12 +1881,7 @@ class Clients(dict):
         Return a list of clients matching the given name.
         :param name: The name to match
         """
-        needle = re.sub(r"\s", "", name.lower())
-        return [
-            c
-            for _, c in self.items()
-            if not c.hide and needle in re.sub(r"\s", "", c.name.lower())
-        ]
+        return self._search(self._cleanName(name))
 
     def getClientLikeName(self, name):
         """
@@ -1513,8 +1889,9 @@ class Clients(dict):
         :param name: The name to match
         """
         name = name.lower()
-        for _cid, c in self.items():
-            if not c.hide and name in c.name.lower():
+        # clients whose cleaned name contains the cleaned name are the only candidates
+        for c in self._search(self._cleanName(name)):
+            if name in c.name.lower():
                 return c
 
     def getClientsByState(self, state):
@@ -1574,34 +1951,43 @@ class Clients(dict):
                 return [c]
             return []
         else:
-            clients = []
-            needle = re.sub(r"\s", "", handle.lower())
-            for _cid, c in self.items():
-                cleanname = re.sub(r"\s", "", c.name.lower())
-                if (
-                    not c.hide
-                    and (needle in cleanname or needle in c.pbid)
-                    and c not in clients
-                ):
-                    clients.append(c)
-            return clients
+            return self._search(self._cleanName(handle), pbid=True)
 
     def getByGUID(self, guid):
         """
         Return the client matching the given GUID.
         :param guid: The GUID to match
         """
-        guid = guid.upper()
-        try:
-            return self[self._guidIndex[guid]]
-        except Exception:
-            for _cid, c in self.items():
-                if c.guid and c.guid == guid:
-                    self._guidIndex[guid] = c.cid
-                    return c
-                elif b3.functions.fuzzyGuidMatch(c.guid, guid):
-                    # found by fuzzy matching: don't index
-                    return c
+        if client := self._lookup("guid", guid):
+            return client
+        if len(guid) not in (31, 32):
+            return None
+        # fuzzy matching only finds a 32 chars GUID truncated by one char (or the
+        # other way round): compare with the clients having such a GUID only
+        for c in self.values():
+            if (
+                c is not None
+                and len(c.guid) + len(guid) == 63
+                and b3.functions.fuzzyGuidMatch(c.guid, guid)
+            ):
+                return c
+        return None
+
+    def getByPBID(self, pbid):
+        """
+        Return the client matching the given PBID (the auth login on Urban Terror).
+        :param pbid: The PBID to match
+        """
+        return self._lookup("pbid", pbid)
+
+    def getByIP(self, ip):
+        """
+        Return the list of clients connected from the given IP address.
+        :param ip: The IP address, without port
+        """
+        with self._indexLock:
+            cids = tuple(self._ipIndex.get(ip, ()))
+        return [c for cid in cids if (c := self.get(cid)) is not None and c.ip == ip]
 
     def getByCID(self, cid):
         """
@@ -1687,15 +2073,20 @@ class Clients(dict):
                 self.console.getEvent("EVT_CLIENT_DISCONNECT", data=cid, client=client)
             )
 
-        self.resetIndex()
-
     def resetIndex(self):
         """
-        Reset the indexes.
+        Rebuild the indexes from the connected clients.
+        Indexes are kept up to date as clients connect, disconnect or change: this
+        is only needed after clients were added without going through this object.
         """
-        self._nameIndex = {}
-        self._guidIndex = {}
-        self._exactNameIndex = {}
+        with self._indexLock:
+            for attr in self._indexed:
+                setattr(self, f"_{attr}Index", {})
+            self._nameSearch = SubstringIndex()
+            self._pbidSearch = SubstringIndex()
+            self._order = {cid: next(self._sequence) for cid in self}
+            for cid, client in self.items():
+                self._indexClient(cid, client)
 
     def newClient(self, cid, **kwargs):
         """
@@ -1707,13 +2098,13 @@ class Clients(dict):
             console=self.console, cid=cid, timeAdd=self.console.time(), **kwargs
         )
         self[client.cid] = client
-        self.resetIndex()
         self.console.queueEvent(
             self.console.getEvent("EVT_CLIENT_CONNECT", data=client, client=client)
         )
 
         if client.guid and not client.bot:
-            client.auth()
+            if not self._defer(client):
+                client.auth()
         elif not client.authed:
             self.authorizeClients()
         return client
@@ -1726,9 +2117,8 @@ class Clients(dict):
 
     def clear(self):
         """
-        Empty the clients list and reset the indexes.
+        Empty the clients list, hidden clients excepted.
         """
-        self.resetIndex()
         for cid, c in list(self.items()):
             if not c.hide:
                 del self[cid]
@@ -1763,3 +2153,166 @@ class Clients(dict):
         """
         self.console.authorizeClients()
         self._authorizing = False
+
+    def _get_authDeferred(self):
+        return self._deferDepth > 0
+
+    authDeferred = property(_get_authDeferred)
+
+    @contextlib.contextmanager
+    def deferAuth(self):
+        """
+        Defer the authorization of the clients connecting within the block: they
+        are authorized as a batch when the outermost block exits.
+        """
+        with self._deferLock:
+            self._deferDepth += 1
+        try:
+            yield
+        finally:
+            with self._deferLock:
+                self._deferDepth -= 1
+                clients = []
+                if not self._deferDepth:
+                    clients, self._deferred = self._deferred, []
+            try:
+                self.authorize(clients)
+            except Exception as e:
+                # do not mask an exception raised within the block
+                self.console.error("Deferred auth failed", exc_info=e)
+
+    def _defer(self, client):
+        """
+        Queue a client for the batch authorization if authorizations are deferred.
+        :param client: The client
+        :return: Whether the client authorization was deferred
+        """
+        with self._deferLock:
+            if self._deferDepth:
+                self._deferred.append(client)
+                return True
+        return False
+
+    def authorize(self, clients):
+        """
+        Authorize several clients at once: the Frozen Sand accounts are queried in
+        parallel, then the clients and their active bans are loaded with one query each.
+        If the batch lookup fails, the clients fall back on Client.auth().
+        :param clients: The clients to authorize
+        """
+        pending = []
+        for client in clients:
+            if (
+                self.get(client.cid) is client
+                and client.guid
+                and not (client.authed or client.authorizing or client.bot)
+            ):
+                client.authorizing = True
+                pending.append(client)
+
+        if not pending:
+            return
+
+        try:
+            self._authorizePending(pending)
+        except Exception as e:
+            self.console.error("Batch auth failed", exc_info=e)
+            for client in pending:
+                client.authorizing = False
+
+    def _authorizePending(self, pending):
+        """
+        Authorize clients flagged as authorizing (see authorize()).
+        :param pending: The clients to authorize
+        """
+        storage = self.console.storage
+        try:
+            if cids := [c.cid for c in pending if not c.pbid and c.cid]:
+                accounts = self.console.queryClientsFrozenSandAccount(cids)
+                for client in pending:
+                    if client.cid in accounts:
+                        client.pbid = accounts[client.cid].get("login", None)
+
+            rows = storage.getClientsData(
+                guids={client.guid for client in pending},
+                pbids={client.pbid for client in pending if client.pbid},
+            )
+        except Exception as e:
+            self.console.error("Batch auth failed", exc_info=e)
+            rows = None
+
+        if rows is None:
+            # fall back on authorizing the clients one at a time
+            for client in pending:
+                client.authorizing = False
+                client.auth()
+            return
+
+        byGuid = {}
+        byPbid = {}
+        for row in rows:
+            byGuid.setdefault(row.get("guid"), []).append(row)
+            byPbid.setdefault(row.get("pbid"), []).append(row)
+
+        # the values which must survive the storage lookup
+        current = {client: (client.name, client.ip, client.pbid) for client in pending}
+
+        found = {}
+        for client in pending:
+            try:
+                if row := self._storedRow(client, byGuid, byPbid):
+                    if row.get("guid") != client.guid and client.guid in byGuid:
+                        # another entry has the current guid: keep the one of the FSA entry
+                        client._dropGuid()
+                    fixPbid = not client.pbid and row.get("pbid") == "None"
+                    for k, v in row.items():
+                        setattr(client, k, v)
+                    if fixPbid:
+                        # fix up corrupted data due to bug #162
+                        client.pbid = None
+            except Exception as e:
+                self.console.error("Batch auth of %s failed", client.cid, exc_info=e)
+                # Client.auth() starts over from the values the row may have replaced
+                client.name, client.ip, client.pbid = current[client]
+                client.authorizing = False
+                client.auth()
+                continue
+            found[client] = bool(row)
+
+        try:
+            bans = storage.getClientsPenalties(
+                [client for client, in_storage in found.items() if in_storage],
+                ("Ban", "TempBan"),
+            )
+        except Exception as e:
+            # the bans will be queried for each client
+            self.console.error("Batch ban lookup failed", exc_info=e)
+            bans = None
+
+        for client, in_storage in found.items():
+            name, ip, pbid = current[client]
+            clientBans = None if bans is None else bans.get(client.id, [])
+            try:
+                client._authorized(in_storage, name, ip, pbid, clientBans)
+            except Exception as e:
+                self.console.error("Auth of %s failed", client.cid, exc_info=e)
+                client.authorizing = False
+
+    @staticmethod
+    def _storedRow(client, byGuid, byPbid):
+        """
+        Pick the storage row of a client the way Client.auth() would find it.
+        :param client: The client
+        :param byGuid: The loaded storage rows grouped by guid
+        :param byPbid: The loaded storage rows grouped by PBID
+        :return: The row, or None if the client is unknown
+        """
+        if client.pbid and (matching := byPbid.get(client.pbid)):
+            if len(matching) == 1:
+                return matching[0]
+            for row in matching:
+                if row.get("guid") == client.guid:
+                    return row
+        if matching := byGuid.get(client.guid):
+            return matching[0]
+        return None
@@ -0,0 +1,103 @@
+import threading
+import time
+
+__version__ = "1.0"
+
+
+class DamageBatch:
+    """
+    Damage dealt by an attacker to a victim with the same weapon.
+    """
+
+    __slots__ = ("attacker", "hitlocs", "hits", "points", "started", "victim", "weapon")
+
+    def __init__(self, attacker, victim, weapon, started):
+        """
+        Object constructor.
+        :param attacker: The client dealing the damage
+        :param victim: The client taking the damage
+        :param weapon: The weapon used
+        :param started: The time of the first hit
+        """
+        self.attacker = attacker
+        self.victim = victim
+        self.weapon = weapon
+        self.started = started
+        self.points = 0
+        self.hits = 0
+        self.hitlocs = []
+
+    @property
+    def data(self):
+        """
+        The data of the batched damage event: (points, weapon, hits, hitlocs).
+        """
+        return self.points, self.weapon, self.hits, tuple(self.hitlocs)
+
+
+class DamageCoalescer:
+    """
+    Aggregate hits per (attacker, victim, weapon) into damage batches, which
+    are released once they are older than the coalescing window or when
+    flushed (kill, disconnection, end of round).
+    """
+
+    def __init__(self, window, clock=time.monotonic):
+        """
+        Object constructor.
+        :param window: The maximum age of a batch in seconds
+        :param clock: The monotonic clock
+        """
+        self.window = window
+        self._clock = clock
+        self._batches = {}  # (attacker cid, victim cid, weapon) => DamageBatch, oldest first
+        self._lock = threading.Lock()  # batches are also released from a timer thread
+
+    def __len__(self):
+        return len(self._batches)
+
+    def add(self, attacker, victim, weapon, points, hitloc):
+        """
+        Account for a hit.
+        :param attacker: The client dealing the damage
+        :param victim: The client taking the damage
+        :param weapon: The weapon used
+        :param points: The damage points, capped to 100 per hit
+        :param hitloc: The hit location
+        """
+        key = (attacker.cid, victim.cid, weapon)
+        with self._lock:
+            if (batch := self._batches.get(key)) is None:
+                batch = self._batches[key] = DamageBatch(
+                    attacker, victim, weapon, self._clock()
+                )
+            batch.points += min(int(points), 100)
+            batch.hits += 1
+            batch.hitlocs.append(hitloc)
+
+    def expired(self):
+        """
+        Remove and return the batches older than the coalescing window.
+        """
+        batches = []
+        deadline = self._clock() - self.window
+        with self._lock:
+            while self._batches:
+                key = next(iter(self._batches))
+                if self._batches[key].started > deadline:
+                    break
+                batches.append(self._batches.pop(key))
+        return batches
+
+    def flush(self, cid=None):
+        """
+        Remove and return the batches involving a client, or all of them.
+        :param cid: The slot number of the attacker or victim, None for every batch
+        """
+        with self._lock:
+            if cid is None:
+                batches = list(self._batches.values())
+                self._batches.clear()
+                return batches
+            keys = [key for key in self._batches if cid in (key[0], key[1])]
+            return [self._batches.pop(key) for key in keys]
@@ -0,0 +1,118 @@
+import queue
+import threading
+from collections import deque
+
+from b3.functions import start_daemon_thread
+
+__version__ = "1.0"
+
+
+class _Task:
+    __slots__ = ("args", "blockers", "func", "keys")
+
+    def __init__(self, func, args, keys):
+        self.func = func
+        self.args = args
+        self.keys = keys
+        self.blockers = 0
+
+
+class OrderedExecutor:
+    """
+    Run tasks on a pool of worker threads.
+    Tasks sharing an ordering key run one at a time, in submission order,
+    while tasks without any key in common run in parallel.
+    """
+
+    def __init__(self, workers, name="worker", console=None):
+        """
+        Object constructor.
+        :param workers: The number of worker threads
+        :param name: The prefix of the worker thread names
+        :param console: The console used to log task failures
+        """
+        self.console = console
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._ready = queue.SimpleQueue()
+        self._waiting = {}  # key => deque of tasks, the head being ready or running
+        self._pending = 0  # number of submitted tasks not completed yet
+        self._threads = [
+            start_daemon_thread(target=self._work, name=f"{name}-{i}")
+            for i in range(workers)
+        ]
+
+    def submit(self, keys, func, *args):
+        """
+        Schedule a task.
+        :param keys: The ordering keys of the task
+        :param func: The callable to run
+        :param args: The callable arguments
+        """
+        task = _Task(func, args, tuple(dict.fromkeys(keys)))
+        with self._lock:
+            self._pending += 1
+            for key in task.keys:
+                if tasks := self._waiting.get(key):
+                    tasks.append(task)
+                    task.blockers += 1
+                else:
+                    self._waiting[key] = deque((task,))
+            ready = not task.blockers
+        if ready:
+            self._ready.put(task)
+
+    def _complete(self, task):
+        ready = []
+        with self._lock:
+            for key in task.keys:
+                tasks = self._waiting[key]
+                tasks.popleft()
+                if not tasks:
+                    del self._waiting[key]
+                    continue
+                head = tasks[0]
+                head.blockers -= 1
+                if not head.blockers:
+                    ready.append(head)
+            self._pending -= 1
+            if not self._pending:
+                self._idle.notify_all()
+        for head in ready:
+            self._ready.put(head)
+
+    def _work(self):
+        while (task := self._ready.get()) is not None:
+            try:
+                task.func(*task.args)
+            except Exception as err:
+                if self.console:
+                    self.console.error("Task %r failed: %s", task.func, err)
+            finally:
+                self._complete(task)
+
+    @property
+    def pending(self):
+        """
+        The number of submitted tasks not completed yet.
+        """
+        return self._pending
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until every submitted task is completed.
+        :param timeout: The maximum time to wait
+        :return: True if idle, False if the timeout expired
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending, timeout)
+
+    def stop(self, timeout=None):
+        """
+        Stop the worker threads once the ready tasks are completed.
+        :param timeout: The maximum time to wait for every worker thread
+        """
+        for _ in self._threads:
+            self._ready.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
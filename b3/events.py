@@ -1,9 +1,13 @@
 import functools
-import re
+import itertools
+import json
+import os
+import queue
+import threading
 import time
 from collections import defaultdict, deque
 
-from b3.functions import meanstdv
+from b3.histogram import LatencyHistogram
 
 __author__ = "ThorN, xlr8or, Courgette"
 __version__ = "1.8.2"
@@ -12,6 +16,7 @@ __version__ = "1.8.2"
 class Events:
     def __init__(self):
         self._events = {}
+        self._event_keys = {}
         self._event_names = {}
 
         self.loadEvents(
@@ -89,6 +94,7 @@ class Events:
                 ("EVT_CLIENT_THAWOUT_FINISHED", "Event client thawout finished"),
                 ("EVT_CLIENT_MELTED", "Event client melted"),
                 ("EVT_ASSIST", "Event assist"),
+                ("EVT_CLIENT_DAMAGE_BATCH", "Client Damage Batch"),
             )
         )
 
@@ -105,6 +111,7 @@ class Events:
         except KeyError:
             _id = self._events[key] = len(self._events) + 1
 
+        self._event_keys[_id] = key
         self._event_names[_id] = name or f"Unnamed ({key})"
 
         g[key] = _id
@@ -115,24 +122,27 @@ class Events:
         Return an event ID given its key.
         :param key: The event key
         """
-        if re.match("^[0-9]+$", str(key)):
+        try:
+            return self._events[key]
+        except KeyError:
+            pass
+        except TypeError:
+            return None
+        if type(key) is int:
+            return key
+        if isinstance(key, str) and key.isascii() and key.isdigit():
             return int(key)
-        return self._events.get(key)
+        return None
 
-    @functools.cache  # noqa: B019
     def getKey(self, event_id):
         """
         Get the key of a given event ID.
         :param event_id: The event ID
         """
-        matching_keys = [k for k, v in self._events.items() if v == event_id]
-        if not matching_keys:
-            raise KeyError(f"could not find any B3 event with ID {event_id}")
-        if len(matching_keys) != 1:
-            raise RuntimeError(
-                f"expecting only one event key per event ID: {matching_keys!r}"
-            )
-        return matching_keys[0]
+        try:
+            return self._event_keys[event_id]
+        except KeyError:
+            raise KeyError(f"could not find any B3 event with ID {event_id}") from None
 
     def getName(self, key):
         """
@@ -158,6 +168,8 @@ class Events:
 
 
 class Event:
+    __slots__ = ("client", "data", "key", "target", "time", "trace", "type")
+
     def __init__(self, type, data, client=None, target=None):
         """
         Object constructor.
@@ -172,50 +184,250 @@ class Event:
         self.client = client
         self.target = target
         self.key = eventManager.getKey(type)
+        self.trace = None  # b3.tracing.Trace of the game log line, if sampled
 
     def __str__(self):
         return f"Event<{self.key}>({self.data!r}, {self.client}, {self.target})"
 
 
 class EventsStats:
-    def __init__(self, console, max_samples=100):
+    def __init__(self, console):
         """
         Object constructor.
         :param console: The console class instance
-        :param max_samples: The size of the event queue
         """
         self.console = console
-        deque_with_max = functools.partial(deque, maxlen=max_samples)
-        dict_deque = functools.partial(defaultdict, deque_with_max)
-        self._handling_timers = defaultdict(dict_deque)
+        # plugin name => event name => histogram of the handling times
+        self._handling_timers = defaultdict(
+            functools.partial(defaultdict, LatencyHistogram)
+        )
+        # event name => histogram of the times spent in the event queue
+        self._waiting_timers = defaultdict(LatencyHistogram)
 
     def add_event_handled(self, plugin_name, event_name, elapsed):
         """
         Add an event to the dict of handled ones.
         :param plugin_name: The name of the plugin which handled the event
         :param event_name: The event name
-        :param elapsed: The amount of milliseconds necessary to handle the event
+        :param elapsed: The amount of seconds necessary to handle the event
+        """
+        self._handling_timers[plugin_name][event_name].record(elapsed)
+
+    def add_event_wait(self, event_name, elapsed):
+        """
+        Account for the time an event spent in the event queue.
+        :param event_name: The event name
+        :param elapsed: The amount of seconds the event waited to be dispatched
+        """
+        self._waiting_timers[event_name].record(elapsed)
+
+    def handling_stats(self):
+        """
+        Return a list of (plugin name, event name, histogram) tuples.
         """
-        self._handling_timers[plugin_name][event_name].append(elapsed)
+        return [
+            (plugin_name, event_name, histogram)
+            for plugin_name, plugin_timers in list(self._handling_timers.items())
+            for event_name, histogram in list(plugin_timers.items())
+        ]
+
+    def waiting_stats(self):
+        """
+        Return a list of (event name, histogram) tuples.
+        """
+        return list(self._waiting_timers.items())
+
+    def summary(self):
+        """
+        Return the event stats as a dict which can be serialized to JSON.
+        """
+        handling = defaultdict(dict)
+        for plugin_name, event_name, histogram in self.handling_stats():
+            handling[plugin_name][event_name] = histogram.summary()
+        return {
+            "time": time.time(),
+            "handling": handling,
+            "waiting": {
+                event_name: histogram.summary()
+                for event_name, histogram in self.waiting_stats()
+            },
+        }
+
+    def write(self, path):
+        """
+        Atomically write the event stats into a JSON file.
+        :param path: The file path
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.summary(), f, indent=1)
+        os.replace(tmp_path, path)
 
     def dump_stats(self):
         """
         Print event stats in the log file.
         """
         self.console.info("***** Event Stats *****")
-        for plugin_name, plugin_timers in self._handling_timers.items():
-            for event_name, event_timers in plugin_timers.items():
-                if event_timers:
-                    mean, stdv = meanstdv(event_timers)
-                    self.console.info(
-                        "%s %s : min(%0.4f), max(%0.4f), mean(%0.4f), stddev(%0.4f)",
-                        plugin_name,
-                        event_name,
-                        min(event_timers),
-                        max(event_timers),
-                        mean,
-                        stdv,
-                    )
+        for plugin_name, event_name, histogram in self.handling_stats():
+            self.console.info(
+                "%s %s : count(%i), mean(%0.4f), p50(%0.4f), p95(%0.4f), p99(%0.4f), max(%0.4f)",
+                plugin_name,
+                event_name,
+                histogram.count,
+                histogram.mean,
+                histogram.percentile(50),
+                histogram.percentile(95),
+                histogram.percentile(99),
+                histogram.max,
+            )
+        for event_name, histogram in self.waiting_stats():
+            self.console.info(
+                "queue wait %s : count(%i), mean(%0.4f), p50(%0.4f), p95(%0.4f), p99(%0.4f), max(%0.4f)",
+                event_name,
+                histogram.count,
+                histogram.mean,
+                histogram.percentile(50),
+                histogram.percentile(95),
+                histogram.percentile(99),
+                histogram.max,
+            )
+
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_LAST = 3  # never dropped (i.e: EVT_STOP)
+
+
+class EventQueue:
+    """
+    Bounded queue of (added, expire, event) tuples served in FIFO order, so that
+    the events of a client are handled in the order they happened. Priority
+    classes only matter when the queue is full: room is made by dropping the
+    oldest events of a lower priority class, and low priority events are
+    dropped instead of waiting for room. Events of the last class are never
+    dropped.
+    """
+
+    def __init__(self, maxsize, priorities=None):
+        """
+        Object constructor.
+        :param maxsize: The maximum number of queued events
+        :param priorities: A dict mapping event IDs to their priority class (defaults to PRIORITY_NORMAL)
+        """
+        self.maxsize = maxsize
+        self.priorities = priorities or {}
+        # (sequence number, item) of each priority class, served by sequence number
+        self._queues = tuple(deque() for _ in range(PRIORITY_LAST + 1))
+        self._sequence = itertools.count()
+        self._size = 0
+        self._mutex = threading.Lock()
+        self._not_empty = threading.Condition(self._mutex)
+        self._not_full = threading.Condition(self._mutex)
+        self.dropped = defaultdict(int)  # event key => events dropped
+        self.expired = defaultdict(
+            int
+        )  # event key => events which sat in queue too long
+        self.delayed = 0  # number of events which had to wait for room in the queue
+
+    def qsize(self):
+        return self._size
+
+    def empty(self):
+        return not self._size
+
+    def full(self):
+        return self._size >= self.maxsize
+
+    def _shed(self, priority):
+        """
+        Drop the oldest event of the lowest priority class below the given one,
+        releasing the trace it was bound to.
+        :return: True if an event was dropped, False otherwise
+        """
+        # the events of the last class are never examined
+        for lower in range(PRIORITY_LOW, priority, -1):
+            if events := self._queues[lower]:
+                _, item = events.popleft()
+                self._size -= 1
+                self.dropped[item[2].key] += 1
+                if (trace := item[2].trace) is not None:
+                    trace.release()
+                return True
+        return False
+
+    def put(self, item, block=True, timeout=None, shed=True):
+        """
+        Queue an event.
+        :param item: The (added, expire, event) tuple
+        :param block: Whether to wait for room when the queue is full
+        :param timeout: The maximum time to wait for room
+        :param shed: Whether to drop low priority events instead of waiting for room
+        :return: True if the event was queued, False if it was dropped
+        :raise queue.Full: If no room could be made in time
+        """
+        event = item[2]
+        priority = self.priorities.get(event.type, PRIORITY_NORMAL)
+        with self._not_full:
+            if self._size >= self.maxsize and not (shed and self._shed(priority)):
+                if shed and priority == PRIORITY_LOW:
+                    self.dropped[event.key] += 1
+                    return False
+                if block:
+                    self.delayed += 1
+                if not block or not self._not_full.wait_for(
+                    lambda: self._size < self.maxsize, timeout
+                ):
+                    self.dropped[event.key] += 1
+                    raise queue.Full
+            self._queues[priority].append((next(self._sequence), item))
+            self._size += 1
+            self._not_empty.notify()
+            return True
+
+    def get(self, block=True, timeout=None):
+        """
+        Remove and return the oldest event.
+        :param block: Whether to wait for an event when the queue is empty
+        :param timeout: The maximum time to wait for an event
+        :raise queue.Empty: If no event was available in time
+        """
+        with self._not_empty:
+            if not block and not self._size:
+                raise queue.Empty
+            if not self._not_empty.wait_for(lambda: self._size, timeout):
+                raise queue.Empty
+            _, item = min(
+                (events for events in self._queues if events),
+                key=lambda events: events[0][0],
+            ).popleft()
+            self._size -= 1
+            self._not_full.notify()
+            return item
+
+    def add_expired(self, event):
+        """
+        Account for an event which sat in queue too long.
+        :param event: The expired event
+        """
+        self.expired[event.key] += 1
+
+    def dump_stats(self, console):
+        """
+        Print the queue counters in the log file.
+        :param console: The console class instance
+        """
+        console.info(
+            "Event queue: size %s/%s, delayed %s, dropped %s, expired %s",
+            self._size,
+            self.maxsize,
+            self.delayed,
+            sum(self.dropped.values()),
+            sum(self.expired.values()),
+        )
+        for kind, counters in (("dropped", self.dropped), ("expired", self.expired)):
+            for event_key, count in sorted(counters.items()):
+                console.info("Event queue: %s %s %s", kind, count, event_key)
 
 
 class VetoEvent(Exception):
@@ -0,0 +1,370 @@
+import contextlib
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import time
+
+__version__ = "1.0"
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0)
+
+_inotify_event = struct.Struct("iIII")
+
+WATCH_MODES = ("poll", "backoff", "inotify", "auto")
+
+
+def _load_libc():
+    """
+    Return the C library exposing the inotify API or None if not available.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        libc.inotify_init1  # noqa: B018
+        libc.inotify_add_watch  # noqa: B018
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+def load_checkpoint(path):
+    """
+    Read a game log checkpoint file.
+    :param path: The checkpoint file path
+    :return: The checkpoint dict or None if missing or unreadable
+    """
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(state, dict) or not {"inode", "dev", "offset"} <= state.keys():
+        return None
+    return state
+
+
+def save_checkpoint(path, state):
+    """
+    Atomically write a game log checkpoint file.
+    :param path: The checkpoint file path
+    :param state: The checkpoint dict (see GameLog.checkpoint)
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+class PollWatcher:
+    """
+    Wait a fixed amount of time between each game log read (legacy behavior).
+    """
+
+    name = "poll"
+
+    def __init__(self, delay):
+        """
+        Object constructor.
+        :param delay: The time to wait between each game log read
+        """
+        self.delay = delay
+
+    def wait(self, had_lines):
+        """
+        Block until the game log should be read again.
+        :param had_lines: Whether the last read returned any line
+        """
+        time.sleep(self.delay)
+
+    def close(self):
+        pass
+
+
+class BackoffWatcher(PollWatcher):
+    """
+    Poll the game log again right away while it is busy and double the
+    waiting time on every idle read, up to the configured delay.
+    """
+
+    name = "backoff"
+    min_delay = 0.01
+
+    def __init__(self, delay):
+        """
+        Object constructor.
+        :param delay: The maximum time to wait between each game log read
+        """
+        super().__init__(delay)
+        self._current = self.min_delay
+
+    def wait(self, had_lines):
+        """
+        Block until the game log should be read again.
+        :param had_lines: Whether the last read returned any line
+        """
+        if had_lines:
+            self._current = self.min_delay
+            return
+        time.sleep(self._current)
+        self._current = min(self._current * 2, self.delay)
+
+
+class InotifyWatcher(PollWatcher):
+    """
+    Wait for the kernel to signal a change of the game log (Linux only).
+    The directory holding the game log is watched so that rotated or
+    recreated files keep waking us up.
+    """
+
+    name = "inotify"
+    mask = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM
+    mask |= IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    def __init__(self, delay, path, libc):
+        """
+        Object constructor.
+        :param delay: The maximum time to block without any notification
+        :param path: The path of the game log file
+        :param libc: The C library exposing the inotify API
+        :raise OSError: If the inotify watch cannot be created
+        """
+        super().__init__(delay)
+        self._basename = os.fsencode(os.path.basename(path))
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        directory = os.fsencode(os.path.dirname(os.path.abspath(path)))
+        if libc.inotify_add_watch(self._fd, directory, self.mask) < 0:
+            err = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(err, os.strerror(err))
+
+    def wait(self, had_lines):
+        """
+        Block until the game log changes.
+        :param had_lines: Whether the last read returned any line
+        """
+        if had_lines:
+            return
+        deadline = time.monotonic() + self.delay
+        while (timeout := deadline - time.monotonic()) > 0:
+            readables, _, _ = select.select([self._fd], [], [], timeout)
+            if not readables:
+                return
+            if self._drain():
+                return
+
+    def _drain(self):
+        """
+        Consume pending notifications.
+        :return: True if one of them concerns the game log file
+        """
+        try:
+            buf = os.read(self._fd, 4096)
+        except BlockingIOError:
+            return False
+        found = False
+        offset = 0
+        while offset + _inotify_event.size <= len(buf):
+            _, _, _, length = _inotify_event.unpack_from(buf, offset)
+            offset += _inotify_event.size
+            name = buf[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if name == self._basename:
+                found = True
+        return found
+
+    def close(self):
+        with contextlib.suppress(OSError):
+            os.close(self._fd)
+
+
+class GameLog:
+    """
+    Tail the game log file.
+    Rotation is detected by comparing the inode of the open file with the one
+    found at the configured path, truncation by comparing the current file
+    size with our read position.
+    """
+
+    def __init__(self, console, path, seek_end=True, watch="poll", delay=0.33):
+        """
+        Object constructor.
+        :param console: The console implementation
+        :param path: The path of the game log file
+        :param seek_end: Whether to start reading from the end of the file
+        :param watch: How to wait for new lines (one of WATCH_MODES)
+        :param delay: The (maximum) time to wait between each game log read
+        """
+        self.console = console
+        self.path = path
+        self._partial = ""
+        self._file = open(path)  # noqa: SIM115
+        if seek_end:
+            self._file.seek(0, os.SEEK_END)
+        self.watcher = self._create_watcher(watch, delay)
+        self.reads = 0
+        self.idle_reads = 0
+        self.lines = 0
+        self.rotations = 0
+        self.wait_time = 0.0
+
+    def _create_watcher(self, watch, delay):
+        if watch not in WATCH_MODES:
+            self.console.warning(
+                "Unknown game log watch mode %r: expecting one of %s, using 'poll'",
+                watch,
+                ", ".join(WATCH_MODES),
+            )
+            watch = "poll"
+
+        if watch in ("inotify", "auto"):
+            if libc := _load_libc():
+                try:
+                    return InotifyWatcher(delay, self.path, libc)
+                except OSError as err:
+                    self.console.warning("Could not watch game log: %s", err)
+            if watch == "inotify":
+                self.console.warning("inotify not available: falling back to backoff")
+            watch = "backoff"
+
+        if watch == "backoff":
+            return BackoffWatcher(delay)
+        return PollWatcher(delay)
+
+    def readlines(self):
+        """
+        Return the complete lines appended to the game log since the last call.
+        """
+        self.reads += 1
+        if not (data := self._file.read()):
+            data = self._check_rotation()
+
+        if not data:
+            self.idle_reads += 1
+            return []
+
+        lines = (self._partial + data).splitlines(keepends=True)
+        # keep an incomplete trailing line for the next read
+        self._partial = "" if lines[-1].endswith("\n") else lines.pop()
+        self.lines += len(lines)
+        return lines
+
+    def _check_rotation(self):
+        """
+        Reopen or rewind the game log if it was rotated or truncated.
+        :return: The data available in the new file
+        """
+        try:
+            current = os.stat(self.path)
+        except FileNotFoundError:
+            # rotated away and not recreated yet
+            return ""
+
+        opened = os.fstat(self._file.fileno())
+        if (current.st_ino, current.st_dev) != (opened.st_ino, opened.st_dev):
+            self.console.warning(
+                "Parser: game log %s was rotated, reading the new file", self.path
+            )
+            # flush what was written to the old file before the rotation
+            data = self._file.read()
+            self._file.close()
+            self._file = open(self.path)  # noqa: SIM115
+        elif opened.st_size < self._file.tell():
+            self.console.warning(
+                "Parser: game log %s was truncated (%s bytes, was at %s), "
+                "reading from the start",
+                self.path,
+                opened.st_size,
+                self._file.tell(),
+            )
+            self._file.seek(0)
+            data = ""
+        else:
+            return ""
+
+        self.rotations += 1
+        self._partial = ""
+        return data + self._file.read()
+
+    def wait(self, had_lines):
+        """
+        Block until new lines may be available.
+        :param had_lines: Whether the last read returned any line
+        """
+        start = time.perf_counter()
+        self.watcher.wait(had_lines)
+        self.wait_time += time.perf_counter() - start
+
+    def checkpoint(self):
+        """
+        Return the position of the first line not returned by readlines yet.
+        """
+        opened = os.fstat(self._file.fileno())
+        offset = self._file.tell() - len(self._partial.encode(self._file.encoding))
+        return {
+            "path": os.path.abspath(self.path),
+            "inode": opened.st_ino,
+            "dev": opened.st_dev,
+            "offset": offset,
+        }
+
+    def resume(self, state):
+        """
+        Move to a checkpointed position if it belongs to the open file.
+        :param state: The checkpoint dict (see checkpoint)
+        :return: True if the position was restored, False otherwise
+        """
+        opened = os.fstat(self._file.fileno())
+        if (state["inode"], state["dev"]) != (opened.st_ino, opened.st_dev):
+            return False
+        if not 0 <= state["offset"] <= opened.st_size:
+            return False
+        self.seek(state["offset"])
+        return True
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        self._partial = ""
+        return self._file.seek(offset, whence)
+
+    def tell(self):
+        return self._file.tell()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self.watcher.close()
+        self._file.close()
+
+    def dump_stats(self):
+        """
+        Print game log reading stats in the log file.
+        """
+        self.console.debug(
+            "Game log (%s): reads(%s), idle(%s), lines(%s), rotations(%s), wait(%0.2fs)",
+            self.watcher.name,
+            self.reads,
+            self.idle_reads,
+            self.lines,
+            self.rotations,
+            self.wait_time,
+        )
+
+    def __str__(self):
+        return f"GameLog({self.path}, watch={self.watcher.name})"
@@ -0,0 +1,97 @@
+import math
+
+__version__ = "1.0"
+
+
+class LatencyHistogram:
+    """
+    Fixed size log-linear histogram of durations: every power of two of
+    microseconds is split into SUB_BUCKETS linear buckets, which bounds the
+    relative error of the reported percentiles to 1 / SUB_BUCKETS.
+    Durations below 1 microsecond share the first bucket, durations above
+    2 ** OCTAVES microseconds (about 4.5 minutes) share the last one.
+    """
+
+    SUB_BUCKETS = 8
+    OCTAVES = 28
+    SIZE = SUB_BUCKETS * OCTAVES + 1
+
+    __slots__ = ("buckets", "max", "total")
+
+    def __init__(self):
+        self.buckets = [0] * self.SIZE
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds, frexp=math.frexp):
+        """
+        Add a duration to the histogram.
+        :param seconds: The duration in seconds
+        """
+        # microseconds = mantissa * 2 ** exponent with 0.5 <= mantissa < 1: the
+        # exponent selects the power of two, the mantissa the linear bucket in it
+        # (SUB_BUCKETS is inlined: this runs for every handled event)
+        mantissa, exponent = frexp(seconds * 1000000.0)
+        index = exponent * 8 + int(mantissa * 16) - 15
+        try:
+            self.buckets[index if index > 0 else 0] += 1
+        except IndexError:
+            self.buckets[-1] += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @property
+    def count(self):
+        return sum(self.buckets)
+
+    @classmethod
+    def bucket_upper_bound(cls, index):
+        """
+        Return the upper bound of a bucket in seconds.
+        :param index: The bucket index
+        """
+        octave, sub_bucket = divmod(index, cls.SUB_BUCKETS)
+        return (cls.SUB_BUCKETS + sub_bucket) / cls.SUB_BUCKETS * 2**octave / 1000000.0
+
+    def percentile(self, percent):
+        """
+        Return an upper bound of the given percentile in seconds.
+        :param percent: The percentile (0-100)
+        """
+        if not (count := self.count):
+            return 0.0
+        rank = max(1, math.ceil(count * percent / 100.0))
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= rank:
+                return min(self.bucket_upper_bound(index), self.max)
+        return self.max
+
+    def merge(self, other):
+        """
+        Add the durations recorded by another histogram to this one.
+        :param other: The LatencyHistogram to merge
+        """
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets, strict=True)]
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    @property
+    def mean(self):
+        count = self.count
+        return self.total / count if count else 0.0
+
+    def summary(self):
+        """
+        Return the histogram summary as a dict (durations in seconds).
+        """
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
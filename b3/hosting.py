@@ -0,0 +1,219 @@
+import contextlib
+import os
+import sys
+import threading
+
+import b3
+import b3.cron
+import b3.functions
+import b3.storage
+from b3.functions import splitDSN, start_daemon_thread
+
+__version__ = "1.0"
+
+
+class ConsoleCron:
+    """
+    View of the shared cron scheduler restricted to the crontabs added by one
+    console: stopping it removes those crontabs and leaves the scheduler running.
+    """
+
+    def __init__(self, cron):
+        """
+        Object constructor.
+        :param cron: The shared b3.cron.Cron instance
+        """
+        self._cron = cron
+        self._tab_ids = set()
+
+    def create(self, command, minute="*", hour="*", day="*", month="*", dow="*"):
+        return self.add(b3.cron.CronTab(command, minute, hour, day, month, dow))
+
+    def add(self, tab):
+        tab_id = self._cron.add(tab)
+        self._tab_ids.add(tab_id)
+        return tab_id
+
+    def entries(self):
+        return [tab for tab in self._cron.entries() if id(tab) in self._tab_ids]
+
+    def cancel(self, tab_id):
+        self._tab_ids.discard(tab_id)
+        self._cron.cancel(tab_id)
+
+    def __add__(self, tab):
+        self.add(tab)
+        return self
+
+    __iadd__ = __add__
+
+    def __sub__(self, tab):
+        self.cancel(id(tab))
+        return self
+
+    __isub__ = __sub__
+
+    def start(self):
+        pass
+
+    def stop(self):
+        """
+        Remove the crontabs of this console from the shared scheduler.
+        """
+        for tab in self.entries():
+            self.cancel(id(tab))
+        self._tab_ids.clear()
+
+
+class SharedServices:
+    """
+    Resources shared by the parsers hosted in the same process: one database
+    connection per DSN, one cron scheduler and the console screen. Logging is
+    already process wide (see b3.output.getInstance).
+    """
+
+    def __init__(self, screen=None):
+        """
+        Object constructor.
+        :param screen: The stream where to write startup messages
+        """
+        self.screen = screen or sys.stdout
+        self.startup_lock = threading.RLock()  # held while a parser is being set up
+        self._lock = threading.Lock()
+        self._storages = {}
+        self._cron = None
+
+    def get_storage(self, console, dsn):
+        """
+        Return a storage for the given console, sharing one connection per DSN
+        with the other consoles: connect to the database the first time.
+        :param console: The console requesting the storage
+        :param dsn: The database connection string
+        """
+        with self._lock:
+            if (storage := self._storages.get(dsn)) is None:
+                storage = b3.storage.getStorage(
+                    dsn=dsn, dsnDict=splitDSN(dsn), console=console
+                )
+                storage.connect()
+                self._storages[dsn] = storage
+            return storage.share(console)
+
+    @contextlib.contextmanager
+    def startup(self, config):
+        """
+        Hold the startup lock while a parser is being set up, with @conf
+        pointing at the directory of its configuration file.
+        :param config: The B3 configuration file instance of the parser
+        """
+        with self.startup_lock:
+            b3.confdir = os.path.dirname(os.path.abspath(config.fileName))
+            yield
+
+    def get_cron(self, console):
+        """
+        Return a view of the shared cron scheduler for the given console.
+        :param console: The console requesting the scheduler
+        """
+        with self._lock:
+            if self._cron is None:
+                self._cron = b3.cron.Cron(console)
+                self._cron.start()
+            return ConsoleCron(self._cron)
+
+    def shutdown(self):
+        """
+        Stop the cron scheduler and close the storage connections.
+        """
+        with self._lock:
+            if self._cron:
+                self._cron.stop()
+                self._cron = None
+            for storage in self._storages.values():
+                storage.shutdown()
+            self._storages.clear()
+
+
+class ServerHost:
+    """
+    Run one parser per game server in the same process. Every parser has its
+    own game log reader, RCON client, event queue and plugin instances.
+    """
+
+    restart_exitcode = 4
+
+    def __init__(self, configs, options):
+        """
+        Object constructor.
+        :param configs: The B3 configuration file instances, one per game server
+        :param options: command line options
+        """
+        self.servers = {}
+        for config in configs:
+            name = os.path.splitext(os.path.basename(config.fileName))[0]
+            if name in self.servers:
+                name = f"{name}#{len(self.servers) + 1}"
+            self.servers[name] = config
+        self.options = options
+        self.shared = SharedServices()
+        self.consoles = {}
+        self.exitcodes = {}
+        self._stopping = False
+
+    def create_console(self, config, name):
+        """
+        Create the parser handling a game server.
+        :param config: The B3 configuration file instance of the game server
+        :param name: The game server name
+        """
+        parser_class = b3.functions.loadParser(config.get("b3", "parser"))
+        console = parser_class(config, self.options, shared=self.shared)
+        console.server_name = name
+        return console
+
+    def serve(self, name, config):
+        """
+        Run the parser of a game server, creating it again when it is restarted.
+        :param name: The game server name
+        :param config: The B3 configuration file instance of the game server
+        """
+        while not self._stopping:
+            with self.shared.startup(config):
+                console = self.consoles[name] = self.create_console(config, name)
+            if b3.console is None:
+                b3.console = console
+            with contextlib.suppress(SystemExit):
+                console.start()
+            self.exitcodes[name] = console.exitcode
+            if console.exitcode != self.restart_exitcode:
+                break
+            console.bot("Restarting %s", name)
+
+    def run(self):
+        """
+        Start every game server and wait for all of them to stop.
+        :return: The highest exit status of the game servers
+        """
+        threads = [
+            start_daemon_thread(target=self.serve, args=(name, config), name=name)
+            for name, config in self.servers.items()
+        ]
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1.0)
+        except KeyboardInterrupt:
+            self.shutdown()
+            for thread in threads:
+                thread.join(timeout=15.0)
+        finally:
+            self.shared.shutdown()
+        return max((code or 0 for code in self.exitcodes.values()), default=0)
+
+    def shutdown(self):
+        """
+        Stop every game server.
+        """
+        self._stopping = True
+        for console in list(self.consoles.values()):
+            console.shutdown()
@@ -2,25 +2,33 @@ import atexit
 import contextlib
 import datetime
 import functools
+import inspect
 import os
 import queue
 import re
 import socket
 import sys
+import threading
 import time
 from collections import OrderedDict, defaultdict
 from textwrap import TextWrapper
 from traceback import extract_tb
 
 import b3
+import b3.cache
 import b3.config
 import b3.cron
+import b3.dispatch
 import b3.events
 import b3.game
+import b3.gamelog
 import b3.output
+import b3.plugin
 import b3.plugins
+import b3.ratelimit
 import b3.rcon
 import b3.storage
+import b3.tracing
 from b3.clients import Clients, Group
 from b3.functions import getModule, splitDSN, start_daemon_thread, vars2printf
 
@@ -35,14 +43,48 @@ class Parser:
     _event_handling_thread = None
     _cron_stats_events = None  # crontab used to log event statistics
     _cron_stats_crontab = None  # crontab used to log cron run statistics
+    _cron_stats_gamelog = None  # crontab used to log game log reading statistics
+    _cron_stats_rcon = None  # crontab used to log RCON command statistics
     _timezone_crontab = None  # force recache of timezone info
+    _event_workers = 1  # number of threads dispatching events to the plugins
+    # events are served in the order they were queued: when the event queue is full,
+    # room is made by dropping the oldest events of a lower priority class (low ones
+    # first), low priority events are dropped outright and the last ones never are
+    _event_priorities = {
+        b3.events.PRIORITY_HIGH: (
+            "EVT_CLIENT_SAY",
+            "EVT_CLIENT_TEAM_SAY",
+            "EVT_CLIENT_SQUAD_SAY",
+            "EVT_CLIENT_PRIVATE_SAY",
+            "EVT_CLIENT_AUTH",
+            "EVT_CLIENT_CALLVOTE",
+        ),
+        b3.events.PRIORITY_LOW: (
+            "EVT_CLIENT_DAMAGE",
+            "EVT_CLIENT_DAMAGE_SELF",
+            "EVT_CLIENT_RADIO",
+            "EVT_CLIENT_ITEM_PICKUP",
+        ),
+        b3.events.PRIORITY_LAST: (
+            "EVT_EXIT",
+            "EVT_STOP",
+        ),
+    }
+    _event_limiter = None  # optional rate limiter for event dispatching
+    _gamelog_checkpoint = None  # path of the game log read position checkpoint file
+    _events_stats_file = None  # path of the JSON file where event stats are written
+    _cron_stats_file = None  # crontab used to write event stats into a file
+    _tracer = None  # optional sampler of line to RCON command latency traces
     _handlers = defaultdict(list)  # event handlers
+    _dispatch = {}  # event type => tuple of (handler, name, hooks, isEnabled or None)
+    _dispatch_lock = threading.Lock()
     _lineFormat = re.compile("^([a-z ]+): (.*?)", re.IGNORECASE)
     _lineClear = re.compile(r"^(?:[0-9:]+\s?)?")
     _line_color_prefix = (
         ""  # a color code prefix to be added to every line resulting from getWrap
     )
     _line_length = 80  # max wrap length
+    _line_limiter = None  # optional rate limiter for game log line processing
     _messages = {}  # message template cache
     _multiline = False  # whether linebreaks \n can be manually used in messages
     _multiline_noprefix = False  # whether B3 adds > to multiline messages
@@ -63,16 +105,25 @@ class Parser:
     clients = None
     config = None  # parser configuration file instance
     delay = 0.33  # time between each game log lines fetching
-    delay2 = 0.02  # time between each game log line processing: max number of lines processed in one second
+    # how to wait for new game log lines (see b3.gamelog.WATCH_MODES)
+    delay_watch = "auto"
+    delay_checkpoint = 10  # time between each game log read position checkpoint
     encoding = "latin-1"
     game = None
     gameName = None  # console name
     log = None  # logger instance
     name = "b3"  # bot name
-    output = None  # used to send data to the game server (default to b3.parsers.q3a.rcon.Rcon)
+    output = None  # used to send data to the game server (instance of OutputClass)
+    OutputClass = b3.rcon.Rcon  # the RCON client implementation
     queue = None  # event queue
     rconTest = True  # whether to perform RCON testing or not
     screen = None
+    server_name = (
+        None  # game server name when several servers are hosted in the process
+    )
+    shared = (
+        None  # b3.hosting.SharedServices when several servers are hosted in the process
+    )
     storage = None  # storage module instance
     type = None
     wrapper = None  # textwrapper instance
@@ -124,13 +175,20 @@ class Parser:
     working = True
     exitcode = None
 
-    def __init__(self, conf, options):
+    def __init__(self, conf, options, shared=None):
         """
         Object contructor.
         :param conf: The B3 configuration file
         :param options: command line options
+        :param shared: The resources shared with the other parsers hosted in the process
         """
         self._timeStart = self.time()
+        self.shared = shared
+        # per instance so that parsers hosted in the same process stay independent
+        self._handlers = defaultdict(list)
+        self._dispatch = {}
+        self._plugins = OrderedDict()
+        self._messages = {}
 
         if not self.loadConfig(conf):
             print("CRITICAL ERROR : COULD NOT LOAD CONFIG")
@@ -143,6 +201,10 @@ class Parser:
         self.__init_print_startmessage()
         self.Events = b3.events.eventManager
         self._eventsStats = b3.events.EventsStats(self)
+        # parsed responses of the RCON queries done by several plugins at once
+        self._rcon_cache = b3.cache.SingleFlightCache(ttl=1.0)
+        self.__init_events_stats_file()
+        self.__init_tracing()
         self.__init_bot()
         self.__init_serverconfig()
         self.__init_storage()
@@ -169,7 +231,7 @@ class Parser:
         except (TypeError, b3.config.NoOptionError):
             logsize = b3.functions.getBytes("10MB")
         self.log = b3.output.getInstance(logfile, log_level, logsize, log2console)
-        self.screen = sys.stdout
+        self.screen = self.shared.screen if self.shared else sys.stdout
         log_short_path = b3.functions.getShortPath(
             os.path.abspath(b3.functions.getAbsolutePath(logfile, True))
         )
@@ -223,10 +285,11 @@ class Parser:
             delay = self.config.getfloat("server", "delay")
             if self.delay > 0:
                 self.delay = delay
-        if self.config.has_option("server", "lines_per_second"):
-            delay2 = self.config.getfloat("server", "lines_per_second")
-            if delay2 > 0:
-                self.delay2 = 1 / delay2
+        self._line_limiter = self._create_rate_limiter(
+            "server", "lines_per_second", "lines_burst"
+        )
+        if self.config.has_option("server", "game_log_watch"):
+            self.delay_watch = self.config.get("server", "game_log_watch").lower()
         if self.config.has_option("server", "max_line_length"):
             self._line_length = self.config.getint("server", "max_line_length")
             self.bot("Setting line_length to: %s", self._line_length)
@@ -248,6 +311,9 @@ class Parser:
     def __init_storage(self):
         try:
             dsn = self.config.get("b3", "database")
+            if self.shared:
+                self.storage = self.shared.get_storage(self, dsn)
+                return
             self.storage = b3.storage.getStorage(
                 dsn=dsn, dsnDict=splitDSN(dsn), console=self
             )
@@ -265,13 +331,14 @@ class Parser:
                 f"Using gamelog    : {b3.functions.getShortPath(os.path.abspath(f))}\n"
             )
             if os.path.isfile(f):
-                self.input = open(f)  # noqa: SIM115
+                seek = True
                 if self.config.has_option("server", "seek"):
                     seek = self.config.getboolean("server", "seek")
-                    if seek:
-                        self.input.seek(0, os.SEEK_END)
-                else:
-                    self.input.seek(0, os.SEEK_END)
+                self.input = b3.gamelog.GameLog(
+                    self, f, seek_end=seek, watch=self.delay_watch, delay=self.delay
+                )
+                self.bot("Game log reader: %s", self.input)
+                self.__init_gamelog_checkpoint()
             else:
                 self.screen.write(f">>> Cannot read file: {os.path.abspath(f)}\n")
                 self.screen.flush()
@@ -281,9 +348,133 @@ class Parser:
             self.screen.flush()
             self.critical("server > game_log setting is required")
 
+    def __init_gamelog_checkpoint(self):
+        if self.config.has_option("server", "game_log_checkpoint"):
+            path = self.config.get("server", "game_log_checkpoint")
+        else:
+            path = f"@conf/game_log_{self._port}.checkpoint"
+        if not path:
+            self.bot("Game log checkpoint disabled")
+            return
+
+        if self.config.has_option("server", "game_log_checkpoint_interval"):
+            try:
+                delay = self.config.getfloat("server", "game_log_checkpoint_interval")
+            except ValueError as err:
+                self.warning(
+                    "Could not read server::game_log_checkpoint_interval: %s", err
+                )
+            else:
+                if delay > 0:
+                    self.delay_checkpoint = delay
+
+        self._gamelog_checkpoint = b3.functions.getWritableFilePath(path, True)
+        self.bot("Game log checkpoint is: %s", self._gamelog_checkpoint)
+        state = b3.gamelog.load_checkpoint(self._gamelog_checkpoint)
+        if state and self.input.resume(state):
+            self.bot("Resuming game log reading from offset %s", state["offset"])
+            self.screen.write(f"Resuming gamelog : at offset {state['offset']}\n")
+        elif state:
+            self.bot(
+                "Game log checkpoint does not match the current game log: ignoring it"
+            )
+
+    def save_gamelog_checkpoint(self):
+        """
+        Save the game log read position so that B3 resumes from it on restart.
+        """
+        if not self._gamelog_checkpoint:
+            return
+        try:
+            b3.gamelog.save_checkpoint(
+                self._gamelog_checkpoint, self.input.checkpoint()
+            )
+        except (OSError, ValueError) as err:
+            self.warning(
+                "Could not save game log checkpoint %s: %s",
+                self._gamelog_checkpoint,
+                err,
+            )
+
+    def __init_events_stats_file(self):
+        if not self.config.has_option("b3", "events_stats_file"):
+            return
+        if path := self.config.get("b3", "events_stats_file"):
+            self._events_stats_file = b3.functions.getWritableFilePath(path, True)
+            self.bot("Event stats file is: %s", self._events_stats_file)
+
+    def __init_tracing(self):
+        try:
+            sample_rate = self.config.getfloat("b3", "trace_sample_rate")
+        except (b3.config.NoOptionError, b3.config.NoSectionError):
+            return
+        except ValueError as err:
+            self.warning("Could not read b3::trace_sample_rate: %s", err)
+            return
+        if sample_rate <= 0:
+            return
+
+        buffer_size = 100
+        if self.config.has_option("b3", "trace_buffer_size"):
+            try:
+                buffer_size = self.config.getint("b3", "trace_buffer_size")
+            except ValueError as err:
+                self.warning("Could not read b3::trace_buffer_size: %s", err)
+
+        path = None
+        if self.config.has_option("b3", "trace_file") and (
+            path := self.config.get("b3", "trace_file")
+        ):
+            path = b3.functions.getWritableFilePath(path, True)
+
+        try:
+            self._tracer = b3.tracing.Tracer(sample_rate, buffer_size, path)
+        except (OSError, ValueError) as err:
+            self.warning("Could not setup tracing: %s", err)
+            return
+        self.bot(
+            "Tracing 1 game log line out of %s (trace file: %s)",
+            self._tracer.interval,
+            path,
+        )
+
+    def getTracer(self):
+        """
+        Return the sampler of game log line latency traces.
+        :return: A b3.tracing.Tracer instance or None if tracing is disabled
+        """
+        return self._tracer
+
+    def getEventsStats(self):
+        """
+        Return the event handling and queue wait time stats.
+        :return: The b3.events.EventsStats instance
+        """
+        return self._eventsStats
+
+    def getRconStats(self):
+        """
+        Return the RCON command metrics.
+        :return: A b3.rcon.RconStats instance or None if the RCON client does not collect them
+        """
+        return getattr(self.output, "stats", None)
+
+    def write_events_stats(self):
+        """
+        Write the event handling and queue wait time stats into the event stats file.
+        """
+        if not self._events_stats_file:
+            return
+        try:
+            self._eventsStats.write(self._events_stats_file)
+        except (OSError, ValueError) as err:
+            self.warning(
+                "Could not write event stats file %s: %s", self._events_stats_file, err
+            )
+
     def __init_rcon(self):
         try:
-            self.output = b3.rcon.Rcon(
+            self.output = self.OutputClass(
                 self, (self._rconIp, self._rconPort), self._rconPassword
             )
         except Exception as err:
@@ -299,8 +490,64 @@ class Parser:
             custom_socket_timeout2 = self.config.getfloat("server", "rcon_timeout2")
             self.output.socket_timeout2 = custom_socket_timeout2
 
+        if self.config.has_option("server", "rcon_sockets"):
+            try:
+                max_sockets = self.config.getint("server", "rcon_sockets")
+            except ValueError as err:
+                self.warning("Could not read server::rcon_sockets: %s", err)
+            else:
+                self.output.max_sockets = max(1, max_sockets)
+
+        if self.config.has_option("server", "rcon_pack_length"):
+            try:
+                self.output.pack_length = max(
+                    0, self.config.getint("server", "rcon_pack_length")
+                )
+            except ValueError as err:
+                self.warning("Could not read server::rcon_pack_length: %s", err)
+
+        self.__init_rcon_scheduler()
+
+        if self.config.has_option("server", "rcon_adaptive_timeouts"):
+            try:
+                if not self.config.getboolean("server", "rcon_adaptive_timeouts"):
+                    self.output.rtt = None
+            except ValueError as err:
+                self.warning("Could not read server::rcon_adaptive_timeouts: %s", err)
+
+        if self.config.has_option("server", "rcon_cache_ttl"):
+            try:
+                self._rcon_cache.ttl = max(
+                    0.0, self.config.getfloat("server", "rcon_cache_ttl")
+                )
+            except ValueError as err:
+                self.warning("Could not read server::rcon_cache_ttl: %s", err)
+
         self.bot("RCON client: %s", self.output)
 
+    def __init_rcon_scheduler(self):
+        try:
+            rate = self.config.getfloat("server", "rcon_rate")
+        except (b3.config.NoOptionError, b3.config.NoSectionError):
+            return
+        except ValueError as err:
+            self.warning("Could not read server::rcon_rate: %s", err)
+            return
+        if rate <= 0:
+            return
+
+        burst = None
+        if self.config.has_option("server", "rcon_burst"):
+            try:
+                burst = self.config.getfloat("server", "rcon_burst")
+            except ValueError as err:
+                self.warning("Could not read server::rcon_burst: %s", err)
+
+        try:
+            self.output.scheduler = b3.rcon.RconScheduler(rate, burst)
+        except ValueError as err:
+            self.warning("Could not setup the RCON scheduler: %s", err)
+
     def __init_rcon_test(self):
         if self.rconTest:
             res = self.output.write("status")
@@ -334,7 +581,59 @@ class Parser:
             queuesize = 50
             self.warning(err)
         self.info("Creating the event queue with size %s", queuesize)
-        self.queue = queue.Queue(queuesize)
+        priorities = {}
+        for priority, event_keys in self._event_priorities.items():
+            for event_key in event_keys:
+                if (event_id := self.getEventID(event_key)) is not None:
+                    priorities[event_id] = priority
+        self.queue = b3.events.EventQueue(queuesize, priorities)
+        self._event_limiter = self._create_rate_limiter(
+            "b3", "events_per_second", "events_burst"
+        )
+        try:
+            self._event_workers = max(1, self.config.getint("b3", "event_workers"))
+        except b3.config.NoOptionError:
+            self._event_workers = 1
+        except ValueError as err:
+            self._event_workers = 1
+            self.warning(err)
+        if self._event_workers > 1:
+            self.info("Dispatching events with %s workers", self._event_workers)
+
+    def _create_rate_limiter(self, section, rate_option, burst_option):
+        """
+        Create a token bucket from the configuration file.
+        :param section: The configuration file section
+        :param rate_option: The option holding the number of operations per second
+        :param burst_option: The option holding the number of operations allowed in a burst
+        :return: A TokenBucket instance or None if no limit is configured
+        """
+        try:
+            rate = self.config.getfloat(section, rate_option)
+        except (b3.config.NoOptionError, b3.config.NoSectionError):
+            return None
+        except ValueError as err:
+            self.warning("Could not read %s::%s: %s", section, rate_option, err)
+            return None
+        if rate <= 0:
+            return None
+
+        burst = None
+        if self.config.has_option(section, burst_option):
+            try:
+                burst = self.config.getfloat(section, burst_option)
+            except ValueError as err:
+                self.warning("Could not read %s::%s: %s", section, burst_option, err)
+            else:
+                if burst <= 0:
+                    self.warning(
+                        "%s::%s must be positive: using default", section, burst_option
+                    )
+                    burst = None
+
+        limiter = b3.ratelimit.TokenBucket(rate, burst)
+        self.info("Rate limiting %s::%s: %s", section, rate_option, limiter)
+        return limiter
 
     def _reset_timezone_info(self):
         """Causes the timezone offset and name to be re-cached"""
@@ -346,17 +645,23 @@ class Parser:
         Start B3
         """
         self.bot("Starting parser..")
-        self.startup()
-        self.say(f"{b3.version} ^2[ONLINE]")
-        self.call_plugins_onLoadConfig()
-        self.bot("Starting plugins")
-        self.startPlugins()
-        self.schedule_cron_tasks()
-        self.bot("All plugins started")
-        self.pluginsStarted()
+        # parsers hosted in the same process start one at a time
+        startup = self.shared.startup(self.config) if self.shared else None
+        with startup or contextlib.nullcontext():
+            self.startup()
+            self.say(f"{b3.version} ^2[ONLINE]")
+            self.call_plugins_onLoadConfig()
+            self.bot("Starting plugins")
+            self.startPlugins()
+            self.schedule_cron_tasks()
+            self.bot("All plugins started")
+            self.pluginsStarted()
         self.bot("Starting event dispatching thread")
         self._event_handling_thread = start_daemon_thread(
-            target=self.handleEvents, name="event_handler"
+            target=self.handleEvents,
+            name=f"{self.server_name}:event_handler"
+            if self.server_name
+            else "event_handler",
         )
         self.bot("Start reading game events")
         self.run()
@@ -366,6 +671,17 @@ class Parser:
         Dump event statistics into the B3 log file.
         """
         self._eventsStats.dump_stats()
+        self.queue.dump_stats(self)
+
+    def _dump_rcon_stats(self):
+        """
+        Dump RCON command statistics into the B3 log file.
+        """
+        self.getRconStats().dump_stats(self)
+        if scheduler := getattr(self.output, "scheduler", None):
+            self.info("%s: %s", scheduler, scheduler.stats())
+        if rtt := getattr(self.output, "rtt", None):
+            self.info("RCON: %s", rtt)
 
     def _dump_cron_stats(self):
         self.info("***** CronTab Stats *****")
@@ -396,6 +712,19 @@ class Parser:
             )
             self.cron.add(self._cron_stats_crontab)
 
+            self._cron_stats_gamelog = b3.cron.CronTab(
+                self.input.dump_stats, minute="45"
+            )
+            self.cron.add(self._cron_stats_gamelog)
+
+        if self.getRconStats() is not None:
+            self._cron_stats_rcon = b3.cron.CronTab(self._dump_rcon_stats, minute="50")
+            self.cron.add(self._cron_stats_rcon)
+
+        if self._events_stats_file:
+            self._cron_stats_file = b3.cron.CronTab(self.write_events_stats)
+            self.cron.add(self._cron_stats_file)
+
         tz_offset, tz_name = self.tz_offset_and_name()
         if tz_name not in ("UTC", "GMT"):
             hour = self.to_utc_hour(2)
@@ -754,10 +1083,18 @@ class Parser:
 
         sleep = time.sleep
         read_lines = self.read
+        wait_lines = self.input.wait
         parse_line = self.parseLine
+        throttle = self._line_limiter.acquire if self._line_limiter else None
+        monotonic = time.monotonic
+        save_checkpoint = self.save_gamelog_checkpoint
+        checkpoint = bool(self._gamelog_checkpoint)
+        tracer = self._tracer
+        trace = None
 
-        delay_per_line = self.delay2
         delay_read_lines = self.delay
+        delay_checkpoint = self.delay_checkpoint
+        next_checkpoint = monotonic() + delay_checkpoint
 
         while self.working:
             if self._paused:
@@ -766,10 +1103,19 @@ class Parser:
                     self._pauseNotice = True
                 sleep(delay_read_lines)
                 continue
-            for line in read_lines():
+            lines = read_lines()
+            read_time = time.perf_counter() if tracer else 0
+            for line in lines:
                 if line := line.strip():
+                    if throttle:
+                        throttle()
+                    if tracer:
+                        trace = tracer.sample(line, read_time)
                     try:
-                        parse_line(line)
+                        if trace is None:
+                            parse_line(line)
+                        else:
+                            self._parse_traced_line(trace, line)
                     except Exception as msg:
                         self.error(
                             "Could not parse line %s - (%s) %s",
@@ -777,11 +1123,16 @@ class Parser:
                             msg,
                             extract_tb(sys.exc_info()[2]),
                         )
-                    sleep(delay_per_line)
 
-            sleep(delay_read_lines)
+            if checkpoint and lines and (now := monotonic()) >= next_checkpoint:
+                save_checkpoint()
+                next_checkpoint = now + delay_checkpoint
+
+            wait_lines(bool(lines))
 
         self.bot("Stopped parsing")
+        self.bot("Saving game log checkpoint")
+        save_checkpoint()
         self.bot("Closing games log file")
         self.input.close()
 
@@ -790,10 +1141,27 @@ class Parser:
         self.bot("Awaiting Event Handling Thread stop")
         self._event_handling_thread.join(timeout=15.0)
         self.bot("Event Handling Thread stopped")
+        self.write_events_stats()
+        if tracer:
+            tracer.close()
         if self.exitcode:
             sys.exit(self.exitcode)
         self.bot("Shutdown Complete")
 
+    def _parse_traced_line(self, trace, line):
+        """
+        Parse a game log line sampled for tracing.
+        :param trace: The b3.tracing.Trace of the line
+        :param line: The game log line
+        """
+        begin = time.perf_counter()
+        try:
+            with trace:
+                self.parseLine(line)
+        finally:
+            trace.add_span("parse", "", begin, time.perf_counter())
+            trace.release()
+
     def parseLine(self, line):
         """
         Parse a single line from the log file
@@ -814,6 +1182,7 @@ class Parser:
         )
         if event_handler not in self._handlers[event_name]:
             self._handlers[event_name].append(event_handler)
+            self.rebuild_event_dispatch()
 
     def unregisterHandler(self, event_handler):
         """
@@ -827,33 +1196,136 @@ class Parser:
                     self.getEventKey(event_name),
                 )
                 handlers.remove(event_handler)
+        self.rebuild_event_dispatch()
+
+    def rebuild_event_dispatch(self):
+        """
+        Rebuild the table mapping every event type to the hooks of the enabled
+        handlers, so that dispatching an event requires a single lookup.
+        Must be called whenever a handler is (un)registered, enabled or disabled.
+        """
+        with self._dispatch_lock:
+            dispatch = {}
+            for event_type, handlers in list(self._handlers.items()):
+                entries = []
+                for handler in tuple(handlers):
+                    if type(handler).isEnabled is b3.plugin.Plugin.isEnabled:
+                        # enabled state changes through enable()/disable() only
+                        if not handler.isEnabled():
+                            continue
+                        is_enabled = None
+                    else:
+                        is_enabled = handler.isEnabled
+                    hooks = tuple(
+                        hook
+                        for hook in handler.getEventHooks(event_type)
+                        if self._accepts_event(handler, event_type, hook)
+                    )
+                    if hooks:
+                        entries.append(
+                            (handler, handler.__class__.__name__, hooks, is_enabled)
+                        )
+                if entries:
+                    dispatch[event_type] = tuple(entries)
+            self._dispatch = dispatch
+
+    def _accepts_event(self, handler, event_type, hook):
+        """
+        Tell whether an event hook can be called with the event as only argument.
+        :param handler: The handler owning the hook
+        :param event_type: The event type handled by the hook
+        :param hook: The hook
+        """
+        try:
+            inspect.signature(hook).bind(None)
+        except TypeError as e:
+            self.error(
+                "Handler %s cannot handle %s with %r: %s",
+                handler.__class__.__name__,
+                self.getEventName(event_type),
+                hook,
+                e,
+            )
+            return False
+        except ValueError:
+            pass  # no signature available: let the hook be called
+        return True
 
     def queueEvent(self, event, expire=10):
         try:
             if event.type in self._handlers:
-                time.sleep(0.001)  # wait a bit so event doesnt get jumbled
-                current_time = self.time()
-                self.queue.put((current_time, current_time + expire, event), timeout=2)
-                return True
+                if self._tracer and (trace := b3.tracing.current_trace()):
+                    return self._put_traced_event(trace, event, expire)
+                return self._put_event(event, expire)
         except queue.Full:
             self.error("**** Event queue was full (%s)", self.queue.qsize())
         except AttributeError:
             self.error("*** Event has no type: %s", event)
         return False
 
+    def _put_event(self, event, expire):
+        """
+        Put an event in the event queue.
+        :param event: The event to queue
+        :param expire: The number of seconds after which the event is discarded
+        :return: True if the event was queued, False if it was dropped
+        :raise queue.Full: If the queue stayed full for too long
+        """
+        # not self.time(): the queue wait time is measured from there
+        current_time = time.time()
+        return self.queue.put((current_time, current_time + expire, event), timeout=2)
+
+    def _put_traced_event(self, trace, event, expire):
+        """
+        Put an event bound to a trace in the event queue.
+        :param trace: The b3.tracing.Trace active when the event was created
+        :param event: The event to queue
+        :param expire: The number of seconds after which the event is discarded
+        """
+        event.trace = trace
+        trace.hold()
+        queued = False
+        begin = time.perf_counter()
+        try:
+            queued = self._put_event(event, expire)
+        finally:
+            trace.add_span("queue", event.key, begin, time.perf_counter())
+            if not queued:
+                trace.release()
+        return queued
+
     def handleEvents(self):
         """
         Event handler thread.
         """
-        timer_func = time.perf_counter
-        console_time = self.time
+        console_time = time.time
         event_queue_get = self.queue.get
+        add_event_wait = self._eventsStats.add_event_wait
+        dispatch_event = self._dispatch_event
         stop_events = (self.getEventID("EVT_EXIT"), self.getEventID("EVT_STOP"))
+        throttle = self._event_limiter.acquire if self._event_limiter else None
+        executor = None
+        if self._event_workers > 1:
+            executor = b3.dispatch.OrderedExecutor(
+                self._event_workers,
+                name=f"{self.server_name}:event_worker"
+                if self.server_name
+                else "event_worker",
+                console=self,
+            )
         while True:
             added, expire, event = event_queue_get()
-            current_time = console_time()
             if event.type in stop_events:
                 break
+            if event.trace is None:
+                handle_event = dispatch_event
+            else:
+                handle_event = self._dispatch_traced_event
+                dequeued = time.perf_counter()
+                event.trace.add_span("dequeue", event.key, dequeued, dequeued)
+            if throttle:
+                throttle()
+            current_time = console_time()
             if current_time > expire:
                 self.error(
                     "**** %s sat in queue too long: "
@@ -865,43 +1337,116 @@ class Parser:
                     expire,
                     current_time - added,
                 )
+                self.queue.add_expired(event)
+                if event.trace is not None:
+                    event.trace.release()
                 continue
+            add_event_wait(event.key, max(0.0, current_time - added))
+
+            if executor is None:
+                handle_event(event)
+            elif keys := self._event_order_keys(event):
+                executor.submit(keys, handle_event, event)
+            else:
+                # events not bound to a client (round start, map change...)
+                # are barriers: handle them once all the previous ones are done
+                executor.wait_idle()
+                handle_event(event)
 
-            for hfunc in self._handlers[event.type]:
-                if not hfunc.isEnabled():
-                    continue
-                timer_plugin_begin = timer_func()
-                try:
-                    hfunc.parseEvent(event)
-                    time.sleep(0.001)
-                except b3.events.VetoEvent:
-                    # plugin called for a halt to event processing
-                    self.bot("%s vetoed by %s", event, str(hfunc))
-                    break
-                except Exception as msg:
-                    self.error(
-                        "Handler %s could not handle %s: %s: %s %s",
-                        hfunc.__class__.__name__,
+        if executor is not None:
+            if not executor.wait_idle(timeout=10.0):
+                self.warning(
+                    "Event workers still busy with %s events", executor.pending
+                )
+            executor.stop(timeout=1.0)
+        self.handle_events_shutdown()
+
+    def _event_order_keys(self, event):
+        """
+        Return the keys ordering the handling of an event when dispatching
+        with several workers: events sharing a key are handled one at a time,
+        in the order they were queued.
+        :param event: The event being dispatched
+        :return: A list of keys, empty if the event must be handled after all the previous ones
+        """
+        keys = []
+        for client in (event.client, event.target):
+            if client is not None and client.cid is not None:
+                keys.append(("client", client.cid))
+        if keys:
+            for hfunc, name, _, _ in self._dispatch.get(event.type, ()):
+                if getattr(hfunc, "ordered_events", False):
+                    keys.append(("plugin", name))
+        return keys
+
+    def _dispatch_traced_event(self, event):
+        """
+        Dispatch an event bound to a trace, making it the active trace of the
+        thread so that the events and RCON commands issued by the handlers join it.
+        :param event: The event to dispatch
+        """
+        trace = event.trace
+        try:
+            with trace:
+                self._dispatch_event(event)
+        finally:
+            trace.release()
+
+    def _dispatch_event(self, event):
+        """
+        Run the hooks of every enabled handler of an event, until one vetoes it.
+        :param event: The event to dispatch
+        """
+        timer_func = time.perf_counter
+        trace = event.trace
+        for hfunc, name, hooks, is_enabled in self._dispatch.get(event.type, ()):
+            if is_enabled is not None and not is_enabled():
+                continue
+            timer_plugin_begin = timer_func()
+            try:
+                for hook in hooks:
+                    try:
+                        hook(event)
+                    except TypeError as e:
+                        # a failing hook does not keep the other hooks of the plugin from running
+                        self.error(
+                            "Handler %s could not parse event %s: %s: %s",
+                            name,
+                            event.key,
+                            e.__class__.__name__,
+                            e,
+                        )
+            except b3.events.VetoEvent:
+                # plugin called for a halt to event processing
+                self.bot("%s vetoed by %s", event, str(hfunc))
+                break
+            except Exception as msg:
+                self.error(
+                    "Handler %s could not handle %s: %s: %s %s",
+                    name,
+                    event,
+                    msg.__class__.__name__,
+                    msg,
+                    extract_tb(sys.exc_info()[2]),
+                )
+            finally:
+                if (elapsed := timer_func() - timer_plugin_begin) > 1.5:
+                    self.warning(
+                        "Handler %s took more that 1.5 seconds "
+                        "to handle %s: total %0.4f",
+                        name,
                         event,
-                        msg.__class__.__name__,
-                        msg,
-                        extract_tb(sys.exc_info()[2]),
+                        elapsed,
                     )
-                finally:
-                    if (elapsed := timer_func() - timer_plugin_begin) > 1.5:
-                        self.warning(
-                            "Handler %s took more that 1.5 seconds "
-                            "to handle %s: total %0.4f",
-                            hfunc.__class__.__name__,
-                            event,
-                            elapsed,
-                        )
-                    self._eventsStats.add_event_handled(
-                        hfunc.__class__.__name__, event.key, elapsed
+                self._eventsStats.add_event_handled(name, event.key, elapsed)
+                if trace is not None:
+                    trace.add_span(
+                        "handler",
+                        name,
+                        timer_plugin_begin,
+                        timer_plugin_begin + elapsed,
                     )
 
-        self.handle_events_shutdown()
-
     def handle_events_shutdown(self):
         self.bot("Shutting down event handler")
 
@@ -923,11 +1468,13 @@ class Parser:
         except Exception as e:
             self.error(e)
 
-        self.bot("Shutting down database connection")
-        try:
-            self.storage.shutdown()
-        except Exception as e:
-            self.error(e)
+        if self.shared is None:
+            # otherwise closed by the host once all the parsers are stopped
+            self.bot("Shutting down database connection")
+            try:
+                self.storage.shutdown()
+            except Exception as e:
+                self.error(e)
 
         self.bot("Shutting down RCON connection")
         try:
@@ -950,6 +1497,16 @@ class Parser:
         )
         return r
 
+    def write_async(self, msg, maxRetries=None, socketTimeout=None):
+        """
+        Write a message to Rcon/Console without waiting for the response.
+        :param msg: The message to be sent to Rcon/Console
+        :return: A concurrent.futures.Future resolving to the response
+        """
+        return self.output.submit(
+            msg, maxRetries=maxRetries, socketTimeout=socketTimeout
+        )
+
     def writelines(self, msg):
         """
         Write a sequence of messages to Rcon/Console. Optimized for speed.
@@ -961,23 +1518,7 @@ class Parser:
         """
         Read from game server log file
         """
-        if not (lines := self.input.readlines()):
-            # No lines found so check to see if we need to reset our position.
-            # Compare the current cursor position against the current file size,
-            # if the cursor is at a number higher than the game log size, then
-            # there's a problem
-            filestats = os.fstat(self.input.fileno())
-            if self.input.tell() > filestats.st_size:
-                self.warning(
-                    "Parser: game log is suddenly smaller than it was "
-                    f"before ({self.input.tell()} bytes, now {filestats.st_size}), "
-                    "the log was probably either rotated or emptied. B3 will now re-adjust to "
-                    "the new size of the log"
-                )
-                self.input.seek(0, os.SEEK_END)
-                lines = self.input.readlines()
-
-        return lines
+        return self.input.readlines()
 
     def shutdown(self):
         """
@@ -1124,8 +1665,11 @@ class Parser:
         Instantiate the main Cron object.
         """
         if not self._cron:
-            self._cron = b3.cron.Cron(self)
-            self._cron.start()
+            if self.shared:
+                self._cron = self.shared.get_cron(self)
+            else:
+                self._cron = b3.cron.Cron(self)
+                self._cron.start()
         return self._cron
 
     cron = property(_get_cron)
@@ -1270,6 +1814,14 @@ class Parser:
     def queryClientFrozenSandAccount(self, cid):
         pass
 
+    def queryClientsFrozenSandAccount(self, cids):
+        """
+        Query the Frozen Sand account of several clients.
+        :param cids: The client slot numbers
+        :return: A dict of queryClientFrozenSandAccount results keyed by slot number
+        """
+        return {cid: self.queryClientFrozenSandAccount(cid) or {} for cid in cids}
+
 
 class StubParser:
     """
@@ -7,6 +7,7 @@ import b3.clients
 import b3.events
 import b3.parser
 from b3.clients import Client
+from b3.coalesce import DamageCoalescer
 from b3.functions import (
     getStuffSoundingLike,
     prefixText,
@@ -45,6 +46,21 @@ class Iourt43Parser(b3.parser.Parser):
 
     _logSync = 2
 
+    # IDs of the events created by the most frequent game log lines, resolved once
+    _evt_damage = b3.events.eventManager.getId("EVT_CLIENT_DAMAGE")
+    _evt_damage_self = b3.events.eventManager.getId("EVT_CLIENT_DAMAGE_SELF")
+    _evt_damage_team = b3.events.eventManager.getId("EVT_CLIENT_DAMAGE_TEAM")
+    _evt_kill = b3.events.eventManager.getId("EVT_CLIENT_KILL")
+    _evt_kill_team = b3.events.eventManager.getId("EVT_CLIENT_KILL_TEAM")
+    _evt_suicide = b3.events.eventManager.getId("EVT_CLIENT_SUICIDE")
+    _evt_say = b3.events.eventManager.getId("EVT_CLIENT_SAY")
+    _evt_damage_batch = b3.events.eventManager.getId("EVT_CLIENT_DAMAGE_BATCH")
+
+    # seconds during which hits are coalesced into EVT_CLIENT_DAMAGE_BATCH events (0: disabled)
+    damage_batch_window = 0
+    _damage_coalescer = None
+    _damage_flush_timer = None  # releases the expired damage batches when no hit comes
+
     _allow_userinfo_overflow = False
 
     IpsOnly = False
@@ -78,6 +94,8 @@ class Iourt43Parser(b3.parser.Parser):
         # 'shutdowngame' : b3.events.EVT_GAME_ROUND_END
     }
 
+    _line_handlers = None  # lowercase line action => bound On* method or event ID
+
     _team_map = {
         "red": b3.TEAM_RED,
         "r": b3.TEAM_RED,
@@ -338,6 +356,58 @@ class Iourt43Parser(b3.parser.Parser):
 
     _line_formats_counter = Counter()
 
+    # the literal action token at the head of a line format:
+    # ^(?P<action>Client(Save|Load)Position):  =>  prefix, alternatives, optional, suffix
+    _reLiteralAction = re.compile(
+        r"^\^\(\?P<action>"
+        r"(?P<prefix>[a-z ]*)"
+        r"(?:\((?P<alts>[a-z|]+)\)(?P<optional>\?)?)?"
+        r"(?P<suffix>[a-z ]*)\)"
+        r"(?::|\\s|\\d|!| |\$)",
+        re.IGNORECASE,
+    )
+    _reActionToken = re.compile(r"[a-z]*", re.IGNORECASE)
+    _line_formats_index = None
+    _line_formats_index_max = 256
+
+    @classmethod
+    def _index_line_formats(cls):
+        """
+        Group line formats by the lowercased leading word of the lines they
+        can match. Formats whose action is not a plain literal are generic:
+        they are kept, in order, in the candidates of every word.
+        """
+        keyed = {}
+        generic = []
+        for index, f in enumerate(cls._lineFormats):
+            if not (m := cls._reLiteralAction.match(f.pattern)):
+                generic.append(index)
+                continue
+            alts = m["alts"].split("|") if m["alts"] else [""]
+            if m["optional"]:
+                alts.append("")
+            for alt in alts:
+                action = f"{m['prefix']}{alt}{m['suffix']}"
+                word = cls._reActionToken.match(action).group().lower()
+                keyed.setdefault(word, set()).add(index)
+        return keyed, generic
+
+    def _get_line_formats(self, word):
+        """
+        Return the (index, line format) candidates for a line starting with
+        the given word, in the same order as in _lineFormats.
+        :param word: The lowercased leading word of the line
+        """
+        if self._line_formats_index is None:
+            self._line_formats_index = ({}, *self._index_line_formats())
+        cache, keyed, generic = self._line_formats_index
+        if (candidates := cache.get(word)) is None:
+            indexes = sorted(keyed.get(word, set()).union(generic))
+            candidates = tuple((i, self._lineFormats[i]) for i in indexes)
+            if len(cache) < self._line_formats_index_max:
+                cache[word] = candidates
+        return candidates
+
     def dump_line_format_counter(self):
         self._line_formats_counter["games"] += 1
         # make sure each line format has an entry
@@ -611,11 +681,13 @@ class Iourt43Parser(b3.parser.Parser):
             )
 
         self.__setup_events()
+        self._line_handlers = self._build_line_handlers()
         self.__setup_world_client()
         self.__setup_maps()
         self.__setup_log_sync()
         self.__setup_gamepaths()
         self.load_conf_userinfo_overflow()
+        self.load_conf_damage_batch_window()
 
     def is_valid_game(self, gamename):
         return gamename == "q3urt43"
@@ -623,6 +695,69 @@ class Iourt43Parser(b3.parser.Parser):
     def pluginsStarted(self):
         self.__setup_connected_players()
 
+    def load_conf_damage_batch_window(self):
+        """
+        Load the damage coalescing configuration settings.
+        """
+        self.damage_batch_window = 0
+        if self.config.has_option("server", "damage_batch_window"):
+            try:
+                self.damage_batch_window = max(
+                    0.0, self.config.getfloat("server", "damage_batch_window")
+                )
+            except ValueError as err:
+                self.warning(err)
+        if self.damage_batch_window:
+            self.info("Coalescing hits over %ss", self.damage_batch_window)
+            self._damage_coalescer = DamageCoalescer(self.damage_batch_window)
+            self._damage_flush_lock = threading.Lock()
+        else:
+            self._damage_coalescer = None
+
+    def queue_damage_batches(self, batches):
+        """
+        Queue an EVT_CLIENT_DAMAGE_BATCH event per damage batch.
+        :param batches: A list of b3.coalesce.DamageBatch
+        """
+        for batch in batches:
+            self.queueEvent(
+                self.getEvent(
+                    self._evt_damage_batch, batch.data, batch.attacker, batch.victim
+                )
+            )
+
+    def _arm_damage_flush(self):
+        """
+        Make sure the pending damage batches are released once the coalescing
+        window is over, even if no other hit comes in the meantime.
+        """
+        with self._damage_flush_lock:
+            if self._damage_flush_timer is None:
+                self._damage_flush_timer = threading.Timer(
+                    self.damage_batch_window, self._flush_expired_damage_batches
+                )
+                self._damage_flush_timer.daemon = True
+                self._damage_flush_timer.start()
+
+    def _flush_expired_damage_batches(self):
+        """
+        Queue the expired damage batches, rescheduling for the remaining ones.
+        """
+        with self._damage_flush_lock:
+            self._damage_flush_timer = None
+        if coalescer := self._damage_coalescer:
+            self.queue_damage_batches(coalescer.expired())
+            if len(coalescer):
+                self._arm_damage_flush()
+
+    def flush_damage_batches(self, cid=None):
+        """
+        Queue the pending damage batches involving a client, or all of them.
+        :param cid: The slot number of the client, None for every batch
+        """
+        if self._damage_coalescer:
+            self.queue_damage_batches(self._damage_coalescer.flush(cid))
+
     def load_conf_userinfo_overflow(self):
         """
         Load userinfo overflow configuration settings.
@@ -667,9 +802,10 @@ class Iourt43Parser(b3.parser.Parser):
         Parse a log line returning extracted tokens.
         :param line: The line to be parsed
         """
-        line = re.sub(self._lineClear, "", line, 1)
-        for index, f in enumerate(self._lineFormats):
-            if m := re.match(f, line):
+        line = self._lineClear.sub("", line, 1)
+        word = self._reActionToken.match(line).group().lower()
+        for index, f in self._get_line_formats(word):
+            if m := f.match(line):
                 self._line_formats_counter[index] += 1
                 # log lines for the more generalized formats
                 if index > 26:
@@ -687,6 +823,58 @@ class Iourt43Parser(b3.parser.Parser):
 
         return m, m["action"].lower(), data
 
+    def _build_line_handlers(self):
+        """
+        Map every line action having an On* handler or an _eventMap entry.
+        Actions made of several words (i.e: 'flag return') are resolved
+        the first time they are seen by getLineHandler.
+        """
+        handlers = dict(self._eventMap)
+        for name in dir(self):
+            if not name.startswith("On") or name != f"On{name[2:].lower().title()}":
+                continue
+            if callable(func := getattr(self, name)):
+                handlers[name[2:].lower()] = func
+        return handlers
+
+    def getLineHandler(self, action):
+        """
+        Return the bound On* method or the event ID handling a line action.
+        Handlers are looked up in the table built at startup: replace them
+        with registerLineHandler().
+        :param action: The lowercase line action
+        :return: A callable, an event ID or None if the action is unknown
+        """
+        if (handlers := self._line_handlers) is None:
+            handlers = self._line_handlers = self._build_line_handlers()
+        try:
+            return handlers[action]
+        except KeyError:
+            pass
+        handler = getattr(self, f"On{action.title().replace(' ', '')}", None)
+        if handler is None:
+            handler = self._eventMap.get(action)
+        if handler is not None:
+            # unknown actions are not cached: the catch-all line formats match any word
+            handlers[action] = handler
+        return handler
+
+    def registerLineHandler(self, action, handler):
+        """
+        Register at runtime how to handle a log line action.
+        :param action: The lowercase line action (i.e: 'hit', 'flag return')
+        :param handler: A callable accepting (action, data, match) and returning
+                        an Event or None, or the key/ID of the event to queue
+        """
+        if callable(handler):
+            setattr(self, f"On{action.title().replace(' ', '')}", handler)
+        else:
+            # copy so that other parser instances are not affected
+            handler = self.getEventID(handler)
+            self._eventMap = {**self._eventMap, action: handler}
+        if self._line_handlers is not None:
+            self._line_handlers[action] = handler
+
     def parseLine(self, line):
         """
         Parse a log line creating necessary events.
@@ -696,17 +884,14 @@ class Iourt43Parser(b3.parser.Parser):
         if not match:
             return False
 
-        func_name = f"On{action.title().replace(' ', '')}"
-
-        if func := getattr(self, func_name, None):
-            if event := func(action, data, match):
-                self.queueEvent(event)
-        elif action in self._eventMap:
-            self.queueEvent(self.getEvent(self._eventMap[action], data=data))
-        else:
+        if (handler := self.getLineHandler(action)) is None:
             data = str(action) + ": " + str(data)
             self.warning("Unknown Event: %s", data)
             self.queueEvent(self.getEvent("EVT_UNKNOWN", data=data))
+        elif isinstance(handler, int):
+            self.queueEvent(self.getEvent(handler, data=data))
+        elif event := handler(action, data, match):
+            self.queueEvent(event)
 
         return True
 
@@ -744,17 +929,20 @@ class Iourt43Parser(b3.parser.Parser):
         return data
 
     def OnClientconnect(self, action, data, match=None):
-        pass
+        # the cached status and teams do not list the new slot yet
+        self._rcon_cache.invalidate()
 
     def OnClientbegin(self, action, data, match=None):
         # we get user info in two parts:
         # 19:42.36 ClientBegin: 4
+        self._rcon_cache.invalidate()
         if client := self.getByCidOrJoinPlayer(data):
             return self.getEvent("EVT_CLIENT_JOIN", data=data, client=client)
 
     def OnClientuserinfo(self, action, data, match=None):
         # 2 \ip\145.99.135.227:27960\challenge\-232198920\qport\2781\protocol\68\battleye\1\name\[SNT]^1XLR^78or..
         # 0 \gear\GMIORAA\team\blue\skill\5.000000\characterfile\bots/ut_chicken_c.c\color\4\sex\male\race\2\snaps\20\..
+        self._rcon_cache.invalidate()
         bclient = self.parseUserInfo(data)
 
         bot = False
@@ -801,6 +989,9 @@ class Iourt43Parser(b3.parser.Parser):
             if client_authl := bclient.get("authl"):
                 # authl contains FSA since UrT 4.2.022
                 fsa = client_authl
+            elif self.clients.authDeferred:
+                # queried in parallel with the other deferred clients on authorization
+                fsa = None
             else:
                 # query FrozenSand Account
                 auth_info = self.queryClientFrozenSandAccount(bclient["cid"])
@@ -956,17 +1147,22 @@ class Iourt43Parser(b3.parser.Parser):
         if not (attacker := self.clients.getByCID(match["acid"])):
             return None
 
-        event = self.getEventID("EVT_CLIENT_DAMAGE")
+        event = self._evt_damage
         if attacker.cid == victim.cid:
-            event = self.getEventID("EVT_CLIENT_DAMAGE_SELF")
+            event = self._evt_damage_self
         elif attacker.team != b3.TEAM_UNKNOWN and attacker.team == victim.team:
-            event = self.getEventID("EVT_CLIENT_DAMAGE_TEAM")
+            event = self._evt_damage_team
 
         hitloc = match["hitloc"]
         weapon = self._convertHitWeaponToKillWeapon(match["aweap"])
         points = self._getDamagePoints(weapon, hitloc)
         event_data = (points, weapon, hitloc)
         victim.data["lastDamageTaken"] = event_data
+        if (coalescer := self._damage_coalescer) is not None:
+            self.queue_damage_batches(coalescer.expired())
+            if event == self._evt_damage and self._evt_damage_batch in self._handlers:
+                coalescer.add(attacker, victim, weapon, points, hitloc)
+                self._arm_damage_flush()
         return self.getEvent(event, event_data, attacker, victim)
 
     def OnCallvote(self, action, data, match=None):
@@ -1137,9 +1333,9 @@ class Iourt43Parser(b3.parser.Parser):
     def authorizeClients(self):
         """
         For all connected players, fill the client object with properties allowing to find
-        the user in the database (usualy guid, ip) and call the
-        Client.auth() method.
+        the user in the database (usualy guid, ip) and authorize them as a batch.
         """
+        self.clients.authorize(list(self.clients.values()))
 
     def OnKill(self, action, data, match=None):
         if not (victim := self.getByCidOrJoinPlayer(match["cid"])):
@@ -1173,7 +1369,7 @@ class Iourt43Parser(b3.parser.Parser):
         if not (damagetype := match["text"].split()[-1:][0]):
             return None
 
-        event = self.getEventID("EVT_CLIENT_KILL")
+        event = self._evt_kill
 
         # fix event for team change and suicides and tk
         if attacker.cid == victim.cid:
@@ -1182,9 +1378,12 @@ class Iourt43Parser(b3.parser.Parser):
                 # that event is passed shortly after the kill
                 return None
             else:
-                event = self.getEventID("EVT_CLIENT_SUICIDE")
+                event = self._evt_suicide
         elif attacker.team != b3.TEAM_UNKNOWN and attacker.team == victim.team:
-            event = self.getEventID("EVT_CLIENT_KILL_TEAM")
+            event = self._evt_kill_team
+
+        # damage dealt to the victim is reported before its death
+        self.flush_damage_batches(victim.cid)
 
         # if not logging damage we need a general hitloc
         last_damage_data = victim.data.pop("lastDamageTaken", (100, weapon, "body"))
@@ -1212,6 +1411,8 @@ class Iourt43Parser(b3.parser.Parser):
         return self.getEvent("EVT_ASSIST", client=client, target=victim, data=attacker)
 
     def OnClientdisconnect(self, action, data, match=None):
+        self.flush_damage_batches(data)
+        self._rcon_cache.invalidate()
         if client := self.clients.getByCID(data):
             client.disconnect()
         return None
@@ -1297,7 +1498,7 @@ class Iourt43Parser(b3.parser.Parser):
         if data and ord(data[:1]) == 21:
             data = data[1:]
 
-        return self.getEvent("EVT_CLIENT_SAY", data=data, client=client)
+        return self.getEvent(self._evt_say, data=data, client=client)
 
     def OnSayteam(self, action, data, match=None):
         # 2:28 sayteam: 12 New_UrT_Player_v4.1: wokele
@@ -1355,11 +1556,13 @@ class Iourt43Parser(b3.parser.Parser):
         return None
 
     def OnShutdowngame(self, action, data=None, match=None):
+        self.flush_damage_batches()
         self.game.mapEnd()
         self.dump_line_format_counter()
         return self.getEvent("EVT_GAME_EXIT", data=data)
 
     def OnInitgame(self, action, data, match=None, round_start=False):
+        self.flush_damage_batches()
         game = self.game
         for k, v in self.parseInfoFields(data).items():
             if k == "mapname":
@@ -1379,6 +1582,7 @@ class Iourt43Parser(b3.parser.Parser):
 
         game.startMap()
         game.rounds = 0
+        self._rcon_cache.invalidate()
         start_daemon_thread(target=self.clients.sync, name="iourt43-sync")
         if not round_start:
             self.info(
@@ -1534,7 +1738,33 @@ class Iourt43Parser(b3.parser.Parser):
         : auth-whois 3
         Client 3 is not active.
         """
-        if not (data := self.write(f"auth-whois {cid}")):
+        return self._parseFrozenSandAccount(cid, self.write(f"auth-whois {cid}"))
+
+    def queryClientsFrozenSandAccount(self, cids):
+        """
+        Query the Frozen Sand account of several clients: the auth-whois
+        commands are sent in parallel instead of one after the other.
+        :param cids: The client slot numbers
+        :return: A dict of queryClientFrozenSandAccount results keyed by slot number
+        """
+        futures = {cid: self.write_async(f"auth-whois {cid}") for cid in cids}
+        accounts = {}
+        for cid, future in futures.items():
+            try:
+                data = future.result()
+            except Exception as e:
+                self.warning("queryClientsFrozenSandAccount: %s: %r", cid, e)
+                data = None
+            accounts[cid] = self._parseFrozenSandAccount(cid, data)
+        return accounts
+
+    def _parseFrozenSandAccount(self, cid, data):
+        """
+        Parse a reply to the auth-whois command.
+        :param cid: The client slot number
+        :param data: The auth-whois reply
+        """
+        if not data:
             self.warning("queryClientFrozenSandAccount: auth-whois failed for %s", cid)
             return {}
 
@@ -1577,28 +1807,63 @@ class Iourt43Parser(b3.parser.Parser):
 
         self.queueEvent(self.getEvent("EVT_CLIENT_UNBAN", data=admin, client=client))
 
-    def getPlayerPings(self, filter_client_ids=None):
+    def getStatus(self, maxRetries=None, refresh=False):
+        """
+        Return the parsed response of the status RCON command, shared by the
+        callers asking for it within the RCON cache TTL.
+        :param maxRetries: How many times to retry the RCON command upon failure
+        :param refresh: Whether to ignore the cached response
+        :return: A dict (map, players, pings, scores) or None if the server did not respond
+        """
+        return self._rcon_cache.get(
+            "status", lambda: self._queryStatus(maxRetries), refresh
+        )
+
+    def _queryStatus(self, maxRetries=None):
+        """
+        Send the status RCON command and parse its response.
+        :param maxRetries: How many times to retry the RCON command upon failure
+        """
+        if not (data := self.write("status", maxRetries=maxRetries)):
+            return None
+
+        lines = data.splitlines()
+        status = {"map": None, "players": {}, "pings": {}, "scores": {}}
+        if lines and (m := re.match(self._reMapNameFromStatus, lines[0].strip())):
+            status["map"] = str(m["map"])
+
+        lastslot = -1
+        for index, line in enumerate(lines):
+            m = re.match(self._regPlayer, line.strip())
+            if score := re.match(self._regPlayerShort, line) or m:
+                status["scores"][str(score["slot"])] = int(score["score"])
+            if not m:
+                continue
+            slot = str(m["slot"])
+            # ignore zombies, let them not bother us with errors
+            if m["ping"] != "ZMBI":
+                try:
+                    status["pings"][slot] = int(m["ping"])
+                except ValueError:
+                    status["pings"][slot] = 999
+            if index >= 3 and int(slot) > lastslot:
+                lastslot = int(slot)
+                d = m.groupdict()
+                d["pbid"] = None
+                status["players"][slot] = d
+
+        return status
+
+    def getPlayerPings(self, filter_client_ids=None, refresh=False):
         """
         Returns a dict having players' id for keys and players' ping for values.
         :param filter_client_ids: If filter_client_id is an iterable, only return values for the given client ids.
+        :param refresh: Whether to ignore the cached status response
         """
-        if not (data := self.write("status")):
+        if not (status := self.getStatus(refresh=refresh)):
             self.warning("getPlayerPings: rcon status response empty")
             return {}
-
-        players = {}
-        for line in data.splitlines():
-            if m := re.match(self._regPlayer, line.strip()):
-                if m["ping"] == "ZMBI":
-                    # ignore them, let them not bother us with errors
-                    pass
-                else:
-                    try:
-                        players[str(m["slot"])] = int(m["ping"])
-                    except ValueError:
-                        players[str(m["slot"])] = 999
-
-        return players
+        return dict(status["pings"])
 
     def sync(self):
         """
@@ -1610,23 +1875,24 @@ class Iourt43Parser(b3.parser.Parser):
         plist = self.getPlayerList(maxRetries=4)
         mlist = {}
 
-        for cid, c in plist.items():
-            if client := self.getByCidOrJoinPlayer(cid):
-                # Disconnect the zombies first
-                if c["ping"] == "ZMBI":
-                    pass
-                elif client.guid and "guid" in c:
-                    if client.guid == c["guid"]:
-                        # player matches
-                        mlist[str(cid)] = client
-                    else:
-                        client.disconnect()
-                elif client.ip and "ip" in c:
-                    if client.ip == c["ip"]:
-                        # player matches
-                        mlist[str(cid)] = client
-                    else:
-                        client.disconnect()
+        with self.clients.deferAuth():
+            for cid, c in plist.items():
+                if client := self.getByCidOrJoinPlayer(cid):
+                    # Disconnect the zombies first
+                    if c["ping"] == "ZMBI":
+                        pass
+                    elif client.guid and "guid" in c:
+                        if client.guid == c["guid"]:
+                            # player matches
+                            mlist[str(cid)] = client
+                        else:
+                            client.disconnect()
+                    elif client.ip and "ip" in c:
+                        if client.ip == c["ip"]:
+                            # player matches
+                            mlist[str(cid)] = client
+                        else:
+                            client.disconnect()
 
         return mlist
 
@@ -1830,7 +2096,7 @@ class Iourt43Parser(b3.parser.Parser):
                 self.OnClientuserinfo(None, userinfostring)
             return self.clients.getByCID(cid)
 
-    def getPlayerTeams(self):
+    def getPlayerTeams(self, refresh=False):
         """
         Return a dict having cid as keys and a B3 team as value for
         as many slots as we can get a team for.
@@ -1858,6 +2124,13 @@ class Iourt43Parser(b3.parser.Parser):
 
         NOTE: this won't work fully if the server has private slots.
         see http://forums.urbanterror.net/index.php/topic,9356.0.html
+        :param refresh: Whether to ignore the cached response
+        """
+        return dict(self._rcon_cache.get("teams", self._queryPlayerTeams, refresh))
+
+    def _queryPlayerTeams(self):
+        """
+        Send the players and cvarlist RCON commands and merge their teams.
         """
         player_teams = {}
         players_data = self.write("players")
@@ -1978,9 +2251,10 @@ class Iourt43Parser(b3.parser.Parser):
 
     def __setup_connected_players(self):
         player_list = self.getPlayerList()
-        for cid in player_list:
-            if userinfostring := self.queryClientUserInfoByCid(cid):
-                self.OnClientuserinfo(None, userinfostring)
+        with self.clients.deferAuth():
+            for cid in player_list:
+                if userinfostring := self.queryClientUserInfoByCid(cid):
+                    self.OnClientuserinfo(None, userinfostring)
         self.__reconcile_connected_player_teams(player_list)
 
     def __reconcile_connected_player_teams(self, player_list):
@@ -2005,44 +2279,27 @@ class Iourt43Parser(b3.parser.Parser):
                 if newteam != client.team:
                     client.team = newteam
 
-    def getPlayerScores(self):
+    def getPlayerScores(self, refresh=False):
         """
         Returns a dict having players' id for keys and players' scores for values.
+        :param refresh: Whether to ignore the cached status response
         """
-        if not (data := self.write("status")):
+        if not (status := self.getStatus(refresh=refresh)):
             self.warning("getPlayerScores: rcon status no response")
             return {}
+        return dict(status["scores"])
 
-        players = {}
-        for line in data.splitlines():
-            if not (m := re.match(self._regPlayerShort, line)):
-                m = re.match(self._regPlayer, line.strip())
-
-            if m:
-                players[str(m["slot"])] = int(m["score"])
-
-        return players
-
-    def getPlayerList(self, maxRetries=None):
+    def getPlayerList(self, maxRetries=None, refresh=False):
         """
         Query the game server for connected players.
         Return a dict having players' id for keys and players' data as another dict for values.
+        :param maxRetries: How many times to retry the RCON command upon failure
+        :param refresh: Whether to ignore the cached status response
         """
-        if not (data := self.write("status", maxRetries=maxRetries)):
+        if not (status := self.getStatus(maxRetries=maxRetries, refresh=refresh)):
             self.warning("getPlayerList: rcon status no response")
             return {}
-
-        players = {}
-        lastslot = -1
-        for line in data.splitlines()[3:]:
-            if m := re.match(self._regPlayer, line.strip()):
-                d = m.groupdict()
-                if int(m["slot"]) > lastslot:
-                    lastslot = int(m["slot"])
-                    d["pbid"] = None
-                    players[str(m["slot"])] = d
-
-        return players
+        return {cid: dict(data) for cid, data in status["players"].items()}
 
     def getCvar(self, cvar_name):
         """
@@ -2087,21 +2344,18 @@ class Iourt43Parser(b3.parser.Parser):
         self.warning("Use of deprecated method: set(): please use: setCvar()")
         self.setCvar(cvar_name, value)
 
-    def getMap(self):
+    def getMap(self, refresh=False):
         """
         Return the current map/level name.
+        :param refresh: Whether to ignore the cached status response
         """
-        if not (data := self.write("status")):
+        if not (status := self.getStatus(refresh=refresh)):
             self.warning("getMap: rcon status no response")
             return None
-
-        line = data.splitlines()[0]
-        if m := re.match(self._reMapNameFromStatus, line.strip()):
-            return str(m["map"])
-
-        return None
+        return status["map"]
 
     def OnExit(self, action, data, match=None):
+        self.flush_damage_batches()
         self.game.mapEnd()
         return self.getEvent("EVT_GAME_EXIT", None)
 
@@ -68,6 +68,18 @@ class Plugin:
     loadAfterPlugins = []
     """:type: list"""
 
+    # Whether this plugin must receive its events one at a time, in the order they were queued, when
+    # B3 dispatches events with several workers (see b3::event_workers): set this to True when the
+    # plugin keeps state shared across clients which is not protected against concurrent access.
+    ordered_events = False
+    """:type: bool"""
+
+    # The b3.clients.ClientRecord subclass holding the per-client variables of this plugin (see
+    # Client.record()): hot counters become attribute increments instead of Client.var() lookups.
+    # Client.var() and Client.setvar() keep working on the record fields.
+    clientRecord = None
+    """:type: type"""
+
     # Default messages which can be retrieved using the getMessage method: this dict will be
     # used in place of a missing 'messages' configuration file section.
     _default_messages = {}
@@ -125,6 +137,7 @@ class Plugin:
         Enable the plugin.
         """
         self._enabled = True
+        self.console.rebuild_event_dispatch()
         name = self.plugin_name
         self.console.queueEvent(self.console.getEvent("EVT_PLUGIN_ENABLED", data=name))
         self.onEnable()
@@ -134,6 +147,7 @@ class Plugin:
         Disable the plugin.
         """
         self._enabled = False
+        self.console.rebuild_event_dispatch()
         name = self.plugin_name
         self.console.queueEvent(self.console.getEvent("EVT_PLUGIN_DISABLED", data=name))
         self.onDisable()
@@ -418,6 +432,7 @@ class Plugin:
 
         if hook not in self.eventmap[event_id]:
             self.eventmap[event_id].append(hook)
+            self.console.rebuild_event_dispatch()
 
         self.info("Created event mapping: <%s:%s>", event_name, hook.__name__)
 
@@ -455,6 +470,16 @@ class Plugin:
         """
         self.console.createEvent(key, name)
 
+    def getEventHooks(self, event_id):
+        """
+        Return the hooks handling an event, used by the console dispatch table.
+        :param event_id: The event id
+        """
+        if type(self).parseEvent is not Plugin.parseEvent:
+            # the plugin dispatches events itself
+            return (self.parseEvent,)
+        return tuple(self.eventmap.get(event_id, ()))
+
     def parseEvent(self, event):
         """
         Dispatch an Event.
@@ -590,6 +615,13 @@ class Plugin:
         """
         self.console.critical(f"{self.__class__.__name__}: {msg}", *args, **kwargs)
 
+    def newClientRecord(self):
+        """
+        Return a new record holding the variables of this plugin for a client (see clientRecord).
+        Overwrite this to set initial values depending on the plugin configuration.
+        """
+        return self.clientRecord()
+
     def onLoadConfig(self):
         """
         This is called after loadConfig() and if a user use the !reconfig command.
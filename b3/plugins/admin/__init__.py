@@ -12,6 +12,7 @@ from b3 import functions
 from b3.clients import Client, Group
 from b3.config import NoOptionError
 from b3.functions import getCmd, minutesStr
+from b3.histogram import LatencyHistogram
 
 __version__ = "1.35"
 __author__ = "ThorN, xlr8or, Courgette, Ozon, Fenix"
@@ -1312,6 +1313,78 @@ class AdminPlugin(b3.plugin.Plugin):
             % (b3.version, functions.minutesStr(self.console.upTime() / 60.0)),
         )
 
+    @staticmethod
+    def _describe_latency(histogram):
+        """
+        Return the count and percentiles of a latency histogram as a colored message.
+        :param histogram: The b3.histogram.LatencyHistogram
+        """
+
+        def ms(seconds):
+            return f"{seconds * 1000:.1f}ms"
+
+        return (
+            f"^7{histogram.count} ^7p50 ^2{ms(histogram.percentile(50))} "
+            f"^7p95 ^3{ms(histogram.percentile(95))} "
+            f"^7p99 ^1{ms(histogram.percentile(99))} ^7max {ms(histogram.max)}"
+        )
+
+    def cmd_eventstats(self, data, client, cmd=None):
+        """
+        [<plugin>] - report the slowest event handlers and the event queue wait time
+        """
+        describe = self._describe_latency
+        stats = self.console.getEventsStats()
+        handling = [
+            (plugin_name, event_name, histogram)
+            for plugin_name, event_name, histogram in stats.handling_stats()
+            if not data or data.lower() in plugin_name.lower()
+        ]
+        if not handling:
+            cmd.sayLoudOrPM(client, "^7No event handled yet")
+            return
+
+        handling.sort(key=lambda stat: stat[2].percentile(99), reverse=True)
+        for plugin_name, event_name, histogram in handling[:3]:
+            cmd.sayLoudOrPM(
+                client,
+                f"^7{plugin_name.removesuffix('Plugin')} {event_name.removeprefix('EVT_')}: "
+                f"{describe(histogram)}",
+            )
+
+        waiting = LatencyHistogram()
+        for _, histogram in stats.waiting_stats():
+            waiting.merge(histogram)
+        cmd.sayLoudOrPM(client, f"^7Queue wait: {describe(waiting)}")
+
+    def cmd_rconstats(self, data, client, cmd=None):
+        """
+        [<command>] - report the RCON commands taking the most time
+        """
+        if (stats := self.console.getRconStats()) is None:
+            cmd.sayLoudOrPM(client, "^7RCON stats not available")
+            return
+
+        verbs = [
+            (verb, verb_stats)
+            for verb, verb_stats in stats.verbs()
+            if not data or verb.startswith(data.lower())
+        ]
+        if not verbs:
+            cmd.sayLoudOrPM(client, "^7No RCON command sent yet")
+            return
+
+        for verb, verb_stats in verbs[:3]:
+            message = (
+                f"^7{verb}: {self._describe_latency(verb_stats.latency)} "
+                f"^7total {verb_stats.latency.total:.1f}s"
+            )
+            if errors := verb_stats.timeouts + verb_stats.failures:
+                message += f" ^1{errors} ^7errors"
+            if verb_stats.retries:
+                message += f" ^3{verb_stats.retries} ^7retries"
+            cmd.sayLoudOrPM(client, message)
+
     def cmd_register(self, data, client, cmd=None):
         """
         - register yourself as a basic user
@@ -3,13 +3,57 @@ import contextlib
 import b3
 import b3.events
 import b3.plugin
+from b3.clients import ClientRecord
 from b3.config import NoOptionError
 
 __author__ = "ThorN, GrosBedo"
-__version__ = "1.5.1"
+__version__ = "1.6.0"
+
+
+class StatsRecord(ClientRecord):
+    """
+    Map stats of a client.
+    """
+
+    __slots__ = (
+        "assists",
+        "damageGot",
+        "damageHit",
+        "damageTeamHit",
+        "deaths",
+        "experience",
+        "kills",
+        "oldexperience",
+        "points",
+        "pointsLost",
+        "pointsWon",
+        "shotsGot",
+        "shotsHit",
+        "shotsTeamHit",
+        "teamKills",
+    )
+    defaults = {
+        "assists": 0,
+        "damageGot": 0,
+        "damageHit": 0,
+        "damageTeamHit": 0,
+        "deaths": 0,
+        "experience": 0.0,
+        "kills": 0,
+        "oldexperience": 0.0,
+        "points": 100.0,
+        "pointsLost": 0,
+        "pointsWon": 0,
+        "shotsGot": 0,
+        "shotsHit": 0,
+        "shotsTeamHit": 0,
+        "teamKills": 0,
+    }
 
 
 class StatsPlugin(b3.plugin.Plugin):
+    clientRecord = StatsRecord
+
     def __init__(self, console, config=None):
         super().__init__(console, config)
         self.mapstatslevel = 0
@@ -137,7 +181,11 @@ class StatsPlugin(b3.plugin.Plugin):
         self.registerEvent("EVT_CLIENT_DAMAGE_TEAM", self.onDamageTeam)
         self.registerEvent("EVT_CLIENT_KILL_TEAM", self.onTeamKill)
         self.registerEvent("EVT_CLIENT_KILL", self.onKill)
-        self.registerEvent("EVT_CLIENT_DAMAGE", self.onDamage)
+        if getattr(self.console, "damage_batch_window", 0):
+            # the parser coalesces hits: handle one event per burst of hits
+            self.registerEvent("EVT_CLIENT_DAMAGE_BATCH", self.onDamageBatch)
+        else:
+            self.registerEvent("EVT_CLIENT_DAMAGE", self.onDamage)
         self.registerEvent("EVT_GAME_EXIT", self.onShowAwards)
         self.registerEvent("EVT_GAME_MAP_CHANGE", self.onShowAwards)
         self.registerEvent("EVT_GAME_ROUND_START", self.onRoundStart)
@@ -149,32 +197,32 @@ class StatsPlugin(b3.plugin.Plugin):
         if self.show_awards_xp:
             self.cmd_topxp(None)
 
+    def newClientRecord(self):
+        return StatsRecord(points=self.startPoints)
+
     def onRoundStart(self, event):
         for _cid, c in self.console.clients.items():
             if c.maxLevel >= self.mapstatslevel:
                 try:
-                    c.setvar(self, "shotsTeamHit", 0)
-                    c.setvar(self, "damageTeamHit", 0)
-                    c.setvar(self, "shotsHit", 0)
-                    c.setvar(self, "damageHit", 0)
-                    c.setvar(self, "shotsGot", 0)
-                    c.setvar(self, "damageGot", 0)
-                    c.setvar(self, "teamKills", 0)
-                    c.setvar(self, "kills", 0)
-                    c.setvar(self, "deaths", 0)
-                    c.setvar(self, "assists", 0)
+                    stats = c.record(self)
+                    stats.reset(
+                        "shotsTeamHit",
+                        "damageTeamHit",
+                        "shotsHit",
+                        "damageHit",
+                        "shotsGot",
+                        "damageGot",
+                        "teamKills",
+                        "kills",
+                        "deaths",
+                        "assists",
+                    )
                     if self.resetscore:
                         # skill points are reset at the beginning of each map
-                        c.setvar(self, "pointsLost", 0)
-                        c.setvar(self, "pointsWon", 0)
-                        c.setvar(self, "points", self.startPoints)
-                    if self.resetxp:
-                        c.setvar(self, "experience", 0.0)
-                    else:
-                        c.var(self, "oldexperience", 0.0).value += c.var(
-                            self, "experience", 0.0
-                        ).value
-                        c.setvar(self, "experience", 0.0)
+                        stats.reset("pointsLost", "pointsWon", points=self.startPoints)
+                    if not self.resetxp:
+                        stats.oldexperience += stats.experience
+                    stats.experience = 0.0
                 except Exception as e:
                     self.error(e)
 
@@ -186,10 +234,25 @@ class StatsPlugin(b3.plugin.Plugin):
         if points > 100:
             points = 100
 
-        killer.var(self, "shotsHit", 0).value += 1
-        killer.var(self, "damageHit", 0).value += points
-        victim.var(self, "shotsGot", 0).value += 1
-        victim.var(self, "damageGot", 0).value += points
+        killer_stats = killer.record(self)
+        killer_stats.shotsHit += 1
+        killer_stats.damageHit += points
+        victim_stats = victim.record(self)
+        victim_stats.shotsGot += 1
+        victim_stats.damageGot += points
+
+    def onDamageBatch(self, event):
+        killer = event.client
+        victim = event.target
+        # the points of each hit are capped to 100 by the coalescer
+        points, _, hits, _ = event.data
+
+        killer_stats = killer.record(self)
+        killer_stats.shotsHit += hits
+        killer_stats.damageHit += points
+        victim_stats = victim.record(self)
+        victim_stats.shotsGot += hits
+        victim_stats.damageGot += points
 
     def onDamageTeam(self, event):
         killer = event.client
@@ -198,8 +261,9 @@ class StatsPlugin(b3.plugin.Plugin):
         if points > 100:
             points = 100
 
-        killer.var(self, "shotsTeamHit", 0).value += 1
-        killer.var(self, "damageTeamHit", 0).value += points
+        killer_stats = killer.record(self)
+        killer_stats.shotsTeamHit += 1
+        killer_stats.damageTeamHit += points
 
     def onKill(self, event):
         killer = event.client
@@ -209,21 +273,24 @@ class StatsPlugin(b3.plugin.Plugin):
         if points > 100:
             points = 100
 
-        killer.var(self, "shotsHit", 0).value += 1
-        killer.var(self, "damageHit", 0).value += points
+        killer_stats = killer.record(self)
+        victim_stats = victim.record(self)
 
-        victim.var(self, "shotsGot", 0).value += 1
-        victim.var(self, "damageGot", 0).value += points
+        killer_stats.shotsHit += 1
+        killer_stats.damageHit += points
 
-        killer.var(self, "kills", 0).value += 1
-        victim.var(self, "deaths", 0).value += 1
+        victim_stats.shotsGot += 1
+        victim_stats.damageGot += points
+
+        killer_stats.kills += 1
+        victim_stats.deaths += 1
 
         val = self.score(killer, victim)
-        killer.var(self, "points", self.startPoints).value += val
-        killer.var(self, "pointsWon", 0).value += val
+        killer_stats.points += val
+        killer_stats.pointsWon += val
 
-        victim.var(self, "points", self.startPoints).value -= val
-        victim.var(self, "pointsLost", 0).value += val
+        victim_stats.points -= val
+        victim_stats.pointsLost += val
 
         self.updateXP(killer)
         self.updateXP(victim)
@@ -236,37 +303,35 @@ class StatsPlugin(b3.plugin.Plugin):
         if points > 100:
             points = 100
 
-        killer.var(self, "shotsTeamHit", 0).value += 1
-        killer.var(self, "damageTeamHit", 0).value += points
+        killer_stats = killer.record(self)
+        killer_stats.shotsTeamHit += 1
+        killer_stats.damageTeamHit += points
 
-        killer.var(self, "teamKills", 0).value += 1
+        killer_stats.teamKills += 1
 
         val = self.score(killer, victim)
-        killer.var(self, "points", self.startPoints).value -= val
-        killer.var(self, "pointsLost", 0).value += val
+        killer_stats.points -= val
+        killer_stats.pointsLost += val
 
         self.updateXP(killer)
         self.updateXP(victim)
 
     def onAssist(self, event):
-        event.client.var(self, "assists", 0).value += 1
+        event.client.record(self).assists += 1
 
     def updateXP(self, sclient):
-        realpoints = (
-            sclient.var(self, "pointsWon", 0).value
-            - sclient.var(self, "pointsLost", 0).value
-        )
-        if sclient.var(self, "deaths", 0).value != 0:
-            experience = (
-                sclient.var(self, "kills", 0).value * realpoints
-            ) / sclient.var(self, "deaths", 0).value
+        stats = sclient.record(self)
+        realpoints = stats.pointsWon - stats.pointsLost
+        if stats.deaths != 0:
+            experience = (stats.kills * realpoints) / stats.deaths
         else:
-            experience = sclient.var(self, "kills", 0).value * realpoints
-        sclient.var(self, "experience", 0.0).value = experience * 1.0
+            experience = stats.kills * realpoints
+        stats.experience = experience * 1.0
 
     def score(self, killer, victim):
-        k = int(killer.var(self, "points", self.startPoints).value)
-        v = int(victim.var(self, "points", self.startPoints).value)
+        # var() sets the points which are not set: scored clients are ranked by !topstats
+        k = int(killer.var(self, "points").value)
+        v = int(victim.var(self, "points").value)
 
         if k < 1:
             k = 1.00
@@ -293,21 +358,18 @@ class StatsPlugin(b3.plugin.Plugin):
         else:
             sclient = client
 
+        stats = sclient.record(self)
         message = (
             "^3Stats ^7[ %s ^7] K ^2%s ^7D ^3%s ^7A ^5%s ^7TK ^1%s ^7Dmg ^5%s ^7Skill ^3%1.02f ^7XP ^6%s"
             % (
                 sclient.exactName,
-                sclient.var(self, "kills", 0).value,
-                sclient.var(self, "deaths", 0).value,
-                sclient.var(self, "assists", 0).value,
-                sclient.var(self, "teamKills", 0).value,
-                sclient.var(self, "damageHit", 0).value,
-                round(sclient.var(self, "points", self.startPoints).value, 2),
-                round(
-                    sclient.var(self, "oldexperience", 0.0).value
-                    + sclient.var(self, "experience", 0.0).value,
-                    2,
-                ),
+                stats.kills,
+                stats.deaths,
+                stats.assists,
+                stats.teamKills,
+                stats.damageHit,
+                round(stats.points, 2),
+                round(stats.oldexperience + stats.experience, 2),
             )
         )
 
@@ -363,7 +425,7 @@ class StatsPlugin(b3.plugin.Plugin):
 
     def _top_scores(self, score_kind, top_n=5):
         scores = [
-            (round(c.var(self, score_kind, self.startPoints).value, 2), c.exactName)
+            (round(getattr(c.record(self), score_kind), 2), c.exactName)
             for c in self.console.clients.getList()
             if c.isvar(self, score_kind)
         ]
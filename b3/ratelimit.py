@@ -0,0 +1,94 @@
+import threading
+import time
+
+__version__ = "1.0"
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter.
+    Tokens are added at a constant rate up to the bucket capacity, which
+    allows short bursts while enforcing the average rate over time.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        """
+        Object constructor.
+        :param rate: The number of tokens added per second
+        :param burst: The bucket capacity (defaults to one second worth of tokens)
+        :param clock: The monotonic clock used to refill the bucket
+        :param sleep: The function used to block until tokens are available
+        :raise ValueError: If the rate or the burst is not positive
+        """
+        if rate <= 0:
+            raise ValueError(f"rate must be positive: {rate!r}")
+        if burst is None:
+            burst = max(1.0, rate)
+        if burst <= 0:
+            raise ValueError(f"burst must be positive: {burst!r}")
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.burst
+        self._last = clock()
+        self._lock = threading.Lock()
+        self.throttled = 0
+        self.throttled_time = 0.0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self, tokens=1):
+        """
+        Take tokens from the bucket, possibly going into debt.
+        :param tokens: The number of tokens to take
+        :return: The number of seconds to wait before the tokens may be used
+        """
+        with self._lock:
+            self._refill()
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def wait_time(self, tokens=1):
+        """
+        Return the number of seconds until tokens are available, without taking them.
+        :param tokens: The number of tokens needed
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def try_acquire(self, tokens=1):
+        """
+        Take tokens from the bucket only if they are available right away.
+        :param tokens: The number of tokens to take
+        :return: True if the tokens were taken, False otherwise
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens < tokens:
+                return False
+            self._tokens -= tokens
+            return True
+
+    def acquire(self, tokens=1):
+        """
+        Take tokens from the bucket, blocking until they are available.
+        :param tokens: The number of tokens to take
+        :return: The number of seconds spent waiting
+        """
+        if wait := self.reserve(tokens):
+            self.throttled += 1
+            self.throttled_time += wait
+            self._sleep(wait)
+        return wait
+
+    def __str__(self):
+        return f"TokenBucket(rate={self.rate:g}/s, burst={self.burst:g})"
@@ -1,18 +1,430 @@
+import contextlib
+import heapq
+import itertools
 import queue
 import re
 import select
 import socket
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import b3.functions
+import b3.ratelimit
+import b3.tracing
+from b3.histogram import LatencyHistogram
 
 __author__ = "ThorN"
-__version__ = "1.11"
+__version__ = "1.16"
+
+# scheduler lanes, served in that order when commands are waiting to be sent
+LANE_ACTION = 0  # kicks, bans, team changes, map changes...
+LANE_QUERY = 1  # status, players, cvars...
+LANE_CHAT = 2  # say, tell, bigtext
+LANE_NAMES = ("action", "query", "chat")
+
+_rePackable = re.compile(r"^(?P<verb>say|tell\s+\S+)\s+(?P<text>.*)$", re.IGNORECASE)
+
+
+def pack_commands(lines, max_length):
+    """
+    Pack consecutive say and tell commands into ';' separated commands of at most
+    max_length characters, so that they are sent to the game server in a single
+    packet. Their text is quoted (double quotes are replaced by single quotes) so
+    that a ';' in a message can't end the command. Other commands are kept as is.
+    :param lines: A list of RCON commands
+    :param max_length: The maximum length of a packed command
+    :return: The list of commands to send
+    """
+    packets = []
+    packet = ""
+    for cmd in lines:
+        if not (cmd := cmd.strip() if cmd else None):
+            continue
+        if not (m := _rePackable.match(cmd)):
+            if packet:
+                packets.append(packet)
+                packet = ""
+            packets.append(cmd)
+            continue
+        text = m["text"].replace('"', "'")
+        cmd = f'{m["verb"]} "{text}"'
+        if packet and len(packet) + len(cmd) + 1 <= max_length:
+            packet = f"{packet};{cmd}"
+        else:
+            if packet:
+                packets.append(packet)
+            packet = cmd
+    if packet:
+        packets.append(packet)
+    return packets
+
+
+class RconScheduler:
+    """
+    Limit the rate of the RCON packets sent to the game server with a token
+    bucket (ioq3 silently drops the RCON packets of an address going over its
+    rate limit). Commands waiting for a token are served by lane: enforcement
+    actions first, then queries, then chat. Chat commands are dropped when too
+    many of them are already waiting.
+    """
+
+    action_verbs = frozenset(
+        (
+            "addip",
+            "cyclemap",
+            "exec",
+            "forcecaptain",
+            "forcesub",
+            "forceteam",
+            "kick",
+            "map",
+            "map_restart",
+            "mute",
+            "nuke",
+            "pause",
+            "quit",
+            "reload",
+            "removeip",
+            "restart",
+            "shuffleteams",
+            "slap",
+            "smite",
+            "swap",
+            "swapteams",
+            "veto",
+        )
+    )
+    chat_verbs = frozenset(("bigtext", "say", "tell"))
+
+    def __init__(self, rate, burst=None, max_chat=50):
+        """
+        Object constructor.
+        :param rate: The number of RCON packets sent per second
+        :param burst: The number of RCON packets which can be sent at once
+        :param max_chat: The number of chat commands which can wait for a token
+        :raise ValueError: If the rate or the burst is not positive
+        """
+        self.bucket = b3.ratelimit.TokenBucket(rate, burst)
+        self.max_chat = max_chat
+        self._available = threading.Condition()
+        self._waiting = []  # heap of (lane, sequence number)
+        self._sequence = itertools.count()
+        self._waiting_per_lane = [0] * len(LANE_NAMES)
+        self.queued = [0] * len(LANE_NAMES)  # commands which waited for a token
+        self.sent = [0] * len(LANE_NAMES)
+        self.retried = [0] * len(LANE_NAMES)
+        self.dropped = [0] * len(LANE_NAMES)
+
+    def lane(self, cmd):
+        """
+        Return the lane of a RCON command.
+        :param cmd: The RCON command
+        """
+        verb = cmd.split(None, 1)[0].lower() if cmd else ""
+        if verb in self.action_verbs:
+            return LANE_ACTION
+        if verb in self.chat_verbs:
+            return LANE_CHAT
+        return LANE_QUERY
+
+    def acquire(self, lane, retry=False):
+        """
+        Wait for the right to send a RCON packet.
+        :param lane: The lane of the command
+        :param retry: Whether the packet is sent again after a failure
+        :return: False if the command was dropped, True otherwise
+        """
+        bucket = self.bucket
+        with self._available:
+            if retry:
+                self.retried[lane] += 1
+            if not self._waiting and bucket.try_acquire():
+                self.sent[lane] += 1
+                return True
+            if lane == LANE_CHAT and self._waiting_per_lane[lane] >= self.max_chat:
+                self.dropped[lane] += 1
+                return False
+            ticket = (lane, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            self._waiting_per_lane[lane] += 1
+            self.queued[lane] += 1
+            while True:
+                if self._waiting[0] == ticket:
+                    if bucket.try_acquire():
+                        break
+                    self._available.wait(bucket.wait_time())
+                else:
+                    self._available.wait()
+            heapq.heappop(self._waiting)
+            self._waiting_per_lane[lane] -= 1
+            self.sent[lane] += 1
+            self._available.notify_all()
+        return True
+
+    def waiting(self):
+        """
+        Return the number of commands waiting for a token per lane name.
+        """
+        with self._available:
+            return dict(zip(LANE_NAMES, self._waiting_per_lane, strict=True))
+
+    def stats(self):
+        """
+        Return the queued, sent, retried and dropped counters per lane name.
+        """
+        with self._available:
+            return {
+                name: {
+                    "queued": self.queued[lane],
+                    "sent": self.sent[lane],
+                    "retried": self.retried[lane],
+                    "dropped": self.dropped[lane],
+                }
+                for lane, name in enumerate(LANE_NAMES)
+            }
+
+    def __str__(self):
+        return f"RconScheduler({self.bucket.rate:g}/s, burst={self.bucket.burst:g})"
+
+
+RESULT_OK = "ok"
+RESULT_TIMEOUT = "timeout"  # no response
+RESULT_FAILED = "failed"  # too many send/read errors
+RESULT_DROPPED = "dropped"  # dropped by the RconScheduler
+
+
+class VerbStats:
+    """
+    Metrics of the RCON commands starting with the same verb.
+    """
+
+    __slots__ = (
+        "bytes_in",
+        "bytes_out",
+        "commands",
+        "dropped",
+        "failures",
+        "latency",
+        "retries",
+        "timeouts",
+    )
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.commands = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.dropped = 0
+
+    def summary(self):
+        """
+        Return the metrics as a dict (durations in seconds).
+        """
+        return {
+            "commands": self.commands,
+            "total_time": self.latency.total,
+            "latency": self.latency.summary(),
+            "bytes_out": self.bytes_out,
+            "bytes_in": self.bytes_in,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "dropped": self.dropped,
+        }
+
+
+class RconStats:
+    """
+    Latency, traffic, retries and failures of the RCON commands per verb
+    (the first word of the command: status, dumpuser, say, kick...).
+    """
+
+    max_verbs = 100  # beyond that number of verbs, new ones are counted as 'other'
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self._verbs = {}  # verb => VerbStats
+
+    def record(self, cmd, elapsed, bytes_out, bytes_in, retries, result):
+        """
+        Account for a RCON command.
+        :param cmd: The RCON command
+        :param elapsed: The number of seconds spent sending it and reading the response
+        :param bytes_out: The number of bytes sent (retries included)
+        :param bytes_in: The number of bytes received
+        :param retries: The number of times the command was sent again
+        :param result: RESULT_OK, RESULT_TIMEOUT, RESULT_FAILED or RESULT_DROPPED
+        """
+        verb = cmd.split(None, 1)[0].lower() if cmd else ""
+        with self.lock:
+            if (stats := self._verbs.get(verb)) is None:
+                if len(self._verbs) >= self.max_verbs:
+                    verb = "other"
+                if (stats := self._verbs.get(verb)) is None:
+                    stats = self._verbs[verb] = VerbStats()
+            stats.latency.record(elapsed)
+            stats.commands += 1
+            stats.bytes_out += bytes_out
+            stats.bytes_in += bytes_in
+            stats.retries += retries
+            if result == RESULT_TIMEOUT:
+                stats.timeouts += 1
+            elif result == RESULT_FAILED:
+                stats.failures += 1
+            elif result == RESULT_DROPPED:
+                stats.dropped += 1
+
+    def verbs(self):
+        """
+        Return a list of (verb, VerbStats) tuples, the most time consuming verbs first.
+        """
+        with self.lock:
+            verbs = list(self._verbs.items())
+        verbs.sort(key=lambda item: item[1].latency.total, reverse=True)
+        return verbs
+
+    def summary(self):
+        """
+        Return the metrics as a dict which can be serialized to JSON.
+        """
+        return {verb: stats.summary() for verb, stats in self.verbs()}
+
+    def dump_stats(self, console):
+        """
+        Print the RCON metrics in the log file.
+        :param console: The console implementation
+        """
+        console.info("***** RCON Stats *****")
+        for verb, stats in self.verbs():
+            latency = stats.latency
+            console.info(
+                "%s : count(%i), total(%0.3f), p50(%0.4f), p95(%0.4f), p99(%0.4f), "
+                "max(%0.4f), out(%iB), in(%iB), retries(%i), timeouts(%i), "
+                "failures(%i), dropped(%i)",
+                verb,
+                stats.commands,
+                latency.total,
+                latency.percentile(50),
+                latency.percentile(95),
+                latency.percentile(99),
+                latency.max,
+                stats.bytes_out,
+                stats.bytes_in,
+                stats.retries,
+                stats.timeouts,
+                stats.failures,
+                stats.dropped,
+            )
+
+
+class RttEstimator:
+    """
+    Smoothed round trip time and variance of the RCON commands (as computed
+    for TCP retransmission timeouts in RFC 6298), and smoothed maximum delay
+    between the fragments of a response. The response timeout is backed off
+    after a command got no response.
+    """
+
+    alpha = 0.125  # gain of the smoothed round trip time
+    beta = 0.25  # gain of the round trip time variance
+    log_interval = 500  # number of samples between each estimates logging
+
+    def __init__(self, console=None):
+        """
+        Object constructor.
+        :param console: The console implementation used to log the estimates
+        """
+        self.console = console
+        self.lock = threading.Lock()
+        self.srtt = None  # smoothed round trip time in seconds
+        self.rttvar = 0.0  # round trip time variance in seconds
+        self.gap = 0.0  # smoothed maximum delay between fragments in seconds
+        self.backoff = 1  # response timeout multiplier after missing responses
+        self.samples = 0
+        self.timeouts = 0
+
+    def add_sample(self, rtt):
+        """
+        Account for the delay between a command and the first fragment of its response.
+        :param rtt: The round trip time in seconds
+        """
+        with self.lock:
+            if self.srtt is None:
+                self.srtt = rtt
+                self.rttvar = rtt / 2
+            else:
+                self.rttvar += self.beta * (abs(self.srtt - rtt) - self.rttvar)
+                self.srtt += self.alpha * (rtt - self.srtt)
+            self.backoff = 1
+            self.samples += 1
+            log = self.console is not None and self.samples % self.log_interval == 1
+        if log:
+            self.console.info("RCON: %s", self)
+
+    def add_gap(self, gap):
+        """
+        Account for the delay between two fragments of a response.
+        :param gap: The delay in seconds
+        """
+        with self.lock:
+            self.gap = max(gap, self.gap + self.alpha * (gap - self.gap))
+
+    def add_timeout(self):
+        """
+        Account for a command which got no response.
+        """
+        with self.lock:
+            self.timeouts += 1
+            self.backoff = min(self.backoff * 2, 8)
+
+    def timeout(self):
+        """
+        Return the time to wait for the first fragment of a response, None if unknown.
+        """
+        if (srtt := self.srtt) is None:
+            return None
+        return (srtt + 4 * self.rttvar) * 2 * self.backoff
+
+    def tail_timeout(self):
+        """
+        Return the time to wait for more fragments of a response, None if unknown.
+        """
+        if self.srtt is None:
+            return None
+        return 2 * self.gap + 4 * self.rttvar
+
+    def __str__(self):
+        if self.srtt is None:
+            return "RTT unknown"
+        return (
+            f"RTT {self.srtt * 1000:.2f}ms (var {self.rttvar * 1000:.2f}ms, "
+            f"fragment gap {self.gap * 1000:.2f}ms, {self.samples} samples, "
+            f"{self.timeouts} timeouts)"
+        )
 
 
 class Rcon:
+    """
+    RCON client sending commands over a pool of UDP sockets: every socket has
+    its own source port, so the game server responses can't get mixed up and
+    up to max_sockets commands can be in flight at the same time.
+    """
+
     socket_timeout = 0.8
     socket_timeout2 = 0.225
+    max_sockets = 3  # size of the socket pool (number of concurrent commands)
+    pack_length = 1000  # max length of packed say/tell commands, 0 not to pack them
+    scheduler = None  # optional RconScheduler limiting the rate of RCON packets
+    # with a RttEstimator, the timeouts above are ceilings: the actual timeouts are
+    # derived from the measured round trip time, down to these floors
+    rtt = None
+    stats = None  # RconStats of the commands sent
+    socket_timeout_floor = 0.1
+    socket_timeout2_floor = 0.015
     rconreplystring = b"\377\377\377\377print\n"
 
     def __init__(self, console, host, password):
@@ -26,65 +438,190 @@ class Rcon:
         self.rconsendstring = f'\377\377\377\377rcon "{password}" '.encode(
             self.console.encoding
         )
-        self.socket = socket.socket(type=socket.SOCK_DGRAM)
-        self.socket.settimeout(2.0)
-        self.socket.connect(host)
-        self.lock = threading.Lock()
+        self.rtt = RttEstimator(console)
+        self.stats = RconStats()
+        self.lock = threading.Condition()  # guards the socket pool
+        self._sockets = []  # every socket of the pool
+        self._idle = []  # sockets of the pool not sending a command
+        self._idle.append(self._new_socket())
+        self._executor = None
         self._stopEvent = object()
         self.queue = queue.Queue(maxsize=100)
         self._writelines_thread = b3.functions.start_daemon_thread(
             target=self._writelines, name="rcon"
         )
 
-    def send_rcon(self, sock, data, maxRetries=None, socketTimeout=None):
+    def _new_socket(self):
+        """
+        Create a socket of the pool.
+        """
+        sock = socket.socket(type=socket.SOCK_DGRAM)
+        try:
+            sock.settimeout(2.0)
+            sock.connect(self.host)
+        except OSError:
+            sock.close()
+            raise
+        self._sockets.append(sock)
+        return sock
+
+    @contextlib.contextmanager
+    def _socket(self):
+        """
+        Borrow an idle socket from the pool, growing the pool up to max_sockets
+        sockets or waiting for one of them to be released.
+        """
+        with self.lock:
+            while not self._idle:
+                if len(self._sockets) < self.max_sockets:
+                    self._idle.append(self._new_socket())
+                else:
+                    self.lock.wait()
+            sock = self._idle.pop()
+        try:
+            yield sock
+        finally:
+            with self.lock:
+                self._idle.append(sock)
+                self.lock.notify()
+
+    def _drain_socket(self, sock):
+        """
+        Discard the late fragments of a previous response left in the socket buffer.
+        :param sock: The socket to drain
+        """
+        while select.select([sock], [], [], 0)[0]:
+            try:
+                sock.recv(4096)
+            except OSError:
+                return
+
+    def timeouts(self):
+        """
+        Return the time to wait for the first fragment of a response and the
+        time to wait for more fragments, adapted to the round trip time if measured.
+        """
+        timeout = self.socket_timeout
+        timeout2 = self.socket_timeout2
+        if self.rtt is not None:
+            if (estimate := self.rtt.timeout()) is not None:
+                timeout = min(timeout, max(self.socket_timeout_floor, estimate))
+            if (estimate := self.rtt.tail_timeout()) is not None:
+                timeout2 = min(timeout2, max(self.socket_timeout2_floor, estimate))
+        return timeout, timeout2
+
+    def send_rcon(
+        self, sock, data, maxRetries=None, socketTimeout=None, scheduled=False
+    ):
         """
         Send an RCON command.
         :param sock: The socket used to send the payload
         :param data: The string to be sent
         :param maxRetries: How many times we have to retry the sending upon failure
-        :param socketTimeout: The socket timeout value
+        :param socketTimeout: The socket timeout value (defaults to the adaptive timeout)
+        :param scheduled: Whether the scheduler already allowed the first packet
         """
+        timeout, timeout2 = self.timeouts()
         if socketTimeout is None:
-            socketTimeout = self.socket_timeout
+            socketTimeout = timeout
 
         if maxRetries is None:
             maxRetries = 2
 
         data = data.strip()
         payload = self.rconsendstring + data.encode(self.console.encoding) + b"\n"
+        self._drain_socket(sock)
+        scheduler = self.scheduler
+        lane = scheduler.lane(data) if scheduler else None
 
-        retries = 0
-        while retries < maxRetries:
-            sock.settimeout(socketTimeout)
-            try:
-                sock.sendall(payload)
-            except Exception as msg:
-                self.console.warning("RCON: send(%s) error: %r", data, msg)
-            else:
+        begin = time.perf_counter()
+        retries = packets = 0
+        response = None
+        status = RESULT_FAILED
+        try:
+            while retries < maxRetries:
+                if (
+                    scheduler
+                    and (retries or not scheduled)
+                    and not scheduler.acquire(lane, retry=retries > 0)
+                ):
+                    self.console.warning(
+                        "RCON: send(%s) dropped: too many waiting", data
+                    )
+                    status = RESULT_DROPPED
+                    return ""
+                sock.settimeout(socketTimeout)
+                sent = time.perf_counter()
                 try:
-                    return self.read_socket(sock, socketTimeout=socketTimeout)
+                    packets += 1
+                    sock.sendall(payload)
                 except Exception as msg:
-                    self.console.warning("RCON: read(%s) error: %r", data, msg)
+                    self.console.warning("RCON: send(%s) error: %r", data, msg)
+                else:
+                    try:
+                        response, fragments = self._receive(
+                            sock, 4096, socketTimeout, timeout2, sent
+                        )
+                    except Exception as msg:
+                        self.console.warning("RCON: read(%s) error: %r", data, msg)
+                    else:
+                        status = RESULT_OK if fragments else RESULT_TIMEOUT
+                        return response.decode(encoding=self.console.encoding)
 
-            if re.match(r"^quit|map(_rotate)?.*", data):
-                # do not retry quits and map changes since they prevent the
-                # server from responding
-                return ""
+                if re.match(r"^quit|map(_rotate)?.*", data):
+                    # do not retry quits and map changes since they prevent the
+                    # server from responding
+                    return ""
 
-            retries += 1
-            self.console.warning("RCON: send(%s) retry %s", data, retries)
+                retries += 1
+                self.console.warning("RCON: send(%s) retry %s", data, retries)
 
-        self.console.error("RCON: send(%s) too many tries, aborting", data)
-        return ""
+            self.console.error("RCON: send(%s) too many tries, aborting", data)
+            return ""
+        finally:
+            if self.stats is not None:
+                self.stats.record(
+                    data,
+                    time.perf_counter() - begin,
+                    packets * len(payload),
+                    len(response) if response else 0,
+                    retries,
+                    status,
+                )
 
-    def read_socket(self, sock, size=4096, socketTimeout=0.5):
+    def read_socket(
+        self, sock, size=4096, socketTimeout=0.5, tailTimeout=None, sent=None
+    ):
         """
-        Read data from the socket.
+        Read data from the socket, until no more fragment arrives for tailTimeout seconds.
         :param sock: The socket from where to read data
         :param size: The read size
-        :param socketTimeout: The socket timeout value
+        :param socketTimeout: The time to wait for the first fragment
+        :param tailTimeout: The time to wait for more fragments (defaults to socket_timeout2)
+        :param sent: The time.perf_counter value at which the command was sent,
+        to measure the round trip time
         """
+        if tailTimeout is None:
+            tailTimeout = self.socket_timeout2
+        data, _ = self._receive(sock, size, socketTimeout, tailTimeout, sent)
+        if data == b"":
+            return ""
+        return data.decode(encoding=self.console.encoding)
+
+    def _receive(self, sock, size, socketTimeout, tailTimeout, sent):
+        """
+        Read the fragments of a response from the socket.
+        :param sock: The socket from where to read data
+        :param size: The read size
+        :param socketTimeout: The time to wait for the first fragment
+        :param tailTimeout: The time to wait for more fragments
+        :param sent: The time.perf_counter value at which the command was sent, or None
+        :return: The response (without the fragment headers) and the number of fragments
+        """
+        rtt = self.rtt if sent is not None else None
+        fragments = 0
         data = b""
+        received = None
         while True:
             readables, _, errors = select.select([sock], [], [sock], socketTimeout)
             if errors:
@@ -92,13 +629,21 @@ class Rcon:
             if not readables:
                 break
             payload = sock.recv(size)
+            fragments += 1
+            if rtt is not None:
+                now = time.perf_counter()
+                if received is None:
+                    rtt.add_sample(now - sent)
+                else:
+                    rtt.add_gap(now - received)
+                received = now
             data += payload.replace(self.rconreplystring, b"")
             # lower timeout for subsequent calls
-            socketTimeout = self.socket_timeout2
+            socketTimeout = tailTimeout
 
-        if data == b"":
-            return ""
-        return data.decode(encoding=self.console.encoding)
+        if rtt is not None and not fragments:
+            rtt.add_timeout()
+        return data, fragments
 
     def write(self, cmd, maxRetries=None, socketTimeout=None):
         """
@@ -107,31 +652,93 @@ class Rcon:
         :param maxRetries: How many times we have to retry the sending upon failure
         :param socketTimeout: The socket timeout value
         """
-        with self.lock:
-            data = self.send_rcon(
-                self.socket, cmd, maxRetries=maxRetries, socketTimeout=socketTimeout
-            )
+        return self._write(cmd, maxRetries, socketTimeout, b3.tracing.current_trace())
+
+    def _write(self, cmd, maxRetries, socketTimeout, trace):
+        """
+        Write a RCON command on a socket of the pool.
+        :param cmd: The string to be sent
+        :param maxRetries: How many times we have to retry the sending upon failure
+        :param socketTimeout: The socket timeout value
+        :param trace: The b3.tracing.Trace the command is bound to, or None
+        """
+        begin = time.perf_counter()
+        try:
+            data = self._send(cmd, maxRetries, socketTimeout)
+        finally:
+            if trace is not None:
+                trace.add_span("rcon", cmd[:64], begin, time.perf_counter())
         return data or ""
 
+    def _send(self, cmd, maxRetries=None, socketTimeout=None):
+        """
+        Wait for the scheduler to allow a RCON command, then send it on a socket
+        of the pool: no socket is held while waiting.
+        :param cmd: The string to be sent
+        :param maxRetries: How many times we have to retry the sending upon failure
+        :param socketTimeout: The socket timeout value
+        """
+        if (scheduler := self.scheduler) and not scheduler.acquire(scheduler.lane(cmd)):
+            self.console.warning("RCON: send(%s) dropped: too many waiting", cmd)
+            return ""
+        with self._socket() as sock:
+            return self.send_rcon(
+                sock,
+                cmd,
+                maxRetries=maxRetries,
+                socketTimeout=socketTimeout,
+                scheduled=True,
+            )
+
+    def submit(self, cmd, maxRetries=None, socketTimeout=None):
+        """
+        Write a RCON command without waiting for the response.
+        :param cmd: The string to be sent
+        :param maxRetries: How many times we have to retry the sending upon failure
+        :param socketTimeout: The socket timeout value
+        :return: A concurrent.futures.Future resolving to the response
+        """
+        with self.lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_sockets, thread_name_prefix="rcon"
+                )
+        if (trace := b3.tracing.current_trace()) is not None:
+            trace.hold()
+        future = self._executor.submit(
+            self._write, cmd, maxRetries, socketTimeout, trace
+        )
+        if trace is not None:
+            future.add_done_callback(lambda _: trace.release())
+        return future
+
     def writelines(self, lines):
         """
         Enqueue multiple RCON commands for later processing.
         :param lines: A list of RCON commands.
         """
-        self.queue.put(lines)
+        if (trace := b3.tracing.current_trace()) is not None:
+            trace.hold()
+        self.queue.put((lines, trace))
 
     def _writelines(self):
         """
         Write multiple RCON commands on the socket.
         """
-        send_rcon = self.send_rcon
-        sock = self.socket
-        sock_lock = self.lock
-        for lines in iter(self.queue.get, self._stopEvent):
+        send = self._send
+        timer_func = time.perf_counter
+        for lines, trace in iter(self.queue.get, self._stopEvent):
+            if self.pack_length:
+                lines = pack_commands(lines, self.pack_length)
+            # sent one after the other by this thread: the commands keep their order
             for cmd in lines:
                 if cmd:
-                    with sock_lock:
-                        send_rcon(sock, cmd, maxRetries=1)
+                    begin = timer_func()
+                    send(cmd, maxRetries=1)
+                    if trace is not None:
+                        trace.add_span("rcon", cmd[:64], begin, timer_func())
+            if trace is not None:
+                trace.release()
 
     def stop(self):
         """
@@ -142,11 +749,15 @@ class Rcon:
 
     def close(self):
         self.stop()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
         with self.lock:
-            self.socket.close()
+            for sock in self._sockets:
+                sock.close()
 
     def __str__(self):
         return (
-            f"Rcon({self.host}, "
-            f"timeout={self.socket_timeout}, timeout2={self.socket_timeout2})"
+            f"Rcon({self.host}, sockets={self.max_sockets}, "
+            f"timeout={self.socket_timeout}, timeout2={self.socket_timeout2}, "
+            f"adaptive={self.rtt is not None}, scheduler={self.scheduler})"
         )
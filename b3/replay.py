@@ -0,0 +1,305 @@
+import re
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from traceback import extract_tb
+
+import b3.events
+import b3.functions
+
+__version__ = "1.0"
+
+
+class FakeRcon:
+    """
+    Answer RCON commands locally so that a game log can be replayed without
+    a game server. CVARs are kept in memory and updated by the 'set' command,
+    unknown CVARs are reported as being set to 0.
+    """
+
+    socket_timeout = 0.8
+    socket_timeout2 = 0.225
+    max_sockets = 1
+    cvars = {
+        "gamename": "q3urt43",
+        "fs_game": "q3ut4",
+        "g_gametype": "4",
+        "mapname": "ut4_turnpike",
+        "sv_hostname": "B3 replay",
+        "sv_maxclients": "16",
+        "timelimit": "20",
+    }
+    _reCvarName = re.compile(r"^[a-z0-9_.]+$", re.I)
+    _reSet = re.compile(r'^sets?\s+(?P<cvar>[a-z0-9_.]+)\s+"?(?P<value>.*?)"?$', re.I)
+
+    def __init__(self, console, host, password):
+        """
+        Object constructor.
+        :param console: The console implementation
+        :param host: The host where RCON commands would be sent
+        :param password: The RCON password (unused)
+        """
+        self.console = console
+        self.host = host
+        self.cvars = dict(self.cvars)
+        self.commands = 0
+
+    def write(self, cmd, maxRetries=None, socketTimeout=None):
+        """
+        Answer a RCON command.
+        :param cmd: The RCON command
+        :param maxRetries: Unused
+        :param socketTimeout: Unused
+        :return: The response a game server would send back
+        """
+        self.commands += 1
+        cmd = cmd.strip()
+        if cmd == "status":
+            return (
+                f"map: {self.cvars['mapname']}\n"
+                "num score ping name            lastmsg address               qport rate\n"
+                "--- ----- ---- --------------- ------- --------------------- ----- -----\n"
+            )
+        if m := self._reSet.match(cmd):
+            self.cvars[m["cvar"].lower()] = m["value"]
+            return ""
+        if self._reCvarName.match(cmd):
+            return f'"{cmd}" is:"{self.cvars.get(cmd.lower(), "0")}^7"'
+        return ""
+
+    def submit(self, cmd, maxRetries=None, socketTimeout=None):
+        """
+        Answer a RCON command.
+        :param cmd: The RCON command
+        :return: A completed concurrent.futures.Future holding the response
+        """
+        future = Future()
+        future.set_result(self.write(cmd))
+        return future
+
+    def writelines(self, lines):
+        """
+        Answer multiple RCON commands.
+        :param lines: A list of RCON commands
+        """
+        for cmd in lines:
+            if cmd:
+                self.write(cmd)
+
+    def stop(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __str__(self):
+        return f"FakeRcon({self.host})"
+
+
+class LinePacer:
+    """
+    Slow down the replay so that game log lines are parsed at a multiple of
+    the pace they were written at, using the game time prefixing each line.
+    """
+
+    _reGameTime = re.compile(r"^\s*(?P<minutes>\d+):(?P<seconds>\d{2})")
+
+    def __init__(self, speed, clock=time.monotonic, sleep=time.sleep):
+        """
+        Object constructor.
+        :param speed: The replay speed as a multiple of real time (0: no pacing)
+        :param clock: The monotonic clock
+        :param sleep: The function used to wait
+        """
+        self.speed = speed
+        self._clock = clock
+        self._sleep = sleep
+        self._game_start = None
+        self._game_last = None
+        self._wall_start = None
+
+    def wait(self, line):
+        """
+        Block until the given line should be parsed.
+        :param line: The game log line
+        """
+        if self.speed <= 0 or not (m := self._reGameTime.match(line)):
+            return
+        game_time = int(m["minutes"]) * 60 + int(m["seconds"])
+        now = self._clock()
+        if self._game_last is None or game_time < self._game_last:
+            # first line or game time went backwards (new map): start over
+            self._game_start = game_time
+            self._wall_start = now
+        self._game_last = game_time
+        target = self._wall_start + (game_time - self._game_start) / self.speed
+        if target > now:
+            self._sleep(target - now)
+
+
+class ReplayStats(b3.events.EventsStats):
+    """
+    Collect the replay throughput and the time spent in every plugin.
+    """
+
+    def __init__(self, console):
+        super().__init__(console)
+        self.lines = 0
+        self.events = 0
+        self.queue_max = 0
+        self.queue_total = 0
+        self.parse_time = 0.0
+        self.total_time = 0.0
+        # plugin name => [calls, total time, max time]
+        self.plugins = defaultdict(lambda: [0, 0.0, 0.0])
+
+    def add_event_handled(self, plugin_name, event_name, elapsed):
+        super().add_event_handled(plugin_name, event_name, elapsed)
+        timers = self.plugins[plugin_name]
+        timers[0] += 1
+        timers[1] += elapsed
+        timers[2] = max(timers[2], elapsed)
+
+    def add_line(self, queue_depth):
+        """
+        Account for a parsed game log line.
+        :param queue_depth: The event queue size after the line was parsed
+        """
+        self.lines += 1
+        self.queue_total += queue_depth
+        self.queue_max = max(self.queue_max, queue_depth)
+
+    def report(self):
+        """
+        Return the replay report as a list of lines.
+        """
+
+        def per_second(count, elapsed):
+            return count / elapsed if elapsed else 0.0
+
+        lines_per_sec = per_second(self.lines, self.parse_time)
+        events_per_sec = per_second(self.events, self.total_time)
+        mean_depth = self.queue_total / self.lines if self.lines else 0
+        report = [
+            f"Lines   : {self.lines} parsed in {self.parse_time:.2f}s ({lines_per_sec:.0f} lines/sec)",
+            f"Events  : {self.events} handled in {self.total_time:.2f}s ({events_per_sec:.0f} events/sec)",
+            f"Queue   : max depth {self.queue_max}, mean depth {mean_depth:.1f}",
+            "Plugins :",
+        ]
+        for name, (calls, total, worst) in sorted(
+            self.plugins.items(), key=lambda item: item[1][1], reverse=True
+        ):
+            report.append(
+                f"  {name:<24} {calls:>8} calls {total:>9.3f}s total "
+                f"{total / calls * 1000:>8.3f}ms mean {worst * 1000:>8.3f}ms max"
+            )
+        return report
+
+
+class ReplayMixin:
+    """
+    Parser mixin feeding a recorded game log through the parser and the
+    plugins, as fast as possible or at a multiple of real time.
+    """
+
+    OutputClass = FakeRcon
+    replay_file = None
+    replay_speed = 0
+
+    def __init__(self, conf, options):
+        """
+        Object constructor.
+        :param conf: The B3 configuration file
+        :param options: command line options
+        """
+        super().__init__(conf, options)
+        self._eventsStats = ReplayStats(self)
+
+    def _put_event(self, event, expire):
+        """
+        Queue an event, blocking while the queue is full: slow plugins slow
+        down the replay instead of having their events dropped.
+        """
+        current_time = time.time()
+        self.queue.put((current_time, current_time + expire, event), shed=False)
+        self._eventsStats.events += 1
+        return True
+
+    def run(self):
+        """
+        Replay the game log, wait for the events to be handled and print the report.
+        """
+        stats = self._eventsStats
+        pacer = LinePacer(self.replay_speed)
+        parse_line = self.parseLine
+        queue_size = self.queue.qsize
+        timer_func = time.perf_counter
+        tracer = self._tracer
+        trace = None
+
+        self.bot(
+            "Replaying %s (speed: %s)", self.replay_file, self.replay_speed or "max"
+        )
+        start = timer_func()
+        with open(self.replay_file, encoding=self.encoding) as f:
+            for line in f:
+                if not self.working:
+                    break
+                if line := line.strip():
+                    pacer.wait(line)
+                    if tracer:
+                        trace = tracer.sample(line, timer_func())
+                    try:
+                        if trace is None:
+                            parse_line(line)
+                        else:
+                            self._parse_traced_line(trace, line)
+                    except Exception as msg:
+                        self.error(
+                            "Could not parse line %s - (%s) %s",
+                            line,
+                            msg,
+                            extract_tb(sys.exc_info()[2]),
+                        )
+                    stats.add_line(queue_size())
+        stats.parse_time = timer_func() - start
+
+        self.bot("Replay complete: awaiting Event Handling Thread stop")
+        current_time = time.time()
+        self.queue.put((current_time, current_time + 10, self.getEvent("EVT_STOP")))
+        self._event_handling_thread.join()
+        stats.total_time = timer_func() - start
+        self.input.close()
+        if tracer:
+            tracer.close()
+
+        self.screen.write(f"\nReplay of {self.replay_file}\n")
+        for line in stats.report():
+            self.info(line)
+            self.screen.write(f"{line}\n")
+        self.screen.flush()
+        if self.exitcode:
+            sys.exit(self.exitcode)
+
+
+def create_console(config, options):
+    """
+    Create a parser instance replaying a game log.
+    :param config: The B3 configuration file instance b3.config.MainConfig
+    :param options: command line options (game_log, speed)
+    """
+    config.set("server", "game_log", options.game_log)
+    config.set("server", "seek", "yes")
+    config.set("server", "game_log_watch", "poll")
+    config.set("server", "game_log_checkpoint", "")
+    config.set("b3", "database", "sqlite://:memory:")
+    if options.logfile:
+        config.set("b3", "logfile", options.logfile)
+    parser_class = b3.functions.loadParser(config.get("b3", "parser"))
+    replay_class = type(
+        f"Replay{parser_class.__name__}",
+        (ReplayMixin, parser_class),
+        {"replay_file": options.game_log, "replay_speed": options.speed},
+    )
+    return replay_class(config, options)
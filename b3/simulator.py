@@ -0,0 +1,705 @@
+import collections
+import fnmatch
+import heapq
+import itertools
+import random
+import re
+import socket
+import threading
+import time
+
+import b3.functions
+
+__version__ = "1.0"
+
+# weapons as (hit weapon id, kill weapon id, kill weapon name)
+WEAPONS = (
+    (2, 14, "UT_MOD_BERETTA"),
+    (3, 15, "UT_MOD_DEAGLE"),
+    (4, 16, "UT_MOD_SPAS"),
+    (5, 18, "UT_MOD_MP5K"),
+    (6, 17, "UT_MOD_UMP45"),
+    (8, 19, "UT_MOD_LR300"),
+    (9, 20, "UT_MOD_G36"),
+    (14, 28, "UT_MOD_SR8"),
+    (15, 30, "UT_MOD_AK103"),
+    (19, 38, "UT_MOD_M4"),
+)
+
+HIT_LOCATIONS = ("Head", "Helmet", "Torso", "Vest", "Left Arm", "Right Arm")
+
+TEAM_RED = "RED"
+TEAM_BLUE = "BLUE"
+TEAM_SPECTATOR = "SPECTATOR"
+TEAM_FREE = "FREE"
+
+_team_ids = {TEAM_FREE: 0, TEAM_RED: 1, TEAM_BLUE: 2, TEAM_SPECTATOR: 3}
+
+
+class SimulatedPlayer:
+    """
+    A player of the simulated game server.
+    """
+
+    __slots__ = (
+        "assists",
+        "auth",
+        "cid",
+        "deaths",
+        "guid",
+        "ip",
+        "kills",
+        "name",
+        "ping",
+        "port",
+        "qport",
+        "team",
+    )
+
+    def __init__(self, cid, name, guid, ip, port=27960, team=TEAM_SPECTATOR, auth=""):
+        """
+        Object constructor.
+        :param cid: The slot number
+        :param name: The player name
+        :param guid: The player cl_guid
+        :param ip: The player IP address
+        :param port: The player UDP port
+        :param team: The player team (RED, BLUE, SPECTATOR or FREE)
+        :param auth: The player auth login, empty if not authenticated
+        """
+        self.cid = cid
+        self.name = name
+        self.guid = guid
+        self.ip = ip
+        self.port = port
+        self.qport = 1024 + cid
+        self.team = team
+        self.auth = auth
+        self.kills = 0
+        self.deaths = 0
+        self.assists = 0
+        self.ping = 50
+
+    def userinfo(self):
+        """
+        Return the player userinfo as a list of (key, value) pairs.
+        """
+        return [
+            ("ip", f"{self.ip}:{self.port}"),
+            ("name", self.name),
+            ("racered", "2"),
+            ("raceblue", "2"),
+            ("rate", "25000"),
+            ("ut_timenudge", "0"),
+            ("cg_rgb", "255 0 0"),
+            ("cg_predictitems", "0"),
+            ("cg_physics", "1"),
+            ("gear", "GLJAXUA"),
+            ("cl_anonymous", "0"),
+            ("sex", "male"),
+            ("handicap", "100"),
+            ("snaps", "20"),
+            ("teamtask", "0"),
+            ("cl_guid", self.guid),
+            ("authl", self.auth),
+            ("weapmodes", "00000110220000020002"),
+        ]
+
+
+class GameSimulation:
+    """
+    State of a simulated Urban Terror 4.3 game server: players, CVARs and maps.
+    Every change is written to a game log in the format of the real server so
+    that a bot tailing the log sees the players the RCON commands report.
+    """
+
+    command_history = 1000  # number of RCON commands kept in commands
+    maps = (
+        "ut4_abbey",
+        "ut4_casa",
+        "ut4_jumpents",
+        "ut4_kingdom",
+        "ut4_turnpike",
+        "ut4_uptown",
+    )
+    cvars = {
+        "auth_enable": "1",
+        "auth_owners": "",
+        "fs_basepath": "/home/urt/q3ut4",
+        "fs_game": "q3ut4",
+        "fs_homepath": "/home/urt/.q3a",
+        "g_allowvote": "536870914",
+        "g_blueteamlist": "",
+        "g_gametype": "4",
+        "g_gear": "0",
+        "g_matchmode": "0",
+        "g_maxgameclients": "0",
+        "g_redteamlist": "",
+        "gamename": "q3urt43",
+        "mapname": "ut4_turnpike",
+        "sv_hostname": "B3 simulated server",
+        "sv_maxclients": "16",
+        "sv_privateclients": "0",
+        "timelimit": "20",
+    }
+
+    def __init__(self, game_log=None, seed=None, clock=time.monotonic):
+        """
+        Object constructor.
+        :param game_log: The path of the game log to write, None not to write any
+        :param seed: The seed of the random generator driving the simulation
+        :param clock: The monotonic clock giving the game time
+        """
+        self.lock = threading.RLock()
+        self.random = random.Random(seed)  # noqa: S311
+        self.cvars = dict(self.cvars)
+        self.players = {}  # cid => SimulatedPlayer
+        self.commands = collections.deque(
+            maxlen=self.command_history
+        )  # last RCON commands received
+        self.command_count = 0  # RCON commands received
+        self._clock = clock
+        self._game_start = clock()
+        self._log = None
+        if game_log:
+            self._log = open(game_log, "a", encoding="utf-8")  # noqa: SIM115
+
+    ####################################################################################################################
+    #                                                                                                                  #
+    #   GAME LOG                                                                                                       #
+    #                                                                                                                  #
+    ####################################################################################################################
+
+    def log(self, line):
+        """
+        Write a line to the game log, prefixed with the game time.
+        :param line: The game log line
+        """
+        if self._log is None:
+            return
+        elapsed = int(self._clock() - self._game_start)
+        self._log.write(f"{elapsed // 60:3d}:{elapsed % 60:02d} {line}\n")
+        self._log.flush()
+
+    def close(self):
+        """
+        Close the game log.
+        """
+        with self.lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+    def init_game(self, map_name=None):
+        """
+        Start a new game, on a new map if given.
+        :param map_name: The map to load
+        """
+        with self.lock:
+            if map_name:
+                self.cvars["mapname"] = map_name
+            self._game_start = self._clock()
+            for player in self.players.values():
+                player.kills = player.deaths = player.assists = 0
+            keys = ("sv_hostname", "g_gametype", "sv_maxclients", "mapname", "gamename")
+            info = "".join(f"\\{key}\\{self.cvars[key]}" for key in keys)
+            self.log(f"InitGame: {info}")
+
+    def shutdown_game(self):
+        """
+        End the current game.
+        """
+        with self.lock:
+            self.log("ShutdownGame:")
+            self.log("-" * 60)
+
+    def change_map(self, map_name):
+        """
+        Load another map, keeping the connected players.
+        :param map_name: The map to load
+        """
+        with self.lock:
+            self.shutdown_game()
+            self.init_game(map_name)
+            for player in self.players.values():
+                self._log_userinfo_changed(player)
+                self.log(f"ClientBegin: {player.cid}")
+
+    def connect(self, name=None, team=None, guid=None, ip=None, auth=None):
+        """
+        Connect a new player on the first free slot.
+        :param name: The player name, random if not given
+        :param team: The player team, random if not given
+        :param guid: The player cl_guid, random if not given
+        :param ip: The player IP address, random if not given
+        :param auth: The player auth login, random if not given
+        :return: The SimulatedPlayer or None if the server is full
+        """
+        with self.lock:
+            rnd = self.random
+            slots = int(self.cvars["sv_maxclients"])
+            if (
+                cid := next((c for c in range(slots) if c not in self.players), None)
+            ) is None:
+                return None
+            if name is None:
+                name = f"Player{rnd.randrange(10000)}"
+            if team is None:
+                team = rnd.choice((TEAM_RED, TEAM_BLUE))
+            if guid is None:
+                guid = f"{rnd.getrandbits(128):032X}"
+            if ip is None:
+                ip = f"10.{rnd.randrange(256)}.{rnd.randrange(256)}.{rnd.randrange(1, 255)}"
+            if auth is None:
+                auth = f"login{rnd.randrange(10000)}" if rnd.random() < 0.5 else ""
+            player = SimulatedPlayer(cid, name, guid, ip, team=team, auth=auth)
+            player.ping = rnd.randrange(20, 150)
+            self.players[cid] = player
+            self.log(f"ClientConnect: {cid}")
+            userinfo = "".join(f"\\{key}\\{value}" for key, value in player.userinfo())
+            self.log(f"ClientUserinfo: {cid} {userinfo}")
+            self._log_userinfo_changed(player)
+            self.log(f"ClientBegin: {cid}")
+            return player
+
+    def _log_userinfo_changed(self, player):
+        self.log(
+            f"ClientUserinfoChanged: {player.cid} n\\{player.name}\\t\\{_team_ids[player.team]}"
+            "\\r\\1\\tl\\0\\f0\\\\f1\\\\f2\\\\a0\\0\\a1\\0\\a2\\0"
+        )
+
+    def disconnect(self, cid):
+        """
+        Disconnect a player.
+        :param cid: The player slot number
+        :return: The SimulatedPlayer or None if the slot is empty
+        """
+        with self.lock:
+            if (player := self.players.pop(cid, None)) is not None:
+                self.log(f"ClientDisconnect: {cid}")
+            return player
+
+    def set_team(self, cid, team):
+        """
+        Move a player to another team.
+        :param cid: The player slot number
+        :param team: The team (RED, BLUE, SPECTATOR or FREE)
+        """
+        with self.lock:
+            if (player := self.players.get(cid)) is not None:
+                player.team = team
+                self._log_userinfo_changed(player)
+
+    def say(self, cid, text):
+        """
+        Make a player say something in the public chat.
+        :param cid: The player slot number
+        :param text: The chat message
+        """
+        with self.lock:
+            if (player := self.players.get(cid)) is not None:
+                self.log(f"say: {cid} {player.name}: {text}")
+
+    def hit(self, acid, cid, weapon=None, location=None):
+        """
+        Make a player hit another one.
+        :param acid: The attacker slot number
+        :param cid: The victim slot number
+        :param weapon: An entry of WEAPONS, random if not given
+        :param location: The hit location index (1 = head), random if not given
+        """
+        with self.lock:
+            attacker = self.players.get(acid)
+            victim = self.players.get(cid)
+            if attacker is None or victim is None:
+                return
+            weapon = weapon or self.random.choice(WEAPONS)
+            location = location or self.random.randrange(1, len(HIT_LOCATIONS) + 1)
+            self.log(
+                f"Hit: {cid} {acid} {location} {weapon[0]}: "
+                f"{attacker.name} hit {victim.name} in the {HIT_LOCATIONS[location - 1]}"
+            )
+
+    def kill(self, acid, cid, weapon=None):
+        """
+        Make a player kill another one.
+        :param acid: The attacker slot number
+        :param cid: The victim slot number
+        :param weapon: An entry of WEAPONS, random if not given
+        """
+        with self.lock:
+            attacker = self.players.get(acid)
+            victim = self.players.get(cid)
+            if attacker is None or victim is None:
+                return
+            weapon = weapon or self.random.choice(WEAPONS)
+            if attacker is not victim:
+                attacker.kills += 1
+            victim.deaths += 1
+            self.log(
+                f"Kill: {acid} {cid} {weapon[1]}: "
+                f"{attacker.name} killed {victim.name} by {weapon[2]}"
+            )
+
+    def step(self):
+        """
+        Play a random action: mostly hits and kills between the connected players,
+        some chat and, now and then, a player joining or leaving.
+        """
+        with self.lock:
+            rnd = self.random
+            slots = int(self.cvars["sv_maxclients"])
+            roll = rnd.random()
+            if len(self.players) < 2 or (roll < 0.02 and len(self.players) < slots):
+                self.connect()
+                return
+            if roll < 0.03:
+                self.disconnect(rnd.choice(list(self.players)))
+                return
+            acid, cid = rnd.sample(list(self.players), 2)
+            if roll < 0.1:
+                self.say(
+                    acid, rnd.choice(("hi all", "gg", "nice shot", "lol", "!help"))
+                )
+            elif roll < 0.7:
+                self.hit(acid, cid)
+            else:
+                self.kill(acid, cid)
+
+    ####################################################################################################################
+    #                                                                                                                  #
+    #   RCON                                                                                                           #
+    #                                                                                                                  #
+    ####################################################################################################################
+
+    _reSplit = re.compile(r'(?:[^;"]|"[^"]*")+')
+    _reSet = re.compile(
+        r'^(?:set|seta|sets)\s+(?P<cvar>\S+)\s+"?(?P<value>.*?)"?$', re.I
+    )
+
+    def execute(self, cmd):
+        """
+        Answer a RCON command, or several ones separated by semicolons.
+        :param cmd: The RCON command
+        :return: The response text
+        """
+        with self.lock:
+            return "".join(
+                self._execute(part.strip())
+                for part in self._reSplit.findall(cmd)
+                if part.strip()
+            )
+
+    def _execute(self, cmd):
+        self.commands.append(cmd)
+        self.command_count += 1
+        verb, _, args = cmd.partition(" ")
+        verb = verb.lower()
+        args = args.strip()
+        if handler := getattr(self, f"_cmd_{verb.replace('-', '_')}", None):
+            return handler(args)
+        if m := self._reSet.match(cmd):
+            self.cvars[m["cvar"].lower()] = m["value"]
+            return ""
+        if verb in ("say", "tell", "bigtext", "slap", "nuke", "mute", "forceteam"):
+            return ""
+        if not args and (value := self.cvars.get(verb)) is not None:
+            return f'"{verb}" is:"{value}^7" default:"{value}^7"\n'
+        return f'Unknown command "{verb}^7"\n'
+
+    def _cmd_status(self, args):
+        lines = [
+            f"map: {self.cvars['mapname']}",
+            "num score ping name            lastmsg address               qport rate",
+            "--- ----- ---- --------------- ------- --------------------- ----- -----",
+        ]
+        for cid, player in sorted(self.players.items()):
+            address = f"{player.ip}:{player.port}"
+            lines.append(
+                f"{cid:3d} {player.kills:5d} {player.ping:4d} {player.name}^7"
+                f"{' ' * max(1, 16 - len(player.name))}{0:7d} {address:<21} "
+                f"{player.qport:5d} 25000"
+            )
+        return "\n".join(lines) + "\n"
+
+    def _cmd_players(self, args):
+        scores = {TEAM_RED: 0, TEAM_BLUE: 0}
+        for player in self.players.values():
+            if player.team in scores:
+                scores[player.team] += player.kills
+        elapsed = int(self._clock() - self._game_start)
+        lines = [
+            f"Map: {self.cvars['mapname']}",
+            f"Players: {len(self.players)}",
+            "GameType: TS",
+            f"Scores: R:{scores[TEAM_RED]} B:{scores[TEAM_BLUE]}",
+            "MatchMode: OFF",
+            "WarmupPhase: NO",
+            f"GameTime: {elapsed // 3600:02d}:{elapsed // 60 % 60:02d}:{elapsed % 60:02d}",
+        ]
+        for cid, player in sorted(self.players.items()):
+            lines.append(
+                f"{cid}:{player.name} TEAM:{player.team} KILLS:{player.kills} "
+                f"DEATHS:{player.deaths} ASSISTS:{player.assists} PING:{player.ping} "
+                f"AUTH:{player.auth or '---'} IP:{player.ip}:{player.port}"
+            )
+        return "\n".join(lines) + "\n"
+
+    def _player(self, args):
+        try:
+            return self.players.get(int(args))
+        except ValueError:
+            return next((p for p in self.players.values() if p.name == args), None)
+
+    def _cmd_dumpuser(self, args):
+        if (player := self._player(args)) is None:
+            return f"Player {args} is not on the server\n"
+        lines = ["userinfo", "--------"]
+        lines.extend(f"{key:<20}{value}" for key, value in player.userinfo())
+        return "\n".join(lines) + "\n"
+
+    def _cmd_auth_whois(self, args):
+        if (player := self._player(args)) is None:
+            return f"Client {args} is not active.\n"
+        if player.auth:
+            login, notoriety = player.auth, "serious"
+        else:
+            login, notoriety = "", "basic"
+        return (
+            f"auth: id: {player.cid} - name: ^7{player.name} - login: {login} - "
+            f"notoriety: {notoriety} - level: -1\n"
+        )
+
+    def _cmd_cvarlist(self, args):
+        pattern = f"{args.lower()}*"
+        names = [
+            name for name in sorted(self.cvars) if fnmatch.fnmatchcase(name, pattern)
+        ]
+        lines = [f'S R     {name} "{self.cvars[name]}"' for name in names]
+        lines.append(f"{len(names)} total cvars")
+        lines.append(f"{len(self.cvars)} cvar indexes")
+        return "\n".join(lines) + "\n"
+
+    def _cmd_fdir(self, args):
+        files = [f"maps/{name}.bsp" for name in self.maps]
+        files = [f for f in files if fnmatch.fnmatch(f, f"*{args or '*'}")]
+        return (
+            "---------------\n"
+            + "".join(f"{f}\n" for f in files)
+            + f"{len(files)} files listed\n"
+        )
+
+    def _cmd_map(self, args):
+        if args not in self.maps:
+            return f"Can't find map maps/{args}.bsp\n"
+        self.change_map(args)
+        return ""
+
+    def _cmd_cyclemap(self, args):
+        current = self.cvars["mapname"]
+        index = self.maps.index(current) + 1 if current in self.maps else 0
+        self.change_map(self.maps[index % len(self.maps)])
+        return ""
+
+    def _cmd_kick(self, args):
+        if args == "all":
+            for cid in list(self.players):
+                self.disconnect(cid)
+            return ""
+        if (player := self._player(args)) is None:
+            return f"Player {args} is not on the server\n"
+        self.disconnect(player.cid)
+        return ""
+
+    _cmd_clientkick = _cmd_kick
+
+
+class RconServer:
+    """
+    UDP server speaking the Quake 3 RCON protocol in front of a GameSimulation.
+    Responses can be delayed, split into several fragments and lose packets
+    to reproduce the behaviour of a remote game server.
+    """
+
+    header = b"\377\377\377\377"
+    reply_header = b"\377\377\377\377print\n"
+
+    _reRcon = re.compile(
+        rb'^rcon\s+(?:"(?P<qpassword>[^"]*)"|(?P<password>\S+))\s?(?P<cmd>.*)$', re.S
+    )
+
+    def __init__(
+        self,
+        simulation,
+        password,
+        address=("127.0.0.1", 0),
+        latency=0.0,
+        jitter=0.0,
+        loss=0.0,
+        fragment_size=1008,
+        encoding="latin-1",
+        seed=None,
+    ):
+        """
+        Object constructor.
+        :param simulation: The GameSimulation answering the commands
+        :param password: The RCON password
+        :param address: The (host, port) tuple to listen on, port 0 to pick a free one
+        :param latency: The number of seconds each packet is delayed by
+        :param jitter: The maximum number of seconds randomly added to the latency
+        :param loss: The ratio of packets lost, in both directions
+        :param fragment_size: The maximum response size carried by a packet
+        :param encoding: The encoding of the RCON commands and responses
+        :param seed: The seed of the random generator losing and delaying packets
+        """
+        self.simulation = simulation
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.fragment_size = fragment_size
+        self.encoding = encoding
+        self.received = 0  # packets received
+        self.sent = 0  # packets sent
+        self.lost = 0  # packets lost
+        self._random = random.Random(seed)  # noqa: S311
+        self._outbox = []  # heap of (due time, sequence, payload, address)
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        self._stopped = False
+        self.sock = socket.socket(type=socket.SOCK_DGRAM)
+        self.sock.bind(address)
+        self.address = self.sock.getsockname()
+        self._threads = [
+            b3.functions.start_daemon_thread(target=self._serve, name="simulator"),
+            b3.functions.start_daemon_thread(
+                target=self._deliver, name="simulator-out"
+            ),
+        ]
+
+    def _lose(self):
+        if self.loss and self._random.random() < self.loss:
+            self.lost += 1
+            return True
+        return False
+
+    def _delay(self):
+        return self.latency + (
+            self._random.uniform(0, self.jitter) if self.jitter else 0
+        )
+
+    def _serve(self):
+        while True:
+            try:
+                packet, address = self.sock.recvfrom(65536)
+            except OSError:
+                return
+            self.received += 1
+            if not packet.startswith(self.header) or self._lose():
+                continue
+            if not (m := self._reRcon.match(packet[len(self.header) :])):
+                continue
+            password = (
+                m["qpassword"] if m["qpassword"] is not None else m["password"]
+            ).decode(self.encoding)
+            if password != self.password:
+                response = "Bad rconpassword.\n"
+            else:
+                response = self.simulation.execute(
+                    m["cmd"].decode(self.encoding).strip()
+                )
+            self._respond(response.encode(self.encoding), address)
+
+    def _respond(self, response, address):
+        """
+        Queue the fragments of a response, each one with its own delay.
+        :param response: The response bytes
+        :param address: The address of the client
+        """
+        size = self.fragment_size
+        fragments = [response[i : i + size] for i in range(0, len(response), size)] or [
+            b""
+        ]
+        now = time.monotonic()
+        with self._cond:
+            due = now
+            for fragment in fragments:
+                # fragments of a response are never reordered
+                due = max(due, now + self._delay())
+                heapq.heappush(
+                    self._outbox,
+                    (due, next(self._sequence), self.reply_header + fragment, address),
+                )
+            self._cond.notify()
+
+    def _deliver(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (
+                    not self._outbox or self._outbox[0][0] > time.monotonic()
+                ):
+                    timeout = (
+                        self._outbox[0][0] - time.monotonic() if self._outbox else None
+                    )
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                _, _, payload, address = heapq.heappop(self._outbox)
+            if self._lose():
+                continue
+            try:
+                self.sock.sendto(payload, address)
+            except OSError:
+                continue
+            self.sent += 1
+
+    def close(self):
+        """
+        Stop the server.
+        """
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self.sock.close()
+
+
+def run(options):
+    """
+    Run a simulated game server until interrupted.
+    :param options: command line options
+    """
+    simulation = GameSimulation(options.game_log, seed=options.seed)
+    server = RconServer(
+        simulation,
+        options.password,
+        address=(options.host, options.port),
+        latency=options.latency,
+        jitter=options.jitter,
+        loss=options.loss,
+        fragment_size=options.fragment_size,
+        seed=options.seed,
+    )
+    print(f"Listening on     : {server.address[0]}:{server.address[1]}", flush=True)
+    print(f"Writing game log : {options.game_log}", flush=True)
+    simulation.init_game()
+    for _ in range(options.players):
+        simulation.connect()
+    interval = 1.0 / options.rate if options.rate > 0 else None
+    try:
+        while True:
+            if interval is None:
+                time.sleep(1)
+                continue
+            simulation.step()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulation.shutdown_game()
+        server.close()
+        simulation.close()
+        print(
+            f"RCON packets     : {server.received} received, {server.sent} sent, "
+            f"{server.lost} lost, {simulation.command_count} commands",
+            flush=True,
+        )
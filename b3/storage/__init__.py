@@ -26,6 +26,9 @@ class Storage:
     def getClientsMatching(self, match):
         raise NotImplementedError
 
+    def getClientsData(self, guids=(), pbids=()):
+        raise NotImplementedError
+
     def setClient(self, client):
         raise NotImplementedError
 
@@ -59,6 +62,9 @@ class Storage:
     def getClientPenalties(self, client, type="Ban"):
         raise NotImplementedError
 
+    def getClientsPenalties(self, clients, type="Ban"):
+        raise NotImplementedError
+
     def getClientLastPenalty(self, client, type="Ban"):
         raise NotImplementedError
 
@@ -1,3 +1,4 @@
+import copy
 import os
 import re
 import sys
@@ -261,6 +262,18 @@ class QueryBuilder:
         return sql
 
 
+class DatabaseConnection:
+    """
+    Hold the database connection of a storage and of its copies made by
+    DatabaseStorage.share(), so that they all see a reconnection.
+    """
+
+    __slots__ = ("db",)
+
+    def __init__(self):
+        self.db = None
+
+
 class DatabaseStorage(Storage):
     _lastConnectAttempt = 0
     _consoleNotice = True
@@ -277,9 +290,17 @@ class DatabaseStorage(Storage):
         self.dsn = dsn
         self.dsnDict = dsnDict
         self.console = console
-        self.db = None
+        self._connection = DatabaseConnection()
         self._lock = threading.Lock()
 
+    def _get_db(self):
+        return self._connection.db
+
+    def _set_db(self, db):
+        self._connection.db = db
+
+    db = property(_get_db, _set_db)
+
     def connect(self):
         """
         Establish and return a connection with the storage layer.
@@ -287,6 +308,16 @@ class DatabaseStorage(Storage):
         """
         raise NotImplementedError
 
+    def share(self, console):
+        """
+        Return a storage working for another console over the same database connection:
+        connecting or shutting down any of them applies to all.
+        :param console: The console instance.
+        """
+        storage = copy.copy(self)
+        storage.console = console
+        return storage
+
     def getConnection(self):
         """
         Return the database connection. If the connection has not been established yet, will establish a new one.
@@ -376,6 +407,25 @@ class DatabaseStorage(Storage):
 
         return clients
 
+    def getClientsData(self, guids=(), pbids=()):
+        """
+        Return the stored data of the clients having one of the given guids or FSA.
+        All the clients are loaded with a single query, most recently seen first.
+        :param guids: The guids to look for.
+        :param pbids: The FSA to look for.
+        :return: A list of dicts mapping client attribute names to stored values.
+        """
+        match = {k: list(v) for k, v in (("guid", guids), ("pbid", pbids)) if v}
+        if not match:
+            return []
+
+        where = QueryBuilder(self.db).WhereClause(match, concat=" OR ")
+        stmt = QueryBuilder(self.db).SelectQuery(
+            "*", "clients", where, "time_edit DESC"
+        )
+        with self.query(stmt) as cursor:
+            return [{self.getVar(k): v for k, v in row.items()} for row in cursor]
+
     def setClient(self, client):
         """
         Insert/update a client in the storage.
@@ -677,6 +727,33 @@ class DatabaseStorage(Storage):
         with self.query(stmt) as cursor:
             return [self._createPenaltyFromRow(row) for row in cursor]
 
+    def getClientsPenalties(self, clients, type="Ban"):
+        """
+        Return the active penalties of several clients using a single query.
+        :param clients: The clients whose penalties we want to retrieve.
+        :param type: The type of the penalties we want to retrieve.
+        :return: A dict of penalty lists, most recent first, keyed by client id
+        """
+        penalties = {client.id: [] for client in clients if client.id}
+        if not penalties:
+            return penalties
+
+        where = QueryBuilder(self.db).WhereClause(
+            {
+                "type": type,
+                "client_id": list(penalties),
+                "inactive": 0,
+            }
+        )
+        where += f" AND (time_expire = -1 OR time_expire > {int(time())})"
+        stmt = QueryBuilder(self.db).SelectQuery(
+            "*", "penalties", where, "time_add DESC"
+        )
+        with self.query(stmt) as cursor:
+            for row in cursor:
+                penalties[int(row["client_id"])].append(self._createPenaltyFromRow(row))
+        return penalties
+
     def getClientLastPenalty(self, client, type="Ban"):
         """
         Return the last penalty added for the given client.
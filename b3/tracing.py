@@ -0,0 +1,164 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+__version__ = "1.0"
+
+_local = threading.local()
+
+
+def current_trace():
+    """
+    Return the trace active in the current thread, if any.
+    """
+    return getattr(_local, "trace", None)
+
+
+class Trace:
+    """
+    Timings of a sampled game log line, from the moment it was read to the
+    RCON commands sent by the plugins handling the events it produced.
+    Every span is a (stage, name, begin, end) tuple of time.perf_counter values.
+    The trace is complete once every event and RCON command bound to it is done.
+    Use the trace as a context manager to make it the active trace of the thread:
+    events queued and RCON commands sent meanwhile are bound to it.
+    """
+
+    __slots__ = ("line", "pending", "spans", "start", "trace_id", "tracer", "wall_time")
+
+    def __init__(self, tracer, trace_id, line, start):
+        """
+        Object constructor.
+        :param tracer: The Tracer collecting the trace
+        :param trace_id: The trace sequence number
+        :param line: The game log line
+        :param start: The time.perf_counter value at which the line was read
+        """
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.line = line
+        self.start = start
+        self.wall_time = time.time() - (time.perf_counter() - start)
+        self.spans = [("read", "", start, start)]
+        self.pending = 1  # the line itself, released once parsed
+
+    def __enter__(self):
+        _local.trace = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        _local.trace = None
+
+    def add_span(self, stage, name, begin, end):
+        """
+        Record the time spent in a stage.
+        :param stage: The stage (parse, queue, dequeue, handler, rcon)
+        :param name: The event key, plugin name or RCON command
+        :param begin: The time.perf_counter value at the beginning of the stage
+        :param end: The time.perf_counter value at the end of the stage
+        """
+        self.spans.append((stage, name, begin, end))
+
+    def hold(self):
+        """
+        Bind one more event or RCON command to the trace.
+        """
+        with self.tracer.lock:
+            self.pending += 1
+
+    def release(self):
+        """
+        Mark an event or RCON command bound to the trace as done.
+        """
+        with self.tracer.lock:
+            self.pending -= 1
+            if self.pending:
+                return
+        self.tracer.finish(self)
+
+    def to_dict(self):
+        """
+        Return the trace as a dict which can be serialized to JSON (times in milliseconds).
+        """
+        start = self.start
+        spans = [
+            {
+                "stage": stage,
+                "name": name,
+                "start": round((begin - start) * 1000, 3),
+                "duration": round((end - begin) * 1000, 3),
+            }
+            for stage, name, begin, end in sorted(self.spans, key=lambda span: span[2])
+        ]
+        end = max(span[3] for span in self.spans)
+        return {
+            "id": self.trace_id,
+            "time": self.wall_time,
+            "line": self.line,
+            "duration": round((end - start) * 1000, 3),
+            "spans": spans,
+        }
+
+
+class Tracer:
+    """
+    Sample game log lines for tracing, keeping the last complete traces in
+    a ring buffer and optionally appending them to a JSON lines file.
+    """
+
+    def __init__(self, sample_rate, buffer_size=100, path=None):
+        """
+        Object constructor.
+        :param sample_rate: The ratio of game log lines to trace (0 < sample_rate <= 1)
+        :param buffer_size: The number of complete traces to keep in memory
+        :param path: The JSON lines file where complete traces are appended
+        :raise ValueError: If the sample rate is out of bounds
+        """
+        if not 0 < sample_rate <= 1:
+            raise ValueError(f"sample rate must be in ]0, 1]: {sample_rate!r}")
+        self.interval = max(1, round(1 / sample_rate))
+        self.traces = deque(maxlen=buffer_size)
+        self.path = path
+        self.lock = threading.Lock()
+        self._countdown = 1
+        self._ids = itertools.count(1)
+        self._file = None
+        if path:
+            self._file = open(path, "a", encoding="utf-8")  # noqa: SIM115
+
+    def sample(self, line, read_time):
+        """
+        Return a new trace for one game log line every sampling interval.
+        :param line: The game log line
+        :param read_time: The time.perf_counter value at which the line was read
+        :return: A Trace or None if the line is not sampled
+        """
+        self._countdown -= 1
+        if self._countdown:
+            return None
+        self._countdown = self.interval
+        return Trace(self, next(self._ids), line, read_time)
+
+    def finish(self, trace):
+        """
+        Store a complete trace.
+        :param trace: The complete Trace
+        """
+        self.traces.append(trace)
+        if self._file is not None:
+            record = json.dumps(trace.to_dict())
+            with self.lock:
+                if self._file is not None:
+                    self._file.write(record + "\n")
+                    self._file.flush()
+
+    def close(self):
+        """
+        Close the trace file.
+        """
+        with self.lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
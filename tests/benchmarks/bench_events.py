@@ -0,0 +1,51 @@
+"""
+Micro benchmark of the creation of the events produced by the most frequent
+game log lines (hits, kills and chat).
+
+    python -m tests.benchmarks.bench_events [iterations]
+"""
+
+import sys
+import timeit
+import tracemalloc
+
+import b3.events
+from b3.events import Event, eventManager
+
+
+def create_events(count):
+    get_id = eventManager.getId
+    for _ in range(count):
+        Event(get_id("EVT_CLIENT_DAMAGE"), (10, "19", "2"))
+        Event(get_id("EVT_CLIENT_KILL"), (100, "19", "2", "UT_MOD_LR300"))
+        Event(get_id("EVT_CLIENT_SAY"), "hello")
+
+
+def allocations_per_event(count=1000):
+    """
+    Return the number of memory blocks and bytes still allocated per event
+    while the events are alive.
+    """
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(count):
+        kept.append(Event(b3.events.EVT_CLIENT_DAMAGE, None))
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return blocks / count, size / count
+
+
+def main(iterations=100000):
+    elapsed = timeit.timeit(lambda: create_events(iterations), number=1)
+    blocks, size = allocations_per_event()
+    print(f"{iterations * 3} events created in {elapsed:.3f}s")
+    print(f"{elapsed / (iterations * 3) * 1e9:.0f}ns per event")
+    print(f"{blocks:.1f} memory blocks, {size:.0f} bytes per event")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,119 @@
+"""
+Benchmark of Iourt43Parser.parseLine over a game log, with the line formats
+indexed by the leading word of the lines and with the linear scan of all the
+line formats they replaced.
+
+The game log is written by the game simulation (mostly hits and kills, some
+chat, players joining and leaving) unless a recorded one is given.
+
+    python -m tests.benchmarks.bench_parse_lines [steps] [game_log] [runs]
+"""
+
+import io
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from b3.config import CfgConfigParser
+from b3.parsers.iourt43 import Iourt43Parser
+from b3.simulator import GameSimulation
+from tests import logging_disabled
+from tests.fake import FakeConsole
+
+
+class BenchParser(Iourt43Parser, FakeConsole):
+    """
+    Iourt43Parser without game server, storage on disk nor event thread.
+    """
+
+    screen = io.StringIO()
+
+
+def simulated_log(steps):
+    """
+    Return the lines of a simulated game log, with the spawns, item pickups,
+    radio calls and assists the simulation does not write.
+    :param steps: The number of simulation steps (about one line each)
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "games.log")
+        simulation = GameSimulation(game_log=path, seed=1)
+        rnd = simulation.random
+        simulation.init_game()
+        for _ in range(steps):
+            simulation.step()
+            if len(cids := list(simulation.players)) < 3:
+                continue
+            cid, acid, kcid = rnd.sample(cids, 3)
+            roll = rnd.random()
+            if roll < 0.2:
+                simulation.log(f"ClientSpawn: {cid}")
+                for item in ("ut_weapon_lr300", "ut_weapon_beretta", "ut_item_vest"):
+                    simulation.log(f"Item: {cid} {item}")
+            elif roll < 0.3:
+                simulation.log(f'Radio: {cid} - 3 - 4 - "Courtyard" - "Enemy spotted"')
+            elif roll < 0.35:
+                simulation.log(f"Assist: {acid} {kcid} {cid}: A assisted B to kill C")
+        simulation.close()
+        return read_log(path)
+
+
+def read_log(path):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return [line for line in map(str.strip, f) if line]
+
+
+def new_parser(linear):
+    """
+    Create a parser answering RCON commands with a game simulation.
+    :param linear: Whether to try every line format in order for each line
+    """
+    conf = CfgConfigParser()
+    conf.loadFromString("[server]\ngame_log:\n")
+    with logging_disabled():
+        parser = BenchParser(conf)
+    simulation = GameSimulation(seed=1)
+    parser.write = lambda cmd, *args, **kwargs: simulation.execute(cmd)
+    if linear:
+        formats = tuple(enumerate(parser._lineFormats))
+        parser._get_line_formats = lambda word: formats
+    return parser
+
+
+def time_lines(lines, parser, parse):
+    """
+    Return the time taken to parse the lines.
+    :param parse: The name of the parser method parsing a line
+    """
+    parse = getattr(parser, parse)
+    start = time.perf_counter()
+    for line in lines:
+        parse(line)
+    return time.perf_counter() - start
+
+
+def main(steps=5000, game_log=None, runs=5):
+    lines = read_log(game_log) if game_log else simulated_log(int(steps))
+    logging.getLogger("output").setLevel(logging.CRITICAL)
+    best = {}
+    # the runs alternate between both scans so that they share the machine noise
+    for _ in range(int(runs)):
+        for linear in (True, False):
+            for parse in ("getLineParts", "parseLine"):
+                elapsed = time_lines(lines, new_parser(linear), parse)
+                key = linear, parse
+                best[key] = min(best.get(key, elapsed), elapsed)
+    print(f"{len(lines)} lines, best of {runs} runs")
+    for label, linear in (("linear scan", True), ("indexed", False)):
+        parts = len(lines) / best[linear, "getLineParts"]
+        parse = len(lines) / best[linear, "parseLine"]
+        print(
+            f"{label:<12}: getLineParts {parts:>9,.0f} lines/sec, "
+            f"parseLine {parse:>9,.0f} lines/sec"
+        )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -3,7 +3,7 @@ import unittest
 from unittest.mock import ANY, Mock, patch
 
 from b3 import TEAM_BLUE, TEAM_RED, TEAM_UNKNOWN
-from b3.clients import Alias, Client, Group, IpAlias
+from b3.clients import Alias, Client, ClientRecord, Group, IpAlias
 from tests import B3TestCase
 
 
@@ -258,5 +258,81 @@ class Test_Client_events(B3TestCase):
             )
 
 
+class FakeRecord(ClientRecord):
+    __slots__ = ("kills", "points", "victims")
+    defaults = {"kills": 0, "points": 100.0, "victims": list}
+
+
+class Test_ClientRecord(unittest.TestCase):
+    def setUp(self):
+        self.plugin = Mock(clientRecord=FakeRecord)
+        self.plugin.newClientRecord.side_effect = FakeRecord
+        self.client = Client(name="Joe")
+
+    def test_defaults(self):
+        record = FakeRecord(points=50.0)
+        self.assertTupleEqual(("kills", "points", "victims"), FakeRecord.fields)
+        self.assertEqual(0, record.kills)
+        self.assertEqual(50.0, record.points)
+        self.assertIsNot(record.victims, FakeRecord().victims)
+        self.assertFalse(hasattr(record, "__dict__"))
+
+    def test_reset(self):
+        record = FakeRecord()
+        record.kills = 3
+        record.victims.append("bill")
+        record.reset("kills", "victims", points=10.0)
+        self.assertEqual("FakeRecord(kills=0, points=10.0, victims=[])", repr(record))
+
+    def test_isset(self):
+        record = FakeRecord(points=50.0)
+        self.assertFalse(any(record.isset(field) for field in FakeRecord.fields))
+        record.kills += 1
+        record.victims.append("bill")
+        self.assertTrue(record.isset("kills"))
+        self.assertFalse(record.isset("points"))
+        self.assertTrue(record.isset("victims"))
+        record.reset("kills", points=60.0)
+        self.assertFalse(record.isset("kills"))
+        self.assertTrue(record.isset("points"))
+        self.assertEqual(
+            "FakeRecord(kills=0, points=60.0, victims=['bill'])", repr(record)
+        )
+
+    def test_record_is_created_once(self):
+        self.client.record(self.plugin).kills += 2
+        self.client.record(self.plugin).kills += 1
+        self.assertEqual(3, self.client.record(self.plugin).kills)
+        self.plugin.newClientRecord.assert_called_once_with()
+
+    def test_var_shim(self):
+        self.assertFalse(self.client.isvar(self.plugin, "kills"))
+        self.client.var(self.plugin, "kills", 0).value += 1
+        self.assertTrue(self.client.isvar(self.plugin, "kills"))
+        self.assertEqual(1, self.client.record(self.plugin).kills)
+        self.client.setvar(self.plugin, "points", 42.0)
+        self.assertEqual(42.0, self.client.record(self.plugin).points)
+        self.assertEqual(42, self.client.var(self.plugin, "points").toInt())
+        self.client.delvar(self.plugin, "points")
+        self.assertEqual(100.0, self.client.record(self.plugin).points)
+
+    def test_var_shim_field_not_set(self):
+        self.client.record(self.plugin).kills += 1
+        self.assertTrue(self.client.isvar(self.plugin, "kills"))
+        self.assertFalse(self.client.isvar(self.plugin, "points"))
+        self.assertEqual(5.0, self.client.var(self.plugin, "points", 5.0).value)
+        self.assertTrue(self.client.isvar(self.plugin, "points"))
+        self.assertEqual(1, self.client.var(self.plugin, "kills", 5).value)
+        self.assertListEqual([], self.client.var(self.plugin, "victims").value)
+        self.client.delvar(self.plugin, "points")
+        self.assertFalse(self.client.isvar(self.plugin, "points"))
+        self.assertEqual(100.0, self.client.var(self.plugin, "points").value)
+
+    def test_var_not_declared_in_record(self):
+        self.client.setvar(self.plugin, "other", "foo")
+        self.assertEqual("foo", self.client.var(self.plugin, "other").value)
+        self.assertTrue(self.client.isvar(self.plugin, "other"))
+
+
 if __name__ == "__main__":
     unittest.main()
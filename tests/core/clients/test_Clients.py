@@ -1,8 +1,11 @@
-from unittest.mock import Mock, patch
+import random
+import threading
+import unittest
+from unittest.mock import ANY, Mock, patch
 
 import b3
 import b3.events
-from b3.clients import Client, Clients
+from b3.clients import Client, ClientBan, Clients, SubstringIndex
 from tests import B3TestCase
 
 
@@ -98,3 +101,264 @@ class TestClients(B3TestCase):
         Event_mock.assert_called_once_with(
             b3.events.EVT_CLIENT_DISCONNECT, 1, joe, None
         )
+
+    def test_indexes_follow_changes(self):
+        joe = self.clients[1]
+        joe.name = "joseph"
+        joe.pbid = "joe_login"
+        joe.ip = "1.2.3.4:27960"
+        self.assertIsNone(self.clients.getByName("joe"))
+        self.assertIs(joe, self.clients.getByName("JOSEPH"))
+        self.assertIs(joe, self.clients.getByExactName("joseph"))
+        self.assertIs(joe, self.clients.getByGUID("JOE_GUID"))
+        self.assertIs(joe, self.clients.getByPBID("joe_login"))
+        self.assertListEqual([joe], self.clients.getByIP("1.2.3.4"))
+        joe.disconnect()
+        self.assertIsNone(self.clients.getByName("joseph"))
+        self.assertIsNone(self.clients.getByGUID("joe_guid"))
+        self.assertIsNone(self.clients.getByPBID("joe_login"))
+        self.assertListEqual([], self.clients.getByIP("1.2.3.4"))
+        self.assertDictEqual({}, self.clients._pbidIndex)
+
+    def test_indexes_with_shared_values(self):
+        self.clients[1].ip = "1.2.3.4"
+        self.clients[2].ip = "1.2.3.4"
+        joe2 = self.clients.newClient(3, name="joe", guid="joe2_guid")
+        self.assertListEqual([1, 2], [c.cid for c in self.clients.getByIP("1.2.3.4")])
+        self.clients[1].disconnect()
+        self.assertIs(joe2, self.clients.getByName("joe"))
+
+    def test_lookup_checks_the_attribute(self):
+        joe = self.clients[1]
+        # the index is updated right after the attribute changed
+        with patch.object(Client, "_reindex"):
+            joe.name = "joseph"
+            joe.ip = "1.2.3.4"
+        self.assertIsNone(self.clients.getByName("joe"))
+        self.assertListEqual([], self.clients.getByIP(joe.ip))
+
+    def test_indexes_changed_from_several_threads(self):
+        def rename(cid):
+            client = self.clients[cid]
+            for i in range(200):
+                client.name = f"name{i % 7}"
+                client.pbid = f"pbid{i % 5}"
+                self.clients.getByName(f"name{i % 3}")
+
+        self.clients.newClient(3, name="bill", guid="bill_guid")
+        threads = [threading.Thread(target=rename, args=(cid,)) for cid in (1, 2, 3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        def indexes():
+            return [
+                {key: sorted(cids) for key, cids in index.items()}
+                for index in (self.clients._nameIndex, self.clients._pbidIndex)
+            ]
+
+        built = indexes()
+        self.clients.resetIndex()
+        self.assertListEqual(indexes(), built)
+
+    def test_clients_not_connected_are_not_indexed(self):
+        client = Client(console=self.console, cid=1, name="ghost", guid="ghost_guid")
+        client.name = "ghost2"
+        self.assertIsNone(self.clients.getByName("ghost2"))
+        self.assertIs(self.clients[1], self.clients.getByName("joe"))
+
+    def test_getByGUID_fuzzy(self):
+        guid = "8982B13A8DCEE4C77A32E6AC4DD7EEDF"
+        client = self.clients.newClient(3, name="bill", guid=guid)
+        self.assertIs(client, self.clients.getByGUID(guid.lower()))
+        self.assertIs(client, self.clients.getByGUID(guid[:-1]))
+        self.assertIsNone(self.clients.getByGUID(guid[:-2]))
+        self.assertIsNone(self.clients.getByGUID("joe_guix"))
+
+    def test_resetIndex(self):
+        bill = Client(console=self.console, cid=3, name="bill", guid="bill_guid")
+        dict.__setitem__(self.clients, 3, bill)
+        self.assertIsNone(self.clients.getByName("bill"))
+        self.clients.resetIndex()
+        self.assertIs(bill, self.clients.getByName("bill"))
+        self.assertIs(self.clients[1], self.clients.getByName("joe"))
+
+    def test_getByMagic_matches_names_and_pbids_in_slot_order(self):
+        self.clients.newClient(3, name="Joey", guid="joey_guid", pbid="zorro")
+        self.clients.newClient(4, name="Mr X", guid="x_guid", pbid="joe_login")
+        self.clients[2].name = "joe junior"
+        self.assertListEqual(
+            [1, 2, 3, 4], [c.cid for c in self.clients.getByMagic("jo e")]
+        )
+        self.assertListEqual([4], [c.cid for c in self.clients.getByMagic("login")])
+        self.assertListEqual(
+            [1, 2, 3], [c.cid for c in self.clients.getClientsByName("JOE")]
+        )
+        self.clients[3].hide = True
+        self.assertListEqual([2], [c.cid for c in self.clients.getClientsByName("jun")])
+        self.assertListEqual([], self.clients.getByMagic("zorro"))
+
+    def test_getClientLikeName_keeps_whitespaces(self):
+        self.assertIsNone(self.clients.getClientLikeName("hax"))
+        self.assertIs(self.clients[2], self.clients.getClientLikeName("x\t0"))
+
+    def test_name_searches_match_a_linear_scan(self):
+        rnd = random.Random(42)  # noqa: S311
+        for cid in range(3, 40):
+            name = "".join(rnd.choice("ab c") for _ in range(rnd.randrange(1, 8)))
+            self.clients.newClient(cid, name=name, guid=f"guid{cid}")
+        for cid in range(3, 40, 3):
+            self.clients[cid].name = "".join(rnd.choice("abc") for _ in range(4))
+        for needle in ("a", "b c", "abc", "ca b", "aaaa", "cba", "", "z"):
+            expected = [
+                c
+                for c in self.clients.values()
+                if needle.replace(" ", "") in c.name.lower().replace(" ", "")
+            ]
+            self.assertListEqual(expected, self.clients.getClientsByName(needle))
+
+
+class TestClientsAuthorize(B3TestCase):
+    def setUp(self):
+        B3TestCase.setUp(self)
+        self.clients = self.console.clients
+        self.storage = self.console.storage
+        self.bill = Client(
+            console=self.console, guid="bill_guid", name="bill", connections=1
+        )
+        self.bill.save()
+        ClientBan(clientId=self.bill.id, adminId=0, timeExpire=-1, reason="cheat").save(
+            self.console
+        )
+        self.jack = Client(console=self.console, guid="jack_old_guid", pbid="jack")
+        self.jack.save()
+        self.console.ban = Mock()
+
+    def test_newClient_auth_is_immediate(self):
+        client = self.clients.newClient(1, name="joe", guid="joe_guid")
+        self.assertTrue(client.authed)
+        self.assertFalse(self.clients.authDeferred)
+
+    def test_deferAuth(self):
+        self.console.queryClientsFrozenSandAccount = Mock(
+            return_value={2: {"login": "jack"}}
+        )
+        with (
+            patch.object(self.storage, "getClient") as getClient,
+            patch.object(self.storage, "numPenalties") as numPenalties,
+            self.clients.deferAuth(),
+        ):
+            joe = self.clients.newClient(1, name="joe", guid="joe_guid", pbid="joe")
+            jack = self.clients.newClient(2, name="jack", guid="jack_old_guid")
+            with self.clients.deferAuth():
+                bill = self.clients.newClient(3, name="bill", guid="bill_guid")
+            self.assertTrue(self.clients.authDeferred)
+            self.assertFalse(any(c.authed for c in (joe, jack, bill)))
+        self.assertFalse(self.clients.authDeferred)
+        self.console.queryClientsFrozenSandAccount.assert_called_once_with([2, 3])
+        getClient.assert_not_called()
+        numPenalties.assert_not_called()
+        self.assertTrue(all(c.authed for c in (joe, jack, bill)))
+        self.assertEqual(self.jack.id, jack.id)
+        self.assertEqual(self.bill.id, bill.id)
+        self.assertEqual(2, bill.connections)
+        self.assertEqual(1, joe.connections)
+        self.console.ban.assert_called_once_with(bill, "cheat", None, True)
+
+    def test_authorize_keeps_the_guid_of_the_fsa_entry(self):
+        Client(console=self.console, guid="jack_new_guid").save()
+        jack = self.clients.newClient(
+            2, name="jack", guid="jack_new_guid", pbid="jack", authed=True
+        )
+        jack.authed = False
+        self.clients.authorize([jack])
+        self.assertTrue(jack.authed)
+        self.assertEqual(self.jack.id, jack.id)
+        self.assertEqual("jack_old_guid", jack.guid)
+        self.assertIs(jack, self.clients.getByGUID("jack_old_guid"))
+        self.assertIsNone(self.clients.getByGUID("jack_new_guid"))
+
+    def test_authorize_skips_settled_clients(self):
+        joe = self.clients.newClient(1, name="joe", guid="joe_guid")
+        joe.authed = False
+        disconnected = Client(console=self.console, cid=5, guid="guid5")
+        with patch.object(self.storage, "getClientsData") as getClientsData:
+            self.clients.authorize([self.clients[1], disconnected])
+            getClientsData.assert_called_once()
+            joe.authorizing = True
+            joe.authed = False
+            self.clients.authorize([joe])
+            getClientsData.assert_called_once()
+        self.assertFalse(disconnected.authed)
+
+    def test_authorize_falls_back_on_auth(self):
+        with self.clients.deferAuth():
+            bill = self.clients.newClient(3, name="bill", guid="bill_guid")
+            self.storage.getClientsData = Mock(side_effect=Exception("db is gone"))
+        self.assertTrue(bill.authed)
+        self.assertEqual(self.bill.id, bill.id)
+        self.console.ban.assert_called_once_with(bill, "cheat", None, True)
+
+    def test_authorize_bans_failure_queries_each_client(self):
+        self.storage.getClientsPenalties = Mock(side_effect=Exception("db is gone"))
+        with self.clients.deferAuth():
+            bill = self.clients.newClient(3, name="bill", guid="bill_guid")
+        self.console.ban.assert_called_once_with(bill, "cheat", None, True)
+
+    def test_authorize_row_failure_falls_back_on_auth(self):
+        getClientsData = self.storage.getClientsData
+
+        def badRows(**kwargs):
+            rows = getClientsData(**kwargs)
+            for row in rows:
+                if row["guid"] == "bill_guid":
+                    row["timeAdd"] = "not a time"
+            return rows
+
+        self.storage.getClientsData = Mock(side_effect=badRows)
+        with patch.object(self.console, "error") as error, self.clients.deferAuth():
+            bill = self.clients.newClient(3, name="billy", guid="bill_guid")
+            jack = self.clients.newClient(2, name="jack", guid="jack_old_guid")
+        self.assertTrue(bill.authed)
+        self.assertFalse(bill.authorizing)
+        self.assertEqual(self.bill.id, bill.id)
+        self.assertEqual("billy", bill.name)
+        self.console.ban.assert_called_once_with(bill, "cheat", None, True)
+        error.assert_called_once_with("Batch auth of %s failed", 3, exc_info=ANY)
+        self.assertTrue(jack.authed)
+        self.assertEqual(self.jack.id, jack.id)
+
+    def test_authorize_failure_resets_authorizing(self):
+        self.storage.getClientsData = Mock(return_value=[None])
+        with self.clients.deferAuth():
+            bill = self.clients.newClient(3, name="bill", guid="bill_guid")
+            jack = self.clients.newClient(2, name="jack", guid="jack_old_guid")
+        self.assertFalse(any(c.authorizing or c.authed for c in (bill, jack)))
+
+    def test_deferAuth_keeps_the_exception_of_the_block(self):
+        with (
+            patch.object(self.clients, "authorize", side_effect=Exception("boom")),
+            self.assertRaises(ValueError),
+            self.clients.deferAuth(),
+        ):
+            self.clients.newClient(3, name="bill", guid="bill_guid")
+            raise ValueError
+
+
+class TestSubstringIndex(unittest.TestCase):
+    def test_search(self):
+        index = SubstringIndex()
+        index.add(1, "courgette")
+        index.add(2, "bill")
+        index.add(3, "")
+        self.assertSetEqual({1}, index.search("urge"))
+        self.assertSetEqual({1, 2}, index.search("l") | index.search("e"))
+        self.assertSetEqual({1, 2, 3}, index.search(""))
+        self.assertSetEqual(set(), index.search("tteg"))
+        index.add(1, "bob")
+        self.assertSetEqual(set(), index.search("urge"))
+        self.assertSetEqual({1, 2}, index.search("b"))
+        index.remove(2)
+        index.remove(2)
+        self.assertSetEqual({1}, index.search("b"))
@@ -1,5 +1,6 @@
 import logging
 import unittest
+from concurrent.futures import Future
 from unittest.mock import Mock, call, patch
 
 from mockito import any as anything
@@ -11,6 +12,7 @@ from b3.config import CfgConfigParser
 from b3.events import Event
 from b3.output import VERBOSE2
 from b3.parsers.iourt43 import Iourt43Parser
+from b3.plugin import Plugin
 from tests import InstantTimer, logging_disabled
 from tests.fake import FakeClient
 
@@ -695,6 +697,185 @@ class Test_kill_mods(Test_log_lines_parsing):
         assert_mod("48", "UT_MOD_GOOMBA")
 
 
+class Test_line_handlers(Test_log_lines_parsing):
+    def test_method_handler(self):
+        self.assertEqual(self.console.OnHit, self.console.getLineHandler("hit"))
+
+    def test_multiple_words_action(self):
+        self.assertEqual(
+            self.console.OnFlagReturn, self.console.getLineHandler("flag return")
+        )
+
+    def test_event_map_handler(self):
+        self.assertEqual(
+            self.console.getEventID("EVT_GAME_FLAG_HOTPOTATO"),
+            self.console.getLineHandler("hotpotato"),
+        )
+
+    def test_unknown_action(self):
+        self.assertIsNone(self.console.getLineHandler("foo"))
+
+    def test_handler_added_at_runtime(self):
+        self.assertIsNone(self.console.getLineHandler("foo"))
+        self.console.OnFoo = Mock(return_value=None)
+        self.console.parseLine("0:01 Foo: bar")
+        self.console.OnFoo.assert_called_once()
+
+    def test_unknown_action_not_cached(self):
+        self.console.getLineHandler("hit")
+        self.assertIsNone(self.console.getLineHandler("foo"))
+        self.assertIn("hit", self.console._line_handlers)
+        self.assertNotIn("foo", self.console._line_handlers)
+        self.assertIsNone(Iourt43Parser._line_handlers)
+
+    def test_register_line_handler_replaces_method(self):
+        self.console.getLineHandler("hit")
+        handler = Mock(return_value=None)
+        self.console.registerLineHandler("hit", handler)
+        self.console.parseLine("0:01 Hit: 1 0 1 8: Joe hit Bill in the Head")
+        handler.assert_called_once()
+
+    def test_register_line_handler_callable(self):
+        handler = Mock(return_value=None)
+        self.console.registerLineHandler("bar", handler)
+        self.console.parseLine("0:01 Bar: baz")
+        handler.assert_called_once()
+
+    def test_register_line_handler_event(self):
+        self.console.registerLineHandler("foo", "EVT_GAME_WARMUP")
+        self.assertEvent(
+            "0:01 Foo: bar", event_type="EVT_GAME_WARMUP", event_data="bar"
+        )
+        self.assertNotIn("foo", Iourt43Parser._eventMap)
+
+
+class DamageBatchPlugin(Plugin):
+    def __init__(self, console, config=None):
+        Plugin.__init__(self, console, config=config)
+        self.batches = []
+
+    def onDamageBatch(self, event):
+        self.batches.append(event)
+
+
+class Test_damage_batches(Iourt43TestCase):
+    def setUp(self):
+        Iourt43TestCase.setUp(self)
+        self.console.startup()
+        self.parser_conf.set("server", "damage_batch_window", "5")
+        self.console.load_conf_damage_batch_window()
+        timer_patcher = patch("threading.Timer")
+        self.timer = timer_patcher.start()
+        self.addCleanup(timer_patcher.stop)
+        plugin = DamageBatchPlugin(self.console, CfgConfigParser())
+        plugin.registerEvent("EVT_CLIENT_DAMAGE_BATCH", plugin.onDamageBatch)
+        self.batches = plugin.batches
+        self.joe = FakeClient(self.console, name="Joe", guid="joeguid")
+        self.joe.connects("3")
+        self.mike = FakeClient(self.console, name="Mike", guid="mikeguid")
+        self.mike.connects("6")
+
+    def test_disabled_by_default(self):
+        self.parser_conf.remove_option("server", "damage_batch_window")
+        self.console.load_conf_damage_batch_window()
+        self.assertEqual(0, self.console.damage_batch_window)
+        self.console.parseLine("0:01 Hit: 6 3 5 8: Joe hit Mike in the Torso")
+        self.console.parseLine("0:01 ShutdownGame:")
+        self.assertListEqual([], self.batches)
+
+    def test_hits_coalesced_until_kill(self):
+        self.console.parseLine("0:01 Hit: 6 3 5 8: Joe hit Mike in the Torso")
+        self.console.parseLine("0:01 Hit: 6 3 1 8: Joe hit Mike in the Head")
+        self.assertListEqual([], self.batches)
+        self.console.parseLine("0:02 Kill: 3 6 19: Joe killed Mike by UT_MOD_LR300")
+        self.assertEqual(1, len(self.batches))
+        batch = self.batches[0]
+        self.assertEqual("EVT_CLIENT_DAMAGE_BATCH", batch.key)
+        self.assertEqual(self.joe, batch.client)
+        self.assertEqual(self.mike, batch.target)
+        self.assertEqual((17 + 100, "19", 2, ("5", "1")), batch.data)
+
+    def test_flushed_on_round_end(self):
+        self.console.parseLine("0:01 Hit: 6 3 5 8: Joe hit Mike in the Torso")
+        self.console.parseLine("0:01 Hit: 3 6 5 8: Mike hit Joe in the Torso")
+        self.console.parseLine("0:02 ShutdownGame:")
+        self.assertEqual(2, len(self.batches))
+
+    def test_flushed_by_timer(self):
+        self.console.parseLine("0:01 Hit: 6 3 5 8: Joe hit Mike in the Torso")
+        self.console.parseLine("0:01 Hit: 6 3 1 8: Joe hit Mike in the Head")
+        self.timer.assert_called_once_with(
+            5.0, self.console._flush_expired_damage_batches
+        )
+        self.timer.return_value.start.assert_called_once_with()
+        # the timer fires before the window is over: it is armed again
+        self.console._flush_expired_damage_batches()
+        self.assertListEqual([], self.batches)
+        self.assertEqual(2, self.timer.call_count)
+        self.console._damage_coalescer.window = 0
+        self.console._flush_expired_damage_batches()
+        self.assertEqual(1, len(self.batches))
+        self.assertEqual((17 + 100, "19", 2, ("5", "1")), self.batches[0].data)
+        self.assertEqual(2, self.timer.call_count)
+
+    def test_flushed_after_window(self):
+        self.console.parseLine("0:01 Hit: 6 3 5 8: Joe hit Mike in the Torso")
+        self.console._damage_coalescer.window = 0
+        self.console.parseLine("0:01 Hit: 3 6 5 8: Mike hit Joe in the Torso")
+        self.assertEqual(1, len(self.batches))
+        self.assertEqual(self.joe, self.batches[0].client)
+
+
+class Test_getLineParts(Iourt43TestCase):
+    lines = (
+        "0:01 Hit: 12 7 1 19: BSTHanzo[FR] hit ercan in the Helmet",
+        "0:01 Item: 4 ut_weapon_glock",
+        "0:01 ClientBegin: 4",
+        "0:01 ClientUserinfoChanged: 4 n\\pibul\\t\\1",
+        "0:01 ClientUserinfo: 2 \\ip\\11.181.55.130:27960",
+        "0:01 Flag: 2 2: team_CTF_blueflag",
+        "0:01 Flag Return: RED",
+        "0:01 say: 6 ^5Marcel ^2[^6CZARMY^2]: !help",
+        "0:01 sayteam: 9 Rev: np",
+        "0:01 saytell: 15 16 repelSteeltje: nno",
+        "0:01 Session data initialised for client on slot 0 at 123456",
+        "0:01 ShutdownGame:",
+        "0:01 InitRound: \\sv_allowdownload\\0",
+        "0:01 Bombholder is 2",
+        "0:01 Bomb was defused by 3!",
+        "0:01 Pop!",
+        "0:01 red:12 blue:8",
+        "0:01 ClientSavePosition: 0 - 335.384887 - 67.469154 - -23.875000",
+        "0:01 Freeze: 0 1 16: Fenix froze Biddle by UT_MOD_SPAS",
+        "0:01 Hotpotato:",
+        "0:01 Exit: Timelimit hit.",
+    )
+
+    def linear_scan(self, line):
+        line = self.console._lineClear.sub("", line, 1)
+        for f in self.console._lineFormats:
+            if m := f.match(line):
+                return m.re
+
+    def test_same_match_as_linear_scan(self):
+        for line in self.lines:
+            match, _, _ = self.console.getLineParts(line)
+            self.assertIs(self.linear_scan(line), match.re, line)
+
+    def test_no_match(self):
+        self.assertEqual(
+            (None, None, None), self.console.getLineParts("0:01 ------------")
+        )
+
+    def test_line_formats_counter(self):
+        self.console._line_formats_counter.clear()
+        self.console.getLineParts("0:01 Hit: 12 7 1 19: A hit B in the Helmet")
+        self.console.getLineParts("0:01 Hit: 12 7 1 19: A hit B in the Helmet")
+        self.console.getLineParts("0:01 Flag Return: RED")
+        self.assertEqual(2, self.console._line_formats_counter[0])
+        self.assertEqual(1, self.console._line_formats_counter[10])
+
+
 class Test_OnClientuserinfo(Iourt43TestCase):
     def setUp(self):
         super().setUp()
@@ -871,6 +1052,47 @@ class Test_queryClientFrozenSandAccount(Iourt43TestCase):
             data,
         )
 
+    def test_query_several_clients(self):
+        # GIVEN
+        replies = {
+            "auth-whois 0": "auth: id: 0 - name: ^7laCourge - login: courgette - notoriety: serious - level: -1\n",
+            "auth-whois 3": "Client 3 is not active.",
+        }
+
+        def write_async(cmd):
+            future = Future()
+            future.set_result(replies[cmd])
+            return future
+
+        self.console.write_async = Mock(side_effect=write_async)
+        # WHEN
+        data = self.console.queryClientsFrozenSandAccount(["0", "3"])
+        # THEN
+        self.assertListEqual(
+            [call("auth-whois 0"), call("auth-whois 3")],
+            self.console.write_async.mock_calls,
+        )
+        self.assertEqual("courgette", data["0"]["login"])
+        self.assertDictEqual({}, data["3"])
+
+    def test_deferred_client_is_queried_on_authorization(self):
+        # GIVEN
+        self.console.queryClientFrozenSandAccount = Mock(return_value={})
+        self.console.queryClientsFrozenSandAccount = Mock(
+            return_value={"2": {"login": "lacourge"}}
+        )
+        infoline = r"""2 \ip\11.22.33.44:27961\name\laCourge\cl_guid\00000000011111111122222223333333"""
+        # WHEN
+        with self.console.clients.deferAuth():
+            self.console.OnClientuserinfo(action=None, data=infoline)
+            self.assertFalse(self.console.clients["2"].authed)
+        # THEN
+        client = self.console.clients["2"]
+        self.assertTrue(client.authed)
+        self.assertEqual("lacourge", client.pbid)
+        self.assertEqual(0, self.console.queryClientFrozenSandAccount.call_count)
+        self.console.queryClientsFrozenSandAccount.assert_called_once_with(["2"])
+
 
 class Test_auth_without_FSA(Iourt43TestCase):
     def setUp(self):
@@ -1273,7 +1495,7 @@ auth: id: 0 - name: ^7laCourge - login: courgette - notoriety: serious - level:
 
     def test_getMap(self):
         # GIVEN
-        when(self.console).write("status").thenReturn(
+        when(self.console).write("status", maxRetries=anything()).thenReturn(
             """\
 map: ut4_casa
 num score ping name            lastmsg address               qport rate
@@ -1329,7 +1551,7 @@ maps/ut4_foo.bsp
 
     def test_getPlayerPings(self):
         # GIVEN
-        when(self.console).write("status").thenReturn(
+        when(self.console).write("status", maxRetries=anything()).thenReturn(
             """\
 map: ut4_casa
 num score ping name            lastmsg address               qport rate
@@ -1345,7 +1567,7 @@ num score ping name            lastmsg address               qport rate
 
     def test_getPlayerScores(self):
         # GIVEN
-        when(self.console).write("status").thenReturn(
+        when(self.console).write("status", maxRetries=anything()).thenReturn(
             """\
 map: ut4_casa
 num score ping name            lastmsg address               qport rate
@@ -1360,6 +1582,73 @@ num score ping name            lastmsg address               qport rate
         self.assertDictEqual({"4": 11, "5": 25}, rv)
 
 
+class Test_status_cache(Iourt43TestCase):
+    status = """\
+map: ut4_casa
+num score ping name            lastmsg address               qport rate
+--- ----- ---- --------------- ------- --------------------- ----- -----
+  4    11  141 theName^7              0 11.22.33.44:27961     38410  8000
+"""
+
+    def setUp(self):
+        Iourt43TestCase.setUp(self)
+        self.console._rcon_cache.ttl = 60
+        when(self.output_mock).write("status", maxRetries=anything()).thenReturn(
+            self.status
+        )
+
+    def status_queries(self):
+        return self.console.write.mock_calls.count(call("status", maxRetries=None))
+
+    def test_shared(self):
+        self.assertEqual("ut4_casa", self.console.getMap())
+        self.assertListEqual(["4"], list(self.console.getPlayerList()))
+        self.assertDictEqual({"4": 141}, self.console.getPlayerPings())
+        self.assertDictEqual({"4": 11}, self.console.getPlayerScores())
+        self.assertEqual(1, self.status_queries())
+
+    def test_refresh(self):
+        self.console.getMap()
+        self.console.getMap(refresh=True)
+        self.assertEqual(2, self.status_queries())
+
+    def test_result_copied(self):
+        self.console.getPlayerList()["4"]["name"] = "changed"
+        self.assertEqual("theName^7", self.console.getPlayerList()["4"]["name"])
+
+    def test_invalidated_on_disconnect(self):
+        self.console.getMap()
+        self.console.parseLine("ClientDisconnect: 4")
+        self.console.getMap()
+        self.assertEqual(2, self.status_queries())
+
+    def test_invalidated_on_connect(self):
+        self.assertDictEqual({"4": 141}, self.console.getPlayerPings())
+        when(self.output_mock).write("status", maxRetries=anything()).thenReturn(
+            self.status
+            + "  5    0   48 theName2^7             0 11.22.33.45:27961     38410  8000\n"
+        )
+        self.console.parseLine("ClientConnect: 5")
+        self.assertDictEqual({"4": 141, "5": 48}, self.console.getPlayerPings())
+        self.assertEqual(2, self.status_queries())
+
+    def test_invalidated_on_userinfo_and_begin(self):
+        for line in (
+            r"ClientUserinfo: 4 \ip\11.22.33.44:27961\name\theName\cl_guid\AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA",
+            "ClientBegin: 4",
+        ):
+            self.console.getMap()
+            self.console.parseLine(line)
+        self.console.getMap()
+        self.assertEqual(3, self.status_queries())
+
+    def test_no_response_not_cached(self):
+        when(self.output_mock).write("status", maxRetries=anything()).thenReturn("")
+        self.assertIsNone(self.console.getMap())
+        self.assertDictEqual({}, self.console.getPlayerList())
+        self.assertEqual(2, self.status_queries())
+
+
 class Test_inflictCustomPenalty(Iourt43TestCase):
     """
     Called if b3.admin.penalizeClient() does not know a given penalty type.
@@ -140,6 +140,20 @@ class StorageAPITest:
         self.assertEqual(1, len(result))
         self.assertEqual("jack", result[0].name)
 
+    def test_getClientsData(self):
+        self.storage.setClient(Client(guid="aaaaaaaaaa", pbid="bill", name="bill"))
+        self.storage.setClient(Client(guid="bbbbbbbbbb", pbid="john", name="john"))
+        self.storage.setClient(Client(guid="cccccccccc", pbid="jack", name="jack"))
+
+        self.assertListEqual([], self.storage.getClientsData())
+        self.assertListEqual([], self.storage.getClientsData(["xxxxxxxxxx"]))
+
+        result = self.storage.getClientsData(["aaaaaaaaaa"], ["jack", "nobody"])
+        self.assertSetEqual({"bill", "jack"}, {row["name"] for row in result})
+        bill = next(row for row in result if row["name"] == "bill")
+        self.assertEqual("aaaaaaaaaa", bill["guid"])
+        self.assertIn("timeEdit", bill)
+
     # def test_getClientsMatching_no_db(self):
     #     when(self.storage).query(ANY()).thenRaise(KeyError())
     #     self.assertRaises(KeyError, self.storage.getClientsMatching, {'guid': "xxxxxxxxxx"})
@@ -507,6 +521,34 @@ class StorageAPITest:
         # when(self.storage).query(ANY()).thenRaise(KeyError())
         # self.assertRaises(KeyError, self.storage.getClientPenalties, c1)
 
+    def test_getClientsPenalties(self):
+        joe = Mock(id=15)
+        bill = Mock(id=16)
+        jack = Mock(id=17)
+        for clientId, timeAdd, type, timeExpire in (
+            (15, 2, "Ban", -1),
+            (15, 4, "TempBan", -1),
+            (15, 5, "Kick", -1),
+            (16, 3, "TempBan", 10),
+            (18, 1, "Ban", -1),
+        ):
+            self.storage.setClientPenalty(
+                Penalty(
+                    clientId=clientId,
+                    adminId=0,
+                    timeAdd=timeAdd,
+                    timeExpire=timeExpire,
+                    type=type,
+                )
+            )
+
+        result = self.storage.getClientsPenalties([joe, bill, jack], ("Ban", "TempBan"))
+        self.assertListEqual([15, 16, 17], sorted(result))
+        self.assertListEqual([4, 2], [p.timeAdd for p in result[15]])
+        self.assertListEqual([], result[16])  # expired
+        self.assertListEqual([], result[17])
+        self.assertDictEqual({}, self.storage.getClientsPenalties([Mock(id=0)]))
+
     def test_getClientLastPenalty(self):
         client = Mock()
         client.id = 15
@@ -0,0 +1,103 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+from b3.cache import SingleFlightCache
+
+
+class Test_SingleFlightCache(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = SingleFlightCache(ttl=1.0, clock=lambda: self.now)
+        self.loader = Mock(return_value="value")
+
+    def test_hit(self):
+        self.assertEqual("value", self.cache.get("key", self.loader))
+        self.assertEqual("value", self.cache.get("key", self.loader))
+        self.assertEqual(1, self.loader.call_count)
+        self.assertEqual(1, self.cache.hits)
+
+    def test_expired(self):
+        self.cache.get("key", self.loader)
+        self.now = 1.0
+        self.cache.get("key", self.loader)
+        self.assertEqual(2, self.loader.call_count)
+
+    def test_refresh(self):
+        self.cache.get("key", self.loader)
+        self.cache.get("key", self.loader, refresh=True)
+        self.assertEqual(2, self.loader.call_count)
+
+    def test_no_ttl(self):
+        self.cache.ttl = 0
+        self.cache.get("key", self.loader)
+        self.cache.get("key", self.loader)
+        self.assertEqual(2, self.loader.call_count)
+
+    def test_none_not_cached(self):
+        self.loader.return_value = None
+        self.assertIsNone(self.cache.get("key", self.loader))
+        self.cache.get("key", self.loader)
+        self.assertEqual(2, self.loader.call_count)
+
+    def test_error(self):
+        self.loader.side_effect = OSError("timeout")
+        self.assertRaises(OSError, self.cache.get, "key", self.loader)
+        self.loader.side_effect = None
+        self.assertEqual("value", self.cache.get("key", self.loader))
+
+    def test_invalidate(self):
+        self.cache.get("key", self.loader)
+        self.cache.get("other", self.loader)
+        self.cache.invalidate("key")
+        self.cache.get("key", self.loader)
+        self.cache.get("other", self.loader)
+        self.assertEqual(3, self.loader.call_count)
+        self.cache.invalidate()
+        self.cache.get("other", self.loader)
+        self.assertEqual(4, self.loader.call_count)
+
+    def test_single_flight(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def load():
+            started.set()
+            release.wait(5)
+            return "value"
+
+        loader = Mock(side_effect=load)
+        results = []
+        leader = threading.Thread(
+            target=lambda: results.append(self.cache.get("key", loader))
+        )
+        leader.start()
+        started.wait(5)
+        followers = [
+            threading.Thread(
+                target=lambda: results.append(self.cache.get("key", loader))
+            )
+            for _ in range(3)
+        ]
+        for thread in followers:
+            thread.start()
+        while self.cache.shared < 3:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join(5)
+        self.assertListEqual(["value"] * 4, results)
+        self.assertEqual(1, loader.call_count)
+
+    def test_invalidated_during_load(self):
+        def load():
+            self.cache.invalidate()
+            return "value"
+
+        self.assertEqual("value", self.cache.get("key", load))
+        self.assertEqual("value", self.cache.get("key", self.loader))
+        self.assertEqual(1, self.loader.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
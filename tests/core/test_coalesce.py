@@ -0,0 +1,66 @@
+import unittest
+from unittest.mock import Mock
+
+from b3.coalesce import DamageCoalescer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Test_DamageCoalescer(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.coalescer = DamageCoalescer(2, clock=self.clock)
+        self.joe = Mock(cid="1")
+        self.mike = Mock(cid="2")
+        self.bill = Mock(cid="3")
+
+    def test_hits_aggregated(self):
+        self.coalescer.add(self.joe, self.mike, "19", 17, "5")
+        self.coalescer.add(self.joe, self.mike, "19", 100, "1")
+        self.coalescer.add(self.joe, self.mike, "20", 30, "5")
+        self.assertEqual(2, len(self.coalescer))
+        batch, other = self.coalescer.flush()
+        self.assertIs(self.joe, batch.attacker)
+        self.assertIs(self.mike, batch.victim)
+        self.assertTupleEqual((117, "19", 2, ("5", "1")), batch.data)
+        self.assertTupleEqual((30, "20", 1, ("5",)), other.data)
+        self.assertEqual(0, len(self.coalescer))
+
+    def test_points_capped_per_hit(self):
+        self.coalescer.add(self.joe, self.mike, "19", 150, "1")
+        self.coalescer.add(self.joe, self.mike, "19", 20, "5")
+        (batch,) = self.coalescer.flush()
+        self.assertEqual(120, batch.points)
+
+    def test_expired(self):
+        self.coalescer.add(self.joe, self.mike, "19", 17, "5")
+        self.clock.now = 1
+        self.coalescer.add(self.mike, self.joe, "19", 17, "5")
+        self.assertListEqual([], self.coalescer.expired())
+        self.clock.now = 2
+        (batch,) = self.coalescer.expired()
+        self.assertIs(self.joe, batch.attacker)
+        self.clock.now = 3
+        (batch,) = self.coalescer.expired()
+        self.assertIs(self.mike, batch.attacker)
+
+    def test_flush_client(self):
+        self.coalescer.add(self.joe, self.mike, "19", 17, "5")
+        self.coalescer.add(self.mike, self.bill, "19", 17, "5")
+        self.coalescer.add(self.joe, self.bill, "19", 17, "5")
+        batches = self.coalescer.flush("2")
+        self.assertListEqual(
+            [(self.joe, self.mike), (self.mike, self.bill)],
+            [(batch.attacker, batch.victim) for batch in batches],
+        )
+        self.assertEqual(1, len(self.coalescer))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import threading
+import unittest
+from unittest.mock import Mock
+
+from b3.dispatch import OrderedExecutor
+
+
+class Test_OrderedExecutor(unittest.TestCase):
+    def setUp(self):
+        self.console = Mock()
+        self.executor = OrderedExecutor(4, name="test_worker", console=self.console)
+
+    def tearDown(self):
+        self.executor.stop(timeout=1.0)
+
+    def test_same_key_keeps_order(self):
+        handled = []
+        for i in range(200):
+            self.executor.submit((("client", i % 3),), handled.append, (i % 3, i))
+        self.assertTrue(self.executor.wait_idle(timeout=5.0))
+        self.assertEqual(200, len(handled))
+        for key in range(3):
+            per_key = [i for k, i in handled if k == key]
+            self.assertListEqual(sorted(per_key), per_key)
+
+    def test_distinct_keys_run_in_parallel(self):
+        barrier = threading.Barrier(2, timeout=5.0)
+        self.executor.submit((("client", 1),), barrier.wait)
+        self.executor.submit((("client", 2),), barrier.wait)
+        self.assertTrue(self.executor.wait_idle(timeout=5.0))
+        self.assertFalse(barrier.broken)
+        self.assertFalse(self.console.error.called)
+
+    def test_task_waits_for_every_key(self):
+        release = threading.Event()
+        handled = []
+        self.executor.submit((("client", 1),), release.wait, 5.0)
+        self.executor.submit((("client", 2),), handled.append, "victim")
+        self.executor.submit((("client", 1), ("client", 2)), handled.append, "kill")
+        self.executor.submit((("client", 2),), handled.append, "after")
+        self.assertFalse(self.executor.wait_idle(timeout=0.2))
+        self.assertListEqual(["victim"], handled)
+        release.set()
+        self.assertTrue(self.executor.wait_idle(timeout=5.0))
+        self.assertListEqual(["victim", "kill", "after"], handled)
+
+    def test_failing_task(self):
+        handled = []
+
+        def fail():
+            raise ValueError("f00")
+
+        self.executor.submit((("client", 1),), fail)
+        self.executor.submit((("client", 1),), handled.append, 1)
+        self.assertTrue(self.executor.wait_idle(timeout=5.0))
+        self.assertListEqual([1], handled)
+        self.assertTrue(self.console.error.called)
+        self.assertEqual(0, self.executor.pending)
+
+
+if __name__ == "__main__":
+    unittest.main()
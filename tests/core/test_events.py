@@ -0,0 +1,202 @@
+import json
+import os
+import queue
+import tempfile
+import unittest
+from unittest.mock import Mock
+
+from b3.events import (
+    PRIORITY_HIGH,
+    PRIORITY_LAST,
+    PRIORITY_LOW,
+    Event,
+    EventQueue,
+    Events,
+    EventsStats,
+    eventManager,
+)
+from b3.tracing import Tracer
+
+SAY = eventManager.getId("EVT_CLIENT_SAY")
+KILL = eventManager.getId("EVT_CLIENT_KILL")
+DAMAGE = eventManager.getId("EVT_CLIENT_DAMAGE")
+STOP = eventManager.getId("EVT_STOP")
+
+
+class Test_EventQueue(unittest.TestCase):
+    def setUp(self):
+        self.queue = EventQueue(
+            3, {SAY: PRIORITY_HIGH, DAMAGE: PRIORITY_LOW, STOP: PRIORITY_LAST}
+        )
+
+    def put(self, event_type, **kwargs):
+        return self.queue.put((0, 10, Event(event_type, None)), **kwargs)
+
+    def get_types(self):
+        types = []
+        while not self.queue.empty():
+            types.append(self.queue.get()[2].type)
+        return types
+
+    def test_served_in_queue_order(self):
+        self.put(DAMAGE)
+        self.put(KILL)
+        self.put(SAY)
+        self.assertListEqual([DAMAGE, KILL, SAY], self.get_types())
+
+    def test_client_events_served_in_order(self):
+        joe, bill = Mock(), Mock()
+        event_queue = EventQueue(4, self.queue.priorities)
+        events = [
+            Event(KILL, (100, "19", "2", "UT_MOD_LR300"), bill, joe),
+            Event(DAMAGE, (10, "19", "2"), joe, bill),
+            Event(KILL, (100, "19", "2", "UT_MOD_LR300"), joe, bill),
+            Event(SAY, "gg", bill),
+        ]
+        for event in events:
+            event_queue.put((0, 10, event))
+        self.assertTrue(event_queue.full())
+        self.assertListEqual(events, [event_queue.get()[2] for _ in events])
+
+    def test_fifo_within_priority(self):
+        events = [Event(KILL, n) for n in range(3)]
+        for event in events:
+            self.queue.put((0, 10, event))
+        self.assertListEqual(events, [self.queue.get()[2] for _ in events])
+
+    def test_low_priority_dropped_when_full(self):
+        for event_type in (KILL, KILL, DAMAGE):
+            self.assertTrue(self.put(event_type))
+        self.assertFalse(self.put(DAMAGE))
+        self.assertEqual(3, self.queue.qsize())
+        self.assertDictEqual({"EVT_CLIENT_DAMAGE": 1}, dict(self.queue.dropped))
+
+    def test_sheds_lower_priority(self):
+        for event_type in (DAMAGE, KILL, DAMAGE):
+            self.put(event_type)
+        self.assertTrue(self.put(SAY))
+        self.assertTrue(self.put(KILL))
+        self.assertListEqual([KILL, SAY, KILL], self.get_types())
+        self.assertDictEqual({"EVT_CLIENT_DAMAGE": 2}, dict(self.queue.dropped))
+
+    def test_shed_releases_trace(self):
+        tracer = Tracer(1)
+        trace = tracer.sample("line", 0.0)
+        event = Event(DAMAGE, None)
+        event.trace = trace
+        trace.hold()
+        self.queue.put((0, 10, event))
+        trace.release()  # the game log line is done
+        for event_type in (KILL, KILL):
+            self.put(event_type)
+        self.assertListEqual([], list(tracer.traces))
+        self.assertTrue(self.put(SAY))
+        self.assertListEqual([trace], list(tracer.traces))
+        self.assertListEqual([KILL, KILL, SAY], self.get_types())
+
+    def test_last_never_dropped(self):
+        for event_type in (SAY, SAY, STOP):
+            self.put(event_type)
+        self.assertRaises(queue.Full, self.put, KILL, timeout=0.01)
+        self.assertEqual(1, self.queue.delayed)
+        self.assertDictEqual({"EVT_CLIENT_KILL": 1}, dict(self.queue.dropped))
+        self.assertListEqual([SAY, SAY, STOP], self.get_types())
+
+    def test_last_served_in_queue_order(self):
+        self.put(DAMAGE)
+        self.put(STOP)
+        self.put(KILL)
+        self.assertListEqual([DAMAGE, STOP, KILL], self.get_types())
+
+    def test_no_shedding(self):
+        for _ in range(3):
+            self.put(DAMAGE)
+        self.assertRaises(queue.Full, self.put, DAMAGE, block=False, shed=False)
+        self.assertEqual(0, self.queue.delayed)
+
+    def test_get_timeout(self):
+        self.assertRaises(queue.Empty, self.queue.get, timeout=0.01)
+        self.assertRaises(queue.Empty, self.queue.get, block=False)
+
+    def test_dump_stats(self):
+        console = Mock()
+        self.queue.add_expired(Event(KILL, None))
+        self.queue.dump_stats(console)
+        console.info.assert_any_call(
+            "Event queue: %s %s %s", "expired", 1, "EVT_CLIENT_KILL"
+        )
+
+
+class Test_Events(unittest.TestCase):
+    def setUp(self):
+        self.events = Events()
+
+    def test_getId(self):
+        event_id = self.events.getId("EVT_CLIENT_SAY")
+        self.assertEqual(SAY, event_id)
+        self.assertEqual(event_id, self.events.getId(event_id))
+        self.assertEqual(event_id, self.events.getId(str(event_id)))
+        self.assertIsNone(self.events.getId("EVT_F00"))
+        self.assertIsNone(self.events.getId(None))
+        self.assertIsNone(self.events.getId(["EVT_CLIENT_SAY"]))
+
+    def test_getKey(self):
+        self.assertEqual("EVT_CLIENT_SAY", self.events.getKey(SAY))
+        self.assertRaises(KeyError, self.events.getKey, 12345)
+
+    def test_createEvent(self):
+        event_id = self.events.createEvent("EVT_CUSTOM_TEST", "Custom test")
+        self.assertEqual(event_id, self.events.getId("EVT_CUSTOM_TEST"))
+        self.assertEqual("EVT_CUSTOM_TEST", self.events.getKey(event_id))
+        self.assertEqual("Custom test", self.events.getName("EVT_CUSTOM_TEST"))
+
+
+class Test_Event(unittest.TestCase):
+    def test_key(self):
+        self.assertEqual("EVT_CLIENT_KILL", Event(KILL, None).key)
+
+    def test_slots(self):
+        event = Event(KILL, None)
+        self.assertFalse(hasattr(event, "__dict__"))
+        with self.assertRaises(AttributeError):
+            event.foo = "bar"
+
+
+class Test_EventsStats(unittest.TestCase):
+    def setUp(self):
+        self.console = Mock()
+        self.stats = EventsStats(self.console)
+        self.stats.add_event_handled("StatsPlugin", "EVT_CLIENT_KILL", 0.002)
+        self.stats.add_event_handled("StatsPlugin", "EVT_CLIENT_KILL", 0.004)
+        self.stats.add_event_wait("EVT_CLIENT_KILL", 0.5)
+
+    def test_handling_stats(self):
+        ((plugin_name, event_name, histogram),) = self.stats.handling_stats()
+        self.assertEqual("StatsPlugin", plugin_name)
+        self.assertEqual("EVT_CLIENT_KILL", event_name)
+        self.assertEqual(2, histogram.count)
+        self.assertEqual(0.004, histogram.max)
+
+    def test_waiting_stats(self):
+        ((event_name, histogram),) = self.stats.waiting_stats()
+        self.assertEqual("EVT_CLIENT_KILL", event_name)
+        self.assertEqual(1, histogram.count)
+
+    def test_write(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "events_stats.json")
+            self.stats.write(path)
+            with open(path) as f:
+                data = json.load(f)
+        kill_stats = data["handling"]["StatsPlugin"]["EVT_CLIENT_KILL"]
+        self.assertEqual(2, kill_stats["count"])
+        self.assertEqual(0.004, kill_stats["max"])
+        self.assertEqual(1, data["waiting"]["EVT_CLIENT_KILL"]["count"])
+
+    def test_dump_stats(self):
+        self.stats.dump_stats()
+        self.assertEqual(3, self.console.info.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from b3.gamelog import (
+    BackoffWatcher,
+    GameLog,
+    PollWatcher,
+    _load_libc,
+    load_checkpoint,
+    save_checkpoint,
+)
+
+
+class GameLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "games.log")
+        self.write("0:00 InitGame: \\sv_hostname\\test\n")
+        self.console = Mock()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def write(self, text, mode="a"):
+        with open(self.path, mode) as f:
+            f.write(text)
+
+    def gamelog(self, **kwargs):
+        log = GameLog(self.console, self.path, **kwargs)
+        self.addCleanup(log.close)
+        return log
+
+
+class Test_GameLog(GameLogTestCase):
+    def test_seek_end(self):
+        log = self.gamelog()
+        self.assertListEqual([], log.readlines())
+        self.write("0:01 Warmup:\n")
+        self.assertListEqual(["0:01 Warmup:\n"], log.readlines())
+
+    def test_read_from_start(self):
+        log = self.gamelog(seek_end=False)
+        self.assertListEqual(["0:00 InitGame: \\sv_hostname\\test\n"], log.readlines())
+
+    def test_partial_line(self):
+        log = self.gamelog()
+        self.write("0:01 Kill: 0 1 16: a killed")
+        self.assertListEqual([], log.readlines())
+        self.write(" b by UT_MOD_SPAS\n0:02 Warm")
+        self.assertListEqual(
+            ["0:01 Kill: 0 1 16: a killed b by UT_MOD_SPAS\n"], log.readlines()
+        )
+
+    def test_truncated(self):
+        log = self.gamelog()
+        self.write("0:01 Warmup:\n", mode="w")
+        self.assertListEqual(["0:01 Warmup:\n"], log.readlines())
+        self.assertEqual(1, log.rotations)
+
+    def test_rotated(self):
+        log = self.gamelog()
+        self.write("0:01 Exit: Timelimit hit.\n")
+        os.rename(self.path, self.path + ".1")
+        self.write("0:00 InitGame: \\sv_hostname\\new\n", mode="w")
+        self.assertListEqual(["0:01 Exit: Timelimit hit.\n"], log.readlines())
+        self.assertListEqual(["0:00 InitGame: \\sv_hostname\\new\n"], log.readlines())
+        self.assertEqual(1, log.rotations)
+
+    def test_rotated_not_recreated(self):
+        log = self.gamelog()
+        os.rename(self.path, self.path + ".1")
+        self.assertListEqual([], log.readlines())
+
+    def test_unknown_watch_mode(self):
+        log = self.gamelog(watch="f00")
+        self.assertIsInstance(log.watcher, PollWatcher)
+        self.assertTrue(self.console.warning.called)
+
+    def test_backoff_watch_mode(self):
+        log = self.gamelog(watch="backoff")
+        self.assertIsInstance(log.watcher, BackoffWatcher)
+
+
+class Test_BackoffWatcher(unittest.TestCase):
+    def test_backoff(self):
+        watcher = BackoffWatcher(delay=0.04)
+        watcher.wait(had_lines=False)
+        self.assertEqual(0.02, watcher._current)
+        watcher.wait(had_lines=False)
+        watcher.wait(had_lines=False)
+        self.assertEqual(0.04, watcher._current)
+        watcher.wait(had_lines=True)
+        self.assertEqual(watcher.min_delay, watcher._current)
+
+
+@unittest.skipUnless(_load_libc(), "inotify not available")
+class Test_InotifyWatcher(GameLogTestCase):
+    def test_woken_up_by_write(self):
+        log = self.gamelog(watch="inotify", delay=5)
+        self.assertEqual("inotify", log.watcher.name)
+        timer = threading.Timer(0.1, self.write, ("0:01 Warmup:\n",))
+        timer.start()
+        start = time.monotonic()
+        log.wait(had_lines=False)
+        timer.join()
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertListEqual(["0:01 Warmup:\n"], log.readlines())
+
+    def test_timeout(self):
+        log = self.gamelog(watch="inotify", delay=0.05)
+        log.wait(had_lines=False)
+        self.assertListEqual([], log.readlines())
+
+
+class Test_checkpoint(GameLogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.checkpoint_path = os.path.join(self.tmpdir, "game_log.checkpoint")
+
+    def test_resume(self):
+        log = self.gamelog()
+        self.write("0:01 Warmup:\n0:02 Kill: 0 1 16: a killed")
+        log.readlines()
+        save_checkpoint(self.checkpoint_path, log.checkpoint())
+        log.close()
+        self.write(" b by UT_MOD_SPAS\n")
+
+        log = self.gamelog()
+        self.assertTrue(log.resume(load_checkpoint(self.checkpoint_path)))
+        self.assertListEqual(
+            ["0:02 Kill: 0 1 16: a killed b by UT_MOD_SPAS\n"], log.readlines()
+        )
+
+    def test_resume_rotated(self):
+        log = self.gamelog()
+        save_checkpoint(self.checkpoint_path, log.checkpoint())
+        log.close()
+        os.rename(self.path, self.path + ".1")
+        self.write("0:00 InitGame: \\sv_hostname\\new\n", mode="w")
+
+        log = self.gamelog()
+        self.assertFalse(log.resume(load_checkpoint(self.checkpoint_path)))
+
+    def test_resume_truncated(self):
+        log = self.gamelog()
+        save_checkpoint(self.checkpoint_path, log.checkpoint())
+        log.close()
+        self.write("", mode="w")
+
+        log = self.gamelog()
+        self.assertFalse(log.resume(load_checkpoint(self.checkpoint_path)))
+
+    def test_load_missing(self):
+        self.assertIsNone(load_checkpoint(self.checkpoint_path))
+
+    def test_load_invalid(self):
+        with open(self.checkpoint_path, "w") as f:
+            f.write("f00")
+        self.assertIsNone(load_checkpoint(self.checkpoint_path))
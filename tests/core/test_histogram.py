@@ -0,0 +1,62 @@
+import random
+import unittest
+
+from b3.histogram import LatencyHistogram
+
+
+class Test_LatencyHistogram(unittest.TestCase):
+    def setUp(self):
+        self.histogram = LatencyHistogram()
+
+    def test_empty(self):
+        self.assertEqual(0, self.histogram.count)
+        self.assertEqual(0.0, self.histogram.percentile(99))
+        self.assertEqual(0.0, self.histogram.mean)
+
+    def test_bucket_bounds(self):
+        self.assertAlmostEqual(0.000001, LatencyHistogram.bucket_upper_bound(0))
+        self.assertAlmostEqual(0.000001125, LatencyHistogram.bucket_upper_bound(1))
+        self.assertAlmostEqual(0.000002, LatencyHistogram.bucket_upper_bound(8))
+        self.assertAlmostEqual(0.0000025, LatencyHistogram.bucket_upper_bound(10))
+
+    def test_record(self):
+        for seconds in (0.0000005, 0.0000015, 0.001, 1000.0):
+            self.histogram.record(seconds)
+        self.assertEqual(4, self.histogram.count)
+        self.assertEqual(1000.0, self.histogram.max)
+        self.assertEqual(1, self.histogram.buckets[0])
+        self.assertEqual(1, self.histogram.buckets[5])
+        self.assertEqual(1, self.histogram.buckets[-1])
+
+    def test_percentiles_relative_error(self):
+        rng = random.Random(42)  # noqa: S311
+        samples = sorted(rng.lognormvariate(-7, 1.5) for _ in range(10000))
+        for seconds in samples:
+            self.histogram.record(seconds)
+        for percent in (50, 95, 99):
+            exact = samples[int(len(samples) * percent / 100) - 1]
+            estimate = self.histogram.percentile(percent)
+            self.assertGreaterEqual(estimate, exact)
+            self.assertLessEqual(estimate, exact * 1.125)
+        self.assertEqual(samples[-1], self.histogram.percentile(100))
+
+    def test_merge(self):
+        other = LatencyHistogram()
+        self.histogram.record(0.001)
+        other.record(0.002)
+        other.record(0.003)
+        self.histogram.merge(other)
+        self.assertEqual(3, self.histogram.count)
+        self.assertEqual(0.003, self.histogram.max)
+        self.assertAlmostEqual(0.002, self.histogram.mean)
+
+    def test_summary(self):
+        self.histogram.record(0.001)
+        self.assertSetEqual(
+            {"count", "mean", "p50", "p95", "p99", "max"},
+            set(self.histogram.summary()),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
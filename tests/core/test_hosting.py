@@ -0,0 +1,128 @@
+import unittest
+from unittest.mock import Mock, patch
+
+import b3
+import b3.functions
+from b3.clients import Client
+from b3.config import CfgConfigParser
+from b3.cron import CronTab
+from b3.hosting import ConsoleCron, ServerHost, SharedServices
+
+
+class Test_ConsoleCron(unittest.TestCase):
+    def setUp(self):
+        self.shared = SharedServices(screen=Mock())
+        with patch("b3.cron.Cron.start"):
+            self.cron1 = self.shared.get_cron(Mock())
+            self.cron2 = self.shared.get_cron(Mock())
+
+    def test_shared_scheduler(self):
+        self.assertIsInstance(self.cron1, ConsoleCron)
+        self.assertIs(self.cron1._cron, self.cron2._cron)
+
+    def test_entries(self):
+        tab1 = CronTab(Mock())
+        tab2 = CronTab(Mock())
+        self.cron1 + tab1
+        self.cron2.add(tab2)
+        self.assertListEqual([tab1], self.cron1.entries())
+        self.assertListEqual([tab1, tab2], self.cron1._cron.entries())
+
+    def test_cancel(self):
+        tab = CronTab(Mock())
+        self.cron1 + tab
+        self.cron1 - tab
+        self.assertListEqual([], self.cron1._cron.entries())
+
+    def test_stop(self):
+        tab1 = CronTab(Mock())
+        tab2 = CronTab(Mock())
+        self.cron1 + tab1
+        self.cron2 + tab2
+        self.cron1.stop()
+        self.assertListEqual([tab2], self.cron1._cron.entries())
+
+
+class Test_SharedServices(unittest.TestCase):
+    def setUp(self):
+        self.shared = SharedServices(screen=Mock())
+        self.console1 = Mock(config=CfgConfigParser())
+        self.console1.config.loadFromString("[admins_cache]\nabc: 1, joe, 100\n")
+        self.console1.config.fileName = "/etc/b3/server1.ini"
+        self.console2 = Mock(config=CfgConfigParser())
+        self.console2.config.loadFromString("[admins_cache]\nabc: 2, bill, 80\n")
+        self.console2.config.fileName = "/opt/b3/server2.ini"
+
+    def tearDown(self):
+        self.shared.shutdown()
+        b3.confdir = None
+
+    def test_storage_shared_by_dsn(self):
+        storage1 = self.shared.get_storage(self.console1, "sqlite://:memory:")
+        storage2 = self.shared.get_storage(self.console2, "sqlite://:memory:")
+        self.assertIsNot(storage1, storage2)
+        self.assertIs(storage1.db, storage2.db)
+        self.assertIs(self.console1, storage1.console)
+        self.assertIs(self.console2, storage2.console)
+        storage1.setClient(Client(guid="def", name="jack"))
+        self.assertEqual("jack", storage2.getClient(Client(guid="def")).name)
+        self.shared.shutdown()
+        self.assertIsNone(storage2.db)
+
+    def test_storage_reconnection_shared(self):
+        storage1 = self.shared.get_storage(self.console1, "sqlite://:memory:")
+        storage2 = self.shared.get_storage(self.console2, "sqlite://:memory:")
+        storage2.shutdown()
+        self.assertIsNone(storage1.db)
+        storage2.getConnection()
+        self.assertIs(storage2.db, storage1.db)
+        storage1.setClient(Client(guid="def", name="jack"))
+        self.assertEqual("jack", storage2.getClient(Client(guid="def")).name)
+
+    def test_storage_admins_cache_per_console(self):
+        storage1 = self.shared.get_storage(self.console1, "sqlite://:memory:")
+        storage2 = self.shared.get_storage(self.console2, "sqlite://:memory:")
+        self.assertEqual("joe", storage1.getClient(Client(guid="abc")).name)
+        self.assertEqual("bill", storage2.getClient(Client(guid="abc")).name)
+
+    def test_startup_confdir(self):
+        with self.shared.startup(self.console1.config):
+            path1 = b3.functions.getAbsolutePath("@conf/plugin_admin.ini")
+        with self.shared.startup(self.console2.config):
+            path2 = b3.functions.getAbsolutePath("@conf/plugin_admin.ini")
+        self.assertEqual("/etc/b3/plugin_admin.ini", path1)
+        self.assertEqual("/opt/b3/plugin_admin.ini", path2)
+
+
+class Test_ServerHost(unittest.TestCase):
+    def setUp(self):
+        self.config1 = Mock(fileName="/etc/b3/server1.ini")
+        self.config2 = Mock(fileName="/opt/b3/server1.ini")
+        self.host = ServerHost([self.config1, self.config2], options=Mock())
+
+    def test_server_names(self):
+        self.assertListEqual(["server1", "server1#2"], list(self.host.servers))
+
+    def test_serve(self):
+        console = Mock(exitcode=None)
+        self.host.create_console = Mock(return_value=console)
+        self.host.serve("server1", self.config1)
+        console.start.assert_called_once_with()
+        self.assertDictEqual({"server1": None}, self.host.exitcodes)
+
+    def test_serve_restart(self):
+        consoles = [Mock(exitcode=4), Mock(exitcode=0)]
+        self.host.create_console = Mock(side_effect=consoles)
+        self.host.serve("server1", self.config1)
+        self.assertEqual(2, self.host.create_console.call_count)
+        self.assertIs(consoles[1], self.host.consoles["server1"])
+        self.assertDictEqual({"server1": 0}, self.host.exitcodes)
+
+    def test_shutdown(self):
+        console = Mock()
+        self.host.consoles["server1"] = console
+        self.host.shutdown()
+        console.shutdown.assert_called_once_with()
+        self.host.create_console = Mock()
+        self.host.serve("server1", self.config1)
+        self.assertFalse(self.host.create_console.called)
@@ -27,7 +27,7 @@ class CommonDefaultTestMethodsMixin:
         self.assertEqual("127.0.0.1", self.conf.get("server", "public_ip"))
         self.assertEqual("127.0.0.1", self.conf.get("server", "rcon_ip"))
         self.assertEqual("0.33", self.conf.get("server", "delay"))
-        self.assertEqual("50", self.conf.get("server", "lines_per_second"))
+        self.assertEqual("0", self.conf.get("server", "lines_per_second"))
 
     def test_messages_section(self):
         self.assertEqual(
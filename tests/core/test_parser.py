@@ -1,8 +1,13 @@
 import logging
 import unittest
+from unittest.mock import Mock
 
 from b3.clients import Client
+from b3.config import CfgConfigParser
+from b3.events import Event
 from b3.parser import Parser
+from b3.ratelimit import TokenBucket
+from b3.tracing import Tracer, current_trace
 
 
 class DummyParser(Parser):
@@ -186,5 +191,119 @@ class Test_getWrap(unittest.TestCase):
         self.assertListEqual(wrapped_text, ["Lorem ipsum dolor sit amet"])
 
 
+class Test_create_rate_limiter(unittest.TestCase):
+    def setUp(self):
+        self.parser = DummyParser()
+        self.parser.config = CfgConfigParser()
+        self.parser.warning = Mock()
+        self.parser.info = Mock()
+
+    def create(self, conf):
+        self.parser.config.loadFromString(conf)
+        return self.parser._create_rate_limiter(
+            "server", "lines_per_second", "lines_burst"
+        )
+
+    def test_no_option(self):
+        self.assertIsNone(self.create("[server]"))
+
+    def test_no_limit(self):
+        self.assertIsNone(self.create("[server]\nlines_per_second: 0"))
+
+    def test_invalid_rate(self):
+        self.assertIsNone(self.create("[server]\nlines_per_second: f00"))
+        self.assertTrue(self.parser.warning.called)
+
+    def test_rate(self):
+        limiter = self.create("[server]\nlines_per_second: 50")
+        self.assertIsInstance(limiter, TokenBucket)
+        self.assertEqual(50, limiter.rate)
+        self.assertEqual(50, limiter.burst)
+
+    def test_rate_and_burst(self):
+        limiter = self.create("[server]\nlines_per_second: 50\nlines_burst: 200")
+        self.assertEqual(200, limiter.burst)
+
+    def test_invalid_burst(self):
+        limiter = self.create("[server]\nlines_per_second: 50\nlines_burst: -1")
+        self.assertEqual(50, limiter.burst)
+        self.assertTrue(self.parser.warning.called)
+
+
+class Test_event_order_keys(unittest.TestCase):
+    def setUp(self):
+        self.parser = DummyParser()
+        self.ordered = Mock(ordered_events=True)
+        self.unordered = Mock(ordered_events=False)
+        self.parser._dispatch = {
+            1: (
+                (self.ordered, "OrderedPlugin", (), None),
+                (self.unordered, "UnorderedPlugin", (), None),
+            )
+        }
+        self.joe = Client(cid="1")
+        self.bill = Client(cid="2")
+
+    def test_no_client(self):
+        self.assertListEqual([], self.parser._event_order_keys(Event(1, None)))
+
+    def test_client(self):
+        self.assertListEqual(
+            [("client", "1"), ("plugin", "OrderedPlugin")],
+            self.parser._event_order_keys(Event(1, None, client=self.joe)),
+        )
+
+    def test_client_and_target(self):
+        self.assertListEqual(
+            [("client", "1"), ("client", "2")],
+            self.parser._event_order_keys(
+                Event(2, None, client=self.joe, target=self.bill)
+            ),
+        )
+
+
+class Test_tracing(unittest.TestCase):
+    def setUp(self):
+        self.parser = DummyParser()
+        self.parser._tracer = Tracer(1)
+        self.parser._handlers = {1: [Mock()]}
+        self.parser._eventsStats = Mock()
+        self.parser.queue = Mock()
+        self.parser.queue.put.return_value = True
+        self.seen = []
+        self.parser._dispatch = {1: ((Mock(), "TracedPlugin", (self.on_event,), None),)}
+
+    def on_event(self, event):
+        self.seen.append(current_trace())
+
+    def test_line_to_handler(self):
+        trace = self.parser._tracer.sample("line", 0.0)
+        self.parser.parseLine = lambda line: self.parser.queueEvent(Event(1, None))
+        self.parser._parse_traced_line(trace, "line")
+        # the trace waits for the queued event
+        self.assertEqual(0, len(self.parser._tracer.traces))
+        event = self.parser.queue.put.call_args[0][0][2]
+        self.assertIs(trace, event.trace)
+        self.parser._dispatch_traced_event(event)
+        self.assertListEqual([trace], self.seen)
+        self.assertListEqual([trace], list(self.parser._tracer.traces))
+        self.assertListEqual(
+            ["read", "parse", "queue", "handler"],
+            [span["stage"] for span in trace.to_dict()["spans"]],
+        )
+
+    def test_event_dropped(self):
+        self.parser.queue.put.return_value = False
+        trace = self.parser._tracer.sample("line", 0.0)
+        self.parser.parseLine = lambda line: self.parser.queueEvent(Event(1, None))
+        self.parser._parse_traced_line(trace, "line")
+        self.assertListEqual([trace], list(self.parser._tracer.traces))
+
+    def test_untraced_event(self):
+        self.parser.queueEvent(Event(1, None))
+        event = self.parser.queue.put.call_args[0][0][2]
+        self.assertIsNone(event.trace)
+
+
 if __name__ == "__main__":
     unittest.main()
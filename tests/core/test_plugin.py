@@ -1,13 +1,14 @@
 import logging
 import os
 from textwrap import dedent
-from unittest.mock import ANY, call, patch
+from unittest.mock import ANY, Mock, call, patch
 
 import mockito
 
 import b3
 from b3.config import CfgConfigParser, NoOptionError
 from b3.events import Event
+from b3.parser import Parser
 from b3.plugin import Plugin
 from tests import B3TestCase
 from tests.plugins.fakeplugins import __file__ as external_plugins__file__
@@ -407,6 +408,104 @@ class Test_Plugin_registerEvent(B3TestCase):
         self.assertEqual(0, p.stub_method2_call_count)
 
 
+class Test_Plugin_event_dispatch(B3TestCase):
+    def setUp(self):
+        B3TestCase.setUp(self)
+        self.conf = CfgConfigParser()
+        self.k = self.console.getEventID("EVT_CLIENT_SAY")
+        self.p = MyPlugin(self.console, self.conf)
+        self.p.registerEvent(self.k, self.p.stub_method, self.p.stub_method2)
+
+    def test_dispatch_table(self):
+        ((handler, name, hooks, is_enabled),) = self.console._dispatch[self.k]
+        self.assertIs(self.p, handler)
+        self.assertEqual("MyPlugin", name)
+        self.assertTupleEqual((self.p.stub_method, self.p.stub_method2), hooks)
+        self.assertIsNone(is_enabled)
+
+    def test_disable(self):
+        self.p.disable()
+        self.assertNotIn(self.k, self.console._dispatch)
+        self.console.queueEvent(Event(self.k, None))
+        self.assertEqual(0, self.p.stub_method_call_count)
+
+    def test_enable(self):
+        self.p.disable()
+        self.p.enable()
+        self.console.queueEvent(Event(self.k, None))
+        self.assertEqual(1, self.p.stub_method_call_count)
+        self.assertEqual(1, self.p.stub_method2_call_count)
+
+    def test_unregister(self):
+        self.console.unregisterHandler(self.p)
+        self.assertNotIn(self.k, self.console._dispatch)
+
+    def test_isEnabled_override(self):
+        class DynamicPlugin(MyPlugin):
+            active = False
+
+            def isEnabled(self):
+                return self.active and super().isEnabled()
+
+        p = DynamicPlugin(self.console, self.conf)
+        p.registerEvent(self.k, p.stub_method)
+        self.console.queueEvent(Event(self.k, None))
+        self.assertEqual(0, p.stub_method_call_count)
+        p.active = True
+        self.console.queueEvent(Event(self.k, None))
+        self.assertEqual(1, p.stub_method_call_count)
+
+    def test_parseEvent_override(self):
+        class CustomPlugin(MyPlugin):
+            def parseEvent(self, event):
+                self.stub_method(event)
+
+        p = CustomPlugin(self.console, self.conf)
+        p.registerEvent(self.k)
+        self.assertTupleEqual((p.parseEvent,), p.getEventHooks(self.k))
+        self.console.queueEvent(Event(self.k, None))
+        self.assertEqual(1, p.stub_method_call_count)
+        self.assertEqual(0, p.onEvent_call_count)
+
+    def test_hook_with_wrong_signature(self):
+        self.console.error = Mock()
+        p = MyPlugin(self.console, self.conf)
+        p.registerEvent(self.k, lambda: None, p.stub_method)
+        ((_handler, _name, hooks, _is_enabled),) = [
+            entry for entry in self.console._dispatch[self.k] if entry[0] is p
+        ]
+        self.assertTupleEqual((p.stub_method,), hooks)
+        self.assertTrue(self.console.error.called)
+
+    def test_TypeError_in_hook_is_reported(self):
+        class BuggyPlugin(MyPlugin):
+            def parseEvent(self, event):
+                raise TypeError("bug")
+
+        self.console.error = Mock()
+        p = BuggyPlugin(self.console, self.conf)
+        p.error = Mock()
+        p.registerEvent(self.k)
+        self.console.queueEvent(Event(self.k, None))
+        self.assertFalse(p.error.called)
+        self.assertIn("TypeError", self.console.error.call_args[0])
+
+    def test_TypeError_in_hook_does_not_skip_the_next_hooks(self):
+        class TwoHooksPlugin(MyPlugin):
+            def buggy_hook(self, event):
+                raise TypeError("bug")
+
+        self.console.error = Mock()
+        p = TwoHooksPlugin(self.console, self.conf)
+        p.registerEvent(self.k, p.buggy_hook, p.stub_method)
+        self.console.queueEvent(Event(self.k, None))
+        self.assertEqual(1, p.stub_method_call_count)
+        self.assertIn("TypeError", self.console.error.call_args[0])
+        # the event handling thread of the parser
+        Parser._dispatch_event(self.console, Event(self.k, None))
+        self.assertEqual(2, p.stub_method_call_count)
+
+
 class Test_Plugin_requiresParser(B3TestCase):
     def setUp(self):
         B3TestCase.setUp(self)
@@ -0,0 +1,76 @@
+import unittest
+
+from b3.ratelimit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class Test_TokenBucket(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+
+    def bucket(self, rate, burst=None):
+        return TokenBucket(rate, burst, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_invalid_parameters(self):
+        self.assertRaises(ValueError, TokenBucket, 0)
+        self.assertRaises(ValueError, TokenBucket, 10, burst=0)
+
+    def test_default_burst(self):
+        self.assertEqual(10, self.bucket(10).burst)
+        self.assertEqual(1, self.bucket(0.5).burst)
+
+    def test_burst_is_not_throttled(self):
+        bucket = self.bucket(10, burst=5)
+        for _ in range(5):
+            self.assertEqual(0, bucket.acquire())
+        self.assertEqual(0, self.clock.now)
+        self.assertEqual(0, bucket.throttled)
+
+    def test_throttled_after_burst(self):
+        bucket = self.bucket(10, burst=5)
+        for _ in range(15):
+            bucket.acquire()
+        self.assertAlmostEqual(1.0, self.clock.now)
+        self.assertEqual(10, bucket.throttled)
+
+    def test_refill(self):
+        bucket = self.bucket(10, burst=5)
+        for _ in range(5):
+            bucket.acquire()
+        self.assertFalse(bucket.try_acquire())
+        self.clock.now += 0.2
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def test_refill_capped_to_burst(self):
+        bucket = self.bucket(10, burst=5)
+        self.clock.now += 60
+        for _ in range(5):
+            self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.try_acquire())
+
+    def test_reserve(self):
+        bucket = self.bucket(10, burst=1)
+        self.assertEqual(0, bucket.reserve())
+        self.assertAlmostEqual(0.1, bucket.reserve())
+        self.assertAlmostEqual(0.2, bucket.reserve())
+
+    def test_wait_time(self):
+        bucket = self.bucket(10, burst=1)
+        self.assertEqual(0, bucket.wait_time())
+        self.assertTrue(bucket.try_acquire())
+        self.assertAlmostEqual(0.1, bucket.wait_time())
+        self.assertAlmostEqual(0.1, bucket.wait_time())
+        self.clock.now += 0.05
+        self.assertAlmostEqual(0.05, bucket.wait_time())
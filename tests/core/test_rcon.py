@@ -0,0 +1,348 @@
+import contextlib
+import socket
+import threading
+import time
+import unittest
+from unittest.mock import Mock
+
+from b3.rcon import (
+    LANE_ACTION,
+    LANE_CHAT,
+    LANE_QUERY,
+    RESULT_DROPPED,
+    RESULT_OK,
+    Rcon,
+    RconScheduler,
+    RconStats,
+    RttEstimator,
+    pack_commands,
+)
+
+
+class FakeRconServer:
+    """
+    UDP server answering every RCON command with its own text after a delay,
+    each answer in its own thread so that the commands are served concurrently.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.commands = []
+        self.lock = threading.Lock()
+        self.sock = socket.socket(type=socket.SOCK_DGRAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.address = self.sock.getsockname()
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        while True:
+            try:
+                payload, address = self.sock.recvfrom(4096)
+            except OSError:
+                return
+            cmd = payload.split(b'" ', 1)[1].strip().decode()
+            self.commands.append(cmd)
+            threading.Thread(target=self.answer, args=(cmd, address)).start()
+
+    def answer(self, cmd, address):
+        time.sleep(self.delay)
+        with self.lock, contextlib.suppress(OSError):  # closed meanwhile
+            self.sock.sendto(b"\377\377\377\377print\n" + cmd.encode(), address)
+
+    def close(self):
+        self.sock.close()
+
+
+class Test_Rcon(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRconServer(delay=0.2)
+        self.rcon = Rcon(Mock(encoding="latin-1"), self.server.address, "password")
+        self.rcon.socket_timeout = 1.0
+        self.rcon.socket_timeout2 = 0.05
+
+    def tearDown(self):
+        self.rcon.close()
+        self.server.close()
+
+    def test_write(self):
+        self.assertEqual("status", self.rcon.write("status"))
+        self.assertListEqual(["status"], self.server.commands)
+
+    def test_submit_in_flight(self):
+        start = time.perf_counter()
+        futures = [self.rcon.submit(f"cmd {i}") for i in range(3)]
+        responses = [future.result(timeout=5) for future in futures]
+        self.assertListEqual(["cmd 0", "cmd 1", "cmd 2"], responses)
+        # the 3 commands waited for their response at the same time
+        self.assertLess(time.perf_counter() - start, 0.55)
+
+    def test_pool_size(self):
+        self.rcon.max_sockets = 2
+        futures = [self.rcon.submit(f"cmd {i}") for i in range(4)]
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(2, len(self.rcon._sockets))
+
+    def test_parallel_writes(self):
+        responses = {}
+
+        def write(cmd):
+            responses[cmd] = self.rcon.write(cmd)
+
+        threads = [threading.Thread(target=write, args=(f"cmd {i}",)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertDictEqual({f"cmd {i}": f"cmd {i}" for i in range(3)}, responses)
+
+    def test_writelines_order(self):
+        self.server.delay = 0.0
+        self.rcon.pack_length = 0
+        self.rcon.writelines(["say 1", "", "say 2", "say 3"])
+        self.rcon.stop()
+        self.assertListEqual(["say 1", "say 2", "say 3"], self.server.commands)
+
+    def test_writelines_packed(self):
+        self.server.delay = 0.0
+        self.rcon.writelines(["say 1", "", "say 2", "kick 3", "tell 4 f00"])
+        self.rcon.stop()
+        self.assertListEqual(
+            ['say "1";say "2"', "kick 3", 'tell 4 "f00"'], self.server.commands
+        )
+
+    def test_stats(self):
+        self.server.delay = 0.0
+        self.rcon.write("status")
+        self.rcon.write("sv_hostname")
+        stats = dict(self.rcon.stats.verbs())
+        self.assertSetEqual({"status", "sv_hostname"}, set(stats))
+        self.assertEqual(1, stats["status"].commands)
+        self.assertEqual(6, stats["status"].bytes_in)
+        self.assertEqual(
+            len(b'\377\377\377\377rcon "password" status\n'), stats["status"].bytes_out
+        )
+        self.assertEqual(0, stats["status"].timeouts)
+
+    def test_stats_timeout(self):
+        self.server.close()
+        self.rcon.socket_timeout = 0.05
+        self.assertEqual("", self.rcon.write("status"))
+        stats = dict(self.rcon.stats.verbs())["status"]
+        self.assertEqual(1, stats.timeouts)
+        self.assertEqual(0, stats.retries)
+
+
+class Test_RconStats(unittest.TestCase):
+    def setUp(self):
+        self.stats = RconStats()
+
+    def test_verbs(self):
+        self.stats.record("say hello", 0.001, 10, 0, 0, RESULT_OK)
+        self.stats.record("status", 0.005, 10, 100, 1, RESULT_OK)
+        self.stats.record("Say world", 0.001, 10, 0, 0, RESULT_DROPPED)
+        verbs = self.stats.verbs()
+        self.assertListEqual(["status", "say"], [verb for verb, _ in verbs])
+        say = verbs[1][1]
+        self.assertEqual(2, say.commands)
+        self.assertEqual(20, say.bytes_out)
+        self.assertEqual(1, say.dropped)
+        self.assertEqual(1, verbs[0][1].retries)
+
+    def test_max_verbs(self):
+        self.stats.max_verbs = 2
+        for cmd in ("status", "players", "sv_hostname", "g_gear"):
+            self.stats.record(cmd, 0.001, 10, 10, 0, RESULT_OK)
+        verbs = dict(self.stats.verbs())
+        self.assertSetEqual({"status", "players", "other"}, set(verbs))
+        self.assertEqual(2, verbs["other"].commands)
+
+    def test_summary(self):
+        self.stats.record("status", 0.005, 10, 100, 0, RESULT_OK)
+        summary = self.stats.summary()
+        self.assertEqual(100, summary["status"]["bytes_in"])
+        self.assertEqual(1, summary["status"]["latency"]["count"])
+
+    def test_dump_stats(self):
+        console = Mock()
+        self.stats.record("status", 0.005, 10, 100, 0, RESULT_OK)
+        self.stats.dump_stats(console)
+        self.assertEqual(2, console.info.call_count)
+
+
+class Test_adaptive_timeouts(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRconServer()
+        self.rcon = Rcon(Mock(encoding="latin-1"), self.server.address, "password")
+
+    def tearDown(self):
+        self.rcon.close()
+        self.server.close()
+
+    def test_fixed_timeouts(self):
+        self.rcon.rtt = None
+        self.assertTupleEqual((0.8, 0.225), self.rcon.timeouts())
+
+    def test_unknown_rtt(self):
+        self.assertTupleEqual((0.8, 0.225), self.rcon.timeouts())
+
+    def test_timeouts_bounds(self):
+        self.rcon.rtt.add_sample(0.0001)
+        self.assertTupleEqual((0.1, 0.015), self.rcon.timeouts())
+        self.rcon.rtt.add_sample(2.0)
+        self.assertTupleEqual((0.8, 0.225), self.rcon.timeouts())
+
+    def test_fast_server(self):
+        for _ in range(5):
+            self.assertEqual("status", self.rcon.write("status"))
+        start = time.perf_counter()
+        self.assertEqual("status", self.rcon.write("status"))
+        # instead of waiting socket_timeout2 (225ms) for more fragments
+        self.assertLess(time.perf_counter() - start, 0.1)
+        self.assertEqual(6, self.rcon.rtt.samples)
+
+
+class Test_RttEstimator(unittest.TestCase):
+    def setUp(self):
+        self.rtt = RttEstimator()
+
+    def test_unknown(self):
+        self.assertIsNone(self.rtt.timeout())
+        self.assertIsNone(self.rtt.tail_timeout())
+
+    def test_first_sample(self):
+        self.rtt.add_sample(0.1)
+        self.assertAlmostEqual(0.1, self.rtt.srtt)
+        self.assertAlmostEqual(0.05, self.rtt.rttvar)
+        self.assertAlmostEqual(0.6, self.rtt.timeout())
+        self.assertAlmostEqual(0.2, self.rtt.tail_timeout())
+
+    def test_smoothing(self):
+        self.rtt.add_sample(0.1)
+        self.rtt.add_sample(0.02)
+        self.assertAlmostEqual(0.09, self.rtt.srtt)
+        self.assertAlmostEqual(0.0575, self.rtt.rttvar)
+
+    def test_converges(self):
+        for _ in range(100):
+            self.rtt.add_sample(0.001)
+        self.assertAlmostEqual(0.001, self.rtt.srtt)
+        self.assertLess(self.rtt.rttvar, 0.00001)
+
+    def test_gap(self):
+        self.rtt.add_sample(0.001)
+        self.rtt.add_gap(0.01)
+        self.rtt.add_gap(0.002)
+        self.assertAlmostEqual(0.009, self.rtt.gap)
+
+    def test_backoff(self):
+        self.rtt.add_sample(0.1)
+        self.rtt.add_timeout()
+        self.rtt.add_timeout()
+        self.assertAlmostEqual(2.4, self.rtt.timeout())
+        self.rtt.add_sample(0.1)
+        self.assertEqual(1, self.rtt.backoff)
+
+
+class Test_pack_commands(unittest.TestCase):
+    def test_pack(self):
+        self.assertListEqual(
+            ['say "f00";tell 2 "bar";say "^7hello world"'],
+            pack_commands(
+                ["say f00", "tell 2 bar", "", None, "say ^7hello world"], 100
+            ),
+        )
+
+    def test_max_length(self):
+        lines = [f"say line {i}" for i in range(5)]
+        packets = pack_commands(lines, 30)
+        self.assertListEqual(
+            [
+                'say "line 0";say "line 1"',
+                'say "line 2";say "line 3"',
+                'say "line 4"',
+            ],
+            packets,
+        )
+        self.assertTrue(all(len(packet) <= 30 for packet in packets))
+
+    def test_quotes_and_separators(self):
+        self.assertListEqual(
+            ['say "it\'s \'quoted\'; quit";say "b"'],
+            pack_commands(['say it\'s "quoted"; quit', "say b"], 100),
+        )
+
+    def test_other_commands_keep_order(self):
+        self.assertListEqual(
+            ['say "a"', "slap 2", "slap 2", 'say "b";say "c"'],
+            pack_commands(["say a", "slap 2", "slap 2", "say b", "say c"], 100),
+        )
+
+    def test_long_command(self):
+        self.assertListEqual(
+            ['say "a"', 'say "%s"' % ("x" * 50)],
+            pack_commands(["say a", "say " + "x" * 50], 20),
+        )
+
+
+class Test_RconScheduler(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = RconScheduler(rate=10, burst=1, max_chat=2)
+        self.sent = []
+
+    def send(self, cmd):
+        if self.scheduler.acquire(self.scheduler.lane(cmd)):
+            self.sent.append(cmd)
+
+    def start(self, cmd, waiting):
+        thread = threading.Thread(target=self.send, args=(cmd,))
+        thread.start()
+        while sum(self.scheduler.waiting().values()) < waiting:
+            time.sleep(0.001)
+        return thread
+
+    def test_lane(self):
+        self.assertEqual(LANE_ACTION, self.scheduler.lane("forceteam 2 red"))
+        self.assertEqual(LANE_ACTION, self.scheduler.lane("Kick 3"))
+        self.assertEqual(LANE_QUERY, self.scheduler.lane("status"))
+        self.assertEqual(LANE_QUERY, self.scheduler.lane("sv_hostname"))
+        self.assertEqual(LANE_CHAT, self.scheduler.lane('say "hello";say "world"'))
+        self.assertEqual(LANE_QUERY, self.scheduler.lane(""))
+
+    def test_burst(self):
+        self.send("status")
+        self.assertListEqual(["status"], self.sent)
+        self.assertEqual(0, self.scheduler.stats()["query"]["queued"])
+
+    def test_priority(self):
+        self.send("say first")
+        threads = [
+            self.start("say chat", 1),
+            self.start("status", 2),
+            self.start("kick 3", 3),
+        ]
+        for thread in threads:
+            thread.join(5)
+        self.assertListEqual(["say first", "kick 3", "status", "say chat"], self.sent)
+        stats = self.scheduler.stats()
+        self.assertEqual(1, stats["action"]["queued"])
+        self.assertEqual(2, stats["chat"]["sent"])
+
+    def test_chat_dropped(self):
+        self.send("say first")
+        threads = [self.start("say 1", 1), self.start("say 2", 2)]
+        self.send("say 3")
+        for thread in threads:
+            thread.join(5)
+        self.assertListEqual(["say first", "say 1", "say 2"], self.sent)
+        self.assertEqual(1, self.scheduler.stats()["chat"]["dropped"])
+
+    def test_retried(self):
+        self.scheduler.acquire(LANE_QUERY)
+        self.scheduler.acquire(LANE_QUERY, retry=True)
+        self.assertEqual(1, self.scheduler.stats()["query"]["retried"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+from unittest.mock import Mock
+
+from b3.replay import FakeRcon, LinePacer, ReplayStats
+
+
+class Test_FakeRcon(unittest.TestCase):
+    def setUp(self):
+        self.rcon = FakeRcon(Mock(), ("127.0.0.1", 27960), "password")
+
+    def test_status(self):
+        self.assertTrue(self.rcon.write("status").startswith("map: ut4_turnpike\n"))
+
+    def test_cvar(self):
+        self.assertEqual('"gamename" is:"q3urt43^7"', self.rcon.write("gamename"))
+
+    def test_unknown_cvar(self):
+        self.assertEqual('"g_f00" is:"0^7"', self.rcon.write("g_f00"))
+
+    def test_set_cvar(self):
+        self.rcon.write('set mapname "ut4_casa"')
+        self.assertEqual('"mapname" is:"ut4_casa^7"', self.rcon.write("mapname"))
+        self.assertTrue(self.rcon.write("status").startswith("map: ut4_casa\n"))
+
+    def test_other_command(self):
+        self.assertEqual("", self.rcon.write("kick 3"))
+
+    def test_writelines(self):
+        self.rcon.writelines(["say f00", "", "say bar"])
+        self.assertEqual(2, self.rcon.commands)
+
+    def test_submit(self):
+        future = self.rcon.submit("gamename")
+        self.assertEqual('"gamename" is:"q3urt43^7"', future.result(timeout=0))
+
+
+class Test_LinePacer(unittest.TestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.sleep = Mock(side_effect=self.advance)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    def pacer(self, speed):
+        return LinePacer(speed, clock=lambda: self.now, sleep=self.sleep)
+
+    def test_no_pacing(self):
+        pacer = self.pacer(0)
+        pacer.wait("  0:00 InitGame: f00")
+        pacer.wait("  1:00 Warmup:")
+        self.assertFalse(self.sleep.called)
+
+    def test_speed(self):
+        pacer = self.pacer(10)
+        pacer.wait("  0:00 InitGame: f00")
+        pacer.wait("  0:10 Warmup:")
+        self.assertEqual(1.0, self.now)
+        pacer.wait("  1:00 Exit: Timelimit hit.")
+        self.assertEqual(6.0, self.now)
+
+    def test_new_map(self):
+        pacer = self.pacer(10)
+        pacer.wait("  5:00 Exit: Timelimit hit.")
+        pacer.wait("  0:00 InitGame: f00")
+        pacer.wait("  0:10 Warmup:")
+        self.assertEqual(1.0, self.now)
+
+    def test_line_without_time(self):
+        pacer = self.pacer(10)
+        pacer.wait("f00")
+        self.assertFalse(self.sleep.called)
+
+
+class Test_ReplayStats(unittest.TestCase):
+    def test_report(self):
+        stats = ReplayStats(Mock())
+        stats.add_line(2)
+        stats.add_line(4)
+        stats.events = 3
+        stats.parse_time = stats.total_time = 0.5
+        stats.add_event_handled("AdminPlugin", "EVT_CLIENT_SAY", 0.002)
+        stats.add_event_handled("AdminPlugin", "EVT_CLIENT_SAY", 0.004)
+        stats.add_event_handled("SpreePlugin", "EVT_CLIENT_KILL", 0.001)
+        self.assertEqual([2, 0.006, 0.004], stats.plugins["AdminPlugin"])
+        report = stats.report()
+        self.assertEqual("Lines   : 2 parsed in 0.50s (4 lines/sec)", report[0])
+        self.assertEqual("Events  : 3 handled in 0.50s (6 events/sec)", report[1])
+        self.assertEqual("Queue   : max depth 4, mean depth 3.0", report[2])
+        self.assertTrue(report[4].lstrip().startswith("AdminPlugin"))
+        self.assertTrue(report[5].lstrip().startswith("SpreePlugin"))
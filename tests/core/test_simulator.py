@@ -0,0 +1,220 @@
+import os
+import re
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+
+from b3.parsers.iourt43 import Iourt43Parser
+from b3.rcon import Rcon
+from b3.simulator import TEAM_BLUE, TEAM_RED, WEAPONS, GameSimulation, RconServer
+
+
+class Test_GameSimulation(unittest.TestCase):
+    def setUp(self):
+        self.simulation = GameSimulation(seed=1)
+        self.joe = self.simulation.connect(name="Joe", team=TEAM_RED, auth="joe")
+        self.bill = self.simulation.connect(name="Bill", team=TEAM_BLUE, auth="")
+
+    def test_status(self):
+        self.simulation.kill(0, 1)
+        lines = self.simulation.execute("status").splitlines()
+        self.assertEqual("map: ut4_turnpike", lines[0])
+        players = [Iourt43Parser._regPlayer.match(line.strip()) for line in lines[3:]]
+        self.assertListEqual(
+            [("0", "1", "Joe^7"), ("1", "0", "Bill^7")],
+            [(m["slot"], m["score"], m["name"]) for m in players],
+        )
+        self.assertEqual(self.joe.ip, players[0]["ip"])
+
+    def test_players(self):
+        lines = self.simulation.execute("players").splitlines()
+        players = [Iourt43Parser._rePlayerScore.match(line) for line in lines]
+        players = [m for m in players if m]
+        self.assertListEqual(
+            [("0", "RED", "joe"), ("1", "BLUE", "---")],
+            [(m["slot"], m["team"], m["auth"].strip()) for m in players],
+        )
+
+    def test_dumpuser(self):
+        data = self.simulation.execute("dumpuser 1")
+        self.assertTrue(data.startswith("userinfo\n--------\n"))
+        self.assertIn(f"cl_guid             {self.bill.guid}\n", data)
+        self.assertEqual(
+            "Player 5 is not on the server\n", self.simulation.execute("dumpuser 5")
+        )
+
+    def test_auth_whois(self):
+        m = Iourt43Parser._re_authwhois.match(self.simulation.execute("auth-whois 0"))
+        self.assertEqual(("0", "Joe", "joe"), (m["cid"], m["name"], m["login"]))
+        self.assertEqual(
+            "Client 7 is not active.\n", self.simulation.execute("auth-whois 7")
+        )
+
+    def test_cvars(self):
+        self.assertEqual("", self.simulation.execute('set sv_hostname "My server"'))
+        m = Iourt43Parser._reCvar[0].search(self.simulation.execute("sv_hostname"))
+        self.assertEqual("My server", m["value"])
+        data = self.simulation.execute("cvarlist fs_")
+        self.assertIn('S R     fs_game "q3ut4"\n', data)
+        self.assertNotIn("mapname", data)
+
+    def test_fdir(self):
+        data = self.simulation.execute("fdir *.bsp")
+        self.assertIn("maps/ut4_abbey.bsp\n", data)
+        self.assertTrue(data.endswith("6 files listed\n"))
+
+    def test_packed_commands(self):
+        self.simulation.execute('say "hello; world";tell 0 "hi"')
+        self.assertListEqual(
+            ['say "hello; world"', 'tell 0 "hi"'], list(self.simulation.commands)
+        )
+
+    def test_command_history(self):
+        with patch.object(GameSimulation, "command_history", 2):
+            simulation = GameSimulation(seed=1)
+        for cmd in ("status", "players", "serverinfo"):
+            simulation.execute(cmd)
+        self.assertListEqual(["players", "serverinfo"], list(simulation.commands))
+        self.assertEqual(3, simulation.command_count)
+
+    def test_kick(self):
+        self.simulation.execute("kick Bill")
+        self.assertListEqual([0], list(self.simulation.players))
+
+    def test_unknown_command(self):
+        self.assertEqual('Unknown command "foo^7"\n', self.simulation.execute("foo"))
+
+
+class Test_game_log(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".log")
+        os.close(fd)
+        self.now = 65.0
+        self.simulation = GameSimulation(self.path, seed=1, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.simulation.close()
+        os.unlink(self.path)
+
+    def read_lines(self):
+        with open(self.path, encoding="utf-8") as f:
+            return f.read().splitlines()
+
+    def test_time_prefix(self):
+        self.simulation.init_game()
+        self.now += 75
+        self.simulation.shutdown_game()
+        lines = self.read_lines()
+        self.assertTrue(lines[0].startswith("  0:00 InitGame: \\sv_hostname\\"))
+        self.assertEqual("  1:15 ShutdownGame:", lines[1])
+
+    def test_lines_are_parsed(self):
+        self.simulation.init_game()
+        joe = self.simulation.connect(name="Joe")
+        bill = self.simulation.connect(name="Bill")
+        self.simulation.hit(joe.cid, bill.cid, WEAPONS[0], 1)
+        self.simulation.kill(joe.cid, bill.cid, WEAPONS[0])
+        self.simulation.say(bill.cid, "gg")
+        for _ in range(50):
+            self.simulation.step()
+        self.simulation.disconnect(bill.cid)
+        self.simulation.execute("map ut4_abbey")
+
+        actions = []
+        for line in self.read_lines():
+            line = line[7:]
+            if line.startswith("---"):
+                continue
+            for regex in Iourt43Parser._lineFormats:
+                if m := regex.match(line):
+                    actions.append(m["action"])
+                    break
+            else:
+                self.fail(f"line not parsed: {line!r}")
+        for action in (
+            "InitGame",
+            "ClientConnect",
+            "ClientUserinfo",
+            "ClientUserinfoChanged",
+            "ClientBegin",
+            "Hit",
+            "Kill",
+            "say",
+            "ClientDisconnect",
+            "ShutdownGame",
+        ):
+            self.assertIn(action, actions)
+
+    def test_hit_names_the_victim_location(self):
+        joe = self.simulation.connect(name="Joe")
+        bill = self.simulation.connect(name="Bill")
+        self.simulation.hit(joe.cid, bill.cid, WEAPONS[5], 1)
+        self.assertEqual(
+            "  0:00 Hit: 1 0 1 8: Joe hit Bill in the Head", self.read_lines()[-1]
+        )
+
+
+class Test_RconServer(unittest.TestCase):
+    def setUp(self):
+        self.simulation = GameSimulation(seed=1)
+        for _ in range(12):
+            self.simulation.connect()
+        self.server = None
+        self.rcon = None
+
+    def tearDown(self):
+        if self.rcon:
+            self.rcon.close()
+        if self.server:
+            self.server.close()
+
+    def connect(self, password="secret", **kwargs):  # noqa: S107
+        self.server = RconServer(self.simulation, "secret", **kwargs)
+        self.rcon = Rcon(Mock(encoding="latin-1"), self.server.address, password)
+        self.rcon.rtt = None
+        self.rcon.socket_timeout = 1.0
+        self.rcon.socket_timeout2 = 0.1
+
+    def test_write(self):
+        self.connect()
+        self.assertEqual(self.simulation.execute("status"), self.rcon.write("status"))
+        self.assertListEqual(["status", "status"], list(self.simulation.commands))
+
+    def test_bad_password(self):
+        self.connect(password="wrong")
+        self.assertEqual("Bad rconpassword.\n", self.rcon.write("status"))
+        self.assertListEqual([], list(self.simulation.commands))
+
+    def test_fragments(self):
+        self.connect(fragment_size=64)
+        expected = self.simulation.execute("status")
+        self.assertEqual(expected, self.rcon.write("status"))
+        self.assertEqual(-(-len(expected) // 64), self.server.sent)
+
+    def test_latency(self):
+        self.connect(latency=0.2)
+        start = time.perf_counter()
+        self.assertTrue(self.rcon.write("status"))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+
+    def test_loss(self):
+        self.connect(loss=1.0)
+        self.rcon.socket_timeout = 0.1
+        self.assertEqual("", self.rcon.write("status"))
+        self.assertEqual(1, self.server.received)
+        self.assertEqual(1, self.server.lost)
+        self.assertListEqual([], list(self.simulation.commands))
+
+    def test_concurrent_commands(self):
+        self.connect(latency=0.2)
+        start = time.perf_counter()
+        futures = [self.rcon.submit(f"dumpuser {cid}") for cid in range(3)]
+        for cid, future in enumerate(futures):
+            name = re.search(r"^name\s+(.*)$", future.result(timeout=5), re.M)[1]
+            self.assertEqual(self.simulation.players[cid].name, name)
+        self.assertLess(time.perf_counter() - start, 0.55)
+
+
+if __name__ == "__main__":
+    unittest.main()
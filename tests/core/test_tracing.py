@@ -0,0 +1,84 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from b3.tracing import Tracer, current_trace
+
+
+class Test_Tracer(unittest.TestCase):
+    def test_invalid_sample_rate(self):
+        self.assertRaises(ValueError, Tracer, 0)
+        self.assertRaises(ValueError, Tracer, 1.5)
+
+    def test_sample(self):
+        tracer = Tracer(0.25)
+        traces = [tracer.sample(f"line {i}", 0.0) for i in range(8)]
+        sampled = [trace for trace in traces if trace is not None]
+        self.assertEqual(2, len(sampled))
+        self.assertListEqual(["line 0", "line 4"], [trace.line for trace in sampled])
+        self.assertListEqual([1, 2], [trace.trace_id for trace in sampled])
+
+    def test_sample_every_line(self):
+        tracer = Tracer(1)
+        self.assertTrue(all(tracer.sample("line", 0.0) for _ in range(3)))
+
+    def test_current_trace(self):
+        trace = Tracer(1).sample("line", time.perf_counter())
+        self.assertIsNone(current_trace())
+        with trace:
+            self.assertIs(trace, current_trace())
+            other_thread = []
+            thread = threading.Thread(
+                target=lambda: other_thread.append(current_trace())
+            )
+            thread.start()
+            thread.join()
+            self.assertListEqual([None], other_thread)
+        self.assertIsNone(current_trace())
+
+    def test_finish_once_released(self):
+        tracer = Tracer(1)
+        trace = tracer.sample("line", time.perf_counter())
+        trace.hold()
+        trace.release()
+        self.assertEqual(0, len(tracer.traces))
+        trace.release()
+        self.assertListEqual([trace], list(tracer.traces))
+
+    def test_ring_buffer(self):
+        tracer = Tracer(1, buffer_size=2)
+        for _ in range(3):
+            tracer.sample("line", time.perf_counter()).release()
+        self.assertListEqual([2, 3], [trace.trace_id for trace in tracer.traces])
+
+    def test_to_dict(self):
+        trace = Tracer(1).sample("line", 10.0)
+        trace.add_span("handler", "AdminPlugin", 10.002, 10.005)
+        trace.add_span("parse", "", 10.0, 10.001)
+        data = trace.to_dict()
+        self.assertEqual(1, data["id"])
+        self.assertEqual("line", data["line"])
+        self.assertAlmostEqual(5.0, data["duration"])
+        self.assertListEqual(
+            ["read", "parse", "handler"], [span["stage"] for span in data["spans"]]
+        )
+        self.assertAlmostEqual(2.0, data["spans"][2]["start"])
+        self.assertAlmostEqual(3.0, data["spans"][2]["duration"])
+
+    def test_trace_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces.jsonl")
+            tracer = Tracer(1, path=path)
+            tracer.sample("line 1", time.perf_counter()).release()
+            tracer.sample("line 2", time.perf_counter()).release()
+            tracer.close()
+            with open(path, encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+        self.assertListEqual(["line 1", "line 2"], [r["line"] for r in records])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -7,12 +7,12 @@ as if it where a player.
 import logging
 import re
 import sys
-import time
 import traceback
 from collections import defaultdict
 from io import StringIO
 from sys import stdout
 
+import b3.cache
 import b3.clients
 import b3.config
 import b3.events
@@ -66,6 +66,9 @@ class FakeConsole(b3.parser.Parser):
         self.game.mapName = "ut4_turnpike"
         self.cvars = {}
         self._handlers = defaultdict(list)
+        self._dispatch = {}
+        self._eventsStats = b3.events.EventsStats(self)
+        self._rcon_cache = b3.cache.SingleFlightCache()
 
         self.input = StringIO()
 
@@ -96,19 +99,28 @@ class FakeConsole(b3.parser.Parser):
         ):
             self.working = False
 
-        for hfunc in self._handlers[event.type]:
-            if not hfunc.isEnabled():
+        for hfunc, name, hooks, is_enabled in self._dispatch.get(event.type, ()):
+            if is_enabled is not None and not is_enabled():
                 continue
 
             self.verbose(
                 "parsing event: %s: %s",
                 self.Events.getName(event.type),
-                hfunc.__class__.__name__,
+                name,
             )
 
             try:
-                hfunc.parseEvent(event)
-                time.sleep(0.001)
+                for hook in hooks:
+                    try:
+                        hook(event)
+                    except TypeError as e:
+                        self.error(
+                            "handler %s could not parse event %s: %s: %s",
+                            name,
+                            self.Events.getName(event.type),
+                            e.__class__.__name__,
+                            e,
+                        )
             except b3.events.VetoEvent:
                 # plugin called for event hault, do not continue processing
                 self.bot(
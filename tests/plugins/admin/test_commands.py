@@ -9,6 +9,7 @@ from b3 import TEAM_RED
 from b3.clients import Client, ClientBan, ClientTempBan, ClientVar, Group
 from b3.config import CfgConfigParser
 from b3.plugins.admin import Command
+from b3.rcon import RESULT_OK, RESULT_TIMEOUT, RconStats
 from tests import InstantThread, InstantTimer
 from tests.fake import FakeClient
 from tests.plugins.admin import Admin_functional_test, Admin_TestCase
@@ -114,6 +115,65 @@ class Test_misc_cmd(Admin_TestCase):
         self.p.cmd_b3(data="", client=mock_client, cmd=mock_command)
         assert mock_command.sayLoudOrPM.called
 
+    def test_eventstats(self):
+        mock_command = Mock(spec=Command, name="cmd")
+        self.p.cmd_eventstats(data="", client=None, cmd=mock_command)
+        mock_command.sayLoudOrPM.assert_called_once_with(None, "^7No event handled yet")
+
+        stats = self.console.getEventsStats()
+        stats.add_event_handled("StatsPlugin", "EVT_CLIENT_KILL", 0.002)
+        stats.add_event_handled("SpreePlugin", "EVT_CLIENT_KILL", 0.001)
+        stats.add_event_wait("EVT_CLIENT_KILL", 0.01)
+        mock_command.reset_mock()
+        self.p.cmd_eventstats(data="stats", client=None, cmd=mock_command)
+        self.assertListEqual(
+            [
+                call(
+                    None,
+                    "^7Stats CLIENT_KILL: ^71 ^7p50 ^22.0ms ^7p95 ^32.0ms ^7p99 ^12.0ms ^7max 2.0ms",
+                ),
+                call(
+                    None,
+                    "^7Queue wait: ^71 ^7p50 ^210.0ms ^7p95 ^310.0ms ^7p99 ^110.0ms ^7max 10.0ms",
+                ),
+            ],
+            mock_command.sayLoudOrPM.mock_calls,
+        )
+
+    def test_rconstats(self):
+        mock_command = Mock(spec=Command, name="cmd")
+        self.console.output = Mock(stats=None)
+        self.p.cmd_rconstats(data="", client=None, cmd=mock_command)
+        mock_command.sayLoudOrPM.assert_called_once_with(
+            None, "^7RCON stats not available"
+        )
+
+        self.console.output.stats = stats = RconStats()
+        stats.record("status", 0.004, 50, 1000, 0, RESULT_OK)
+        stats.record("say hello", 0.002, 50, 0, 1, RESULT_TIMEOUT)
+        mock_command.reset_mock()
+        self.p.cmd_rconstats(data="", client=None, cmd=mock_command)
+        self.assertListEqual(
+            [
+                call(
+                    None,
+                    "^7status: ^71 ^7p50 ^24.0ms ^7p95 ^34.0ms ^7p99 ^14.0ms ^7max 4.0ms ^7total 0.0s",
+                ),
+                call(
+                    None,
+                    "^7say: ^71 ^7p50 ^22.0ms ^7p95 ^32.0ms ^7p99 ^12.0ms ^7max 2.0ms ^7total 0.0s"
+                    " ^11 ^7errors ^31 ^7retries",
+                ),
+            ],
+            mock_command.sayLoudOrPM.mock_calls,
+        )
+
+        mock_command.reset_mock()
+        self.p.cmd_rconstats(data="kick", client=None, cmd=mock_command)
+        mock_command.sayLoudOrPM.assert_called_once_with(
+            None, "^7No RCON command sent yet"
+        )
+
     def test_rebuild(self):
         mock_client = Mock(spec=Client, name="client")
         mock_client.maxLevel = 0
@@ -1158,9 +1218,9 @@ class Test_cmd_help(Admin_functional_test):
         self.joe.says("!help")
         self.joe.message.assert_called_with(
             "^7Available commands: admins, admintest, aliases, b3, ban, banall, baninfo"
-            ", clear, clientinfo, die, find, help, iamgod, kick, kicka"
+            ", clear, clientinfo, die, eventstats, find, help, iamgod, kick, kicka"
             "ll, lastbans, leveltest, list, longlist, lookup, makereg, map, maprotate, maps, "
-            "mask, nextmap, notice, pause, permban, poke, putgroup, rebuild, reco"
+            "mask, nextmap, notice, pause, permban, poke, putgroup, rconstats, rebuild, reco"
             "nfig, regtest, regulars, restart, rules, runas, say, scream, seen, spam, s"
             "pams, spank, spankall, status, tempban, time, unban, ungroup, unmask, unre"
             "g, warn, warnclear, warninfo, warnremove, warns, warntest"
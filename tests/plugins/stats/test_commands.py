@@ -111,6 +111,18 @@ class Test_cmd_topstats(StatPluginTestCase):
         # THEN
         self.assertListEqual(["Stats: No top players"], self.joe.message_history)
 
+    def test_damage_only(self):
+        # GIVEN
+        self.p.onDamage(
+            self.console.getEvent(
+                "EVT_CLIENT_DAMAGE", ("30", "19"), self.joe, self.mike
+            )
+        )
+        # WHEN
+        self.joe.says("!topstats")
+        # THEN
+        self.assertListEqual(["Stats: No top players"], self.joe.message_history)
+
     def test_teammate(self):
         # GIVEN
         assert self.joe.team == self.mike.team
@@ -157,6 +169,20 @@ class Test_cmd_topxp(StatPluginTestCase):
             ["Stats: No top experienced players"], self.joe.message_history
         )
 
+    def test_damage_only(self):
+        # GIVEN
+        self.p.onDamage(
+            self.console.getEvent(
+                "EVT_CLIENT_DAMAGE", ("30", "19"), self.joe, self.mike
+            )
+        )
+        # WHEN
+        self.joe.says("!topxp")
+        # THEN
+        self.assertListEqual(
+            ["Stats: No top experienced players"], self.joe.message_history
+        )
+
     def test_teammate(self):
         # GIVEN
         assert self.joe.team == self.mike.team
@@ -195,3 +221,21 @@ class Test_cmd_topxp(StatPluginTestCase):
             ["Top Experienced Players: #1 Joe [12.5], #2 Mike [-0.0]"],
             self.joe.message_history,
         )
+
+
+class Test_damage_batch(StatPluginTestCase):
+    def test_damage_batch(self):
+        # WHEN
+        self.p.onDamageBatch(
+            self.console.getEvent(
+                "EVT_CLIENT_DAMAGE_BATCH",
+                (117, "19", 2, ("5", "1")),
+                self.joe,
+                self.mike,
+            )
+        )
+        # THEN
+        self.assertEqual(2, self.joe.var(self.p, "shotsHit").value)
+        self.assertEqual(117, self.joe.var(self.p, "damageHit").value)
+        self.assertEqual(2, self.mike.var(self.p, "shotsGot").value)
+        self.assertEqual(117, self.mike.var(self.p, "damageGot").value)